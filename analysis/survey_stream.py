@@ -0,0 +1,460 @@
+"""
+설문 응답 스트리밍 통계 (사용성 평가 / 챗봇 비교 대시보드)
+
+응답이 들어올 때마다 (그룹, 질문) 별 요약을 O(1) 로 갱신하고, 전체 응답을 다시 읽지 않고
+박스 / 바이올린 플롯을 그립니다. 그룹은 챗봇(Dr.CareSam, Woebot, ...), 질문은 설문 항목입니다.
+
+- RunningStats: Welford 평균 / 분산 + 최솟값 / 최댓값 (Chan 공식으로 병합)
+- QuantileSketch: 병합 가능한 분위수 스케치
+  - 서로 다른 값이 max_exact 개 이하면 값별 개수를 그대로 저장 → 리커트 / 10점 척도는 분위수가 정확
+    (np.percentile 과 같은 선형 보간)
+  - 그보다 많아지면 DDSketch (로그 간격 버킷, 상대 오차 relative_accuracy)로 전환
+- SurveyStream: (그룹, 질문) → (RunningStats, QuantileSketch), 병합 / JSON 저장 / 요약 표
+- boxplot_stats / violin_stats → matplotlib Axes.bxp / Axes.violin 입력 (스케치에서 계산)
+
+    stream = SurveyStream()
+    stream.add('Dr.CareSam', 'Empathy and understanding', 8)       # 응답 하나
+    stream.add_many(responses, group='chatbot', question='question', value='score')   # DataFrame 묶음
+    stream.save('survey_state.json')                               # 대시보드 프로세스 간 상태 유지
+
+실행 (저장된 상태에 새 응답 파일을 더하고 요약 출력):
+    python survey_stream.py new_responses.csv --state survey_state.json
+"""
+
+import argparse
+import inspect
+import json
+import math
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# 값 종류가 이 수 이하면 값별 개수를 정확히 저장
+DEFAULT_MAX_EXACT = 64
+# 0 으로 취급하는 절댓값 (DDSketch 0 버킷)
+_MIN_INDEXABLE = 1e-9
+DEFAULT_CHUNKSIZE = 100_000
+
+Key = Tuple[str, str]
+
+
+class RunningStats:
+    """Welford 온라인 평균 / 분산 (NaN 은 무시)"""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value: float):
+        if value != value:
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update_many(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            batch = RunningStats()
+            batch.count = len(values)
+            batch.mean = float(values.mean())
+            batch.m2 = float(((values - batch.mean) ** 2).sum())
+            batch.min = float(values.min())
+            batch.max = float(values.max())
+            self.merge(batch)
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """다른 요약을 합침 (Chan 등의 병렬 분산 공식)"""
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def variance(self, ddof: int = 1) -> float:
+        return self.m2 / (self.count - ddof) if self.count > ddof else float('nan')
+
+    def std(self, ddof: int = 1) -> float:
+        return math.sqrt(self.variance(ddof))
+
+    def to_dict(self) -> Dict:
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'min': self.min if self.count else None, 'max': self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'RunningStats':
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = state['count'], state['mean'], state['m2']
+        if stats.count:
+            stats.min, stats.max = state['min'], state['max']
+        return stats
+
+
+class QuantileSketch:
+    """
+    병합 가능한 분위수 스케치 (값별 정확한 개수 → 값 종류가 많아지면 DDSketch)
+
+    relative_accuracy: DDSketch 분위수의 상대 오차 한계 (버킷 경계 비율 γ = (1 + α) / (1 − α))
+    max_exact: 정확한 개수로 저장할 최대 값 종류 수
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY, max_exact: int = DEFAULT_MAX_EXACT):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_exact = max_exact
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.count = 0
+        self.exact: Optional[Dict[float, int]] = {}
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+
+    # -- 버킷 -------------------------------------------------------------
+
+    def _index(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _bucket_value(self, index: int) -> float:
+        # 버킷 (γ^(i−1), γ^i] 의 대표값 - 상대 오차가 α 이하
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def _add_bucketed(self, value: float, count: int):
+        if abs(value) < _MIN_INDEXABLE:
+            self.zero += count
+        elif value > 0:
+            index = self._index(value)
+            self.positive[index] = self.positive.get(index, 0) + count
+        else:
+            index = self._index(-value)
+            self.negative[index] = self.negative.get(index, 0) + count
+
+    def _collapse(self):
+        """정확한 개수 → DDSketch 버킷"""
+        exact, self.exact = self.exact, None
+        for value, count in exact.items():
+            self._add_bucketed(value, count)
+
+    @property
+    def is_exact(self) -> bool:
+        return self.exact is not None
+
+    # -- 갱신 / 병합 ------------------------------------------------------
+
+    def add(self, value: float, count: int = 1):
+        if value != value:
+            return
+        self.count += count
+        if self.exact is not None:
+            value = float(value)
+            self.exact[value] = self.exact.get(value, 0) + count
+            if len(self.exact) > self.max_exact:
+                self._collapse()
+        else:
+            self._add_bucketed(value, count)
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=float)
+        unique, counts = np.unique(values[~np.isnan(values)], return_counts=True)
+        for value, count in zip(unique.tolist(), counts.tolist()):
+            self.add(value, count)
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different relative_accuracy")
+        if other.exact is not None:
+            for value, count in other.exact.items():
+                self.add(value, count)
+            return self
+        if self.exact is not None:
+            self._collapse()
+        self.count += other.count
+        self.zero += other.zero
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for index, count in other_store.items():
+                store[index] = store.get(index, 0) + count
+        return self
+
+    # -- 조회 -------------------------------------------------------------
+
+    def items(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(값 오름차순, 개수) - DDSketch 모드에서는 버킷 대표값"""
+        if self.exact is not None:
+            values = np.array(sorted(self.exact), dtype=float)
+            return values, np.array([self.exact[value] for value in values.tolist()], dtype=np.int64)
+        negative = sorted(self.negative, reverse=True)
+        positive = sorted(self.positive)
+        values = ([-self._bucket_value(i) for i in negative] + ([0.0] if self.zero else [])
+                  + [self._bucket_value(i) for i in positive])
+        counts = ([self.negative[i] for i in negative] + ([self.zero] if self.zero else [])
+                  + [self.positive[i] for i in positive])
+        return np.array(values, dtype=float), np.array(counts, dtype=np.int64)
+
+    def quantile(self, q, minimum: Optional[float] = None, maximum: Optional[float] = None):
+        """
+        분위수 (np.percentile 의 선형 보간과 같은 정의)
+
+        minimum / maximum: 알고 있는 실제 최솟값 / 최댓값 (DDSketch 모드의 결과를 이 범위로 자름)
+        """
+        q = np.asarray(q, dtype=float)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+        values, counts = self.items()
+        # 0부터 센 순위 k 의 값 = 누적 개수가 k 를 넘는 첫 값
+        cumulative = np.cumsum(counts)
+        position = (self.count - 1) * q
+        lower = values[np.searchsorted(cumulative, np.floor(position), side='right')]
+        upper = values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+        result = lower + (position - np.floor(position)) * (upper - lower)
+        if minimum is not None or maximum is not None:
+            result = np.clip(result, minimum, maximum)
+        return result
+
+    def to_dict(self) -> Dict:
+        state = {'relative_accuracy': self.relative_accuracy, 'max_exact': self.max_exact, 'count': self.count}
+        if self.exact is not None:
+            state['exact'] = [[value, count] for value, count in sorted(self.exact.items())]
+        else:
+            state.update({'positive': sorted(self.positive.items()), 'negative': sorted(self.negative.items()),
+                          'zero': self.zero})
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'QuantileSketch':
+        sketch = cls(state['relative_accuracy'], state['max_exact'])
+        sketch.count = state['count']
+        if 'exact' in state:
+            sketch.exact = {float(value): int(count) for value, count in state['exact']}
+        else:
+            sketch.exact = None
+            sketch.positive = {int(index): int(count) for index, count in state['positive']}
+            sketch.negative = {int(index): int(count) for index, count in state['negative']}
+            sketch.zero = state['zero']
+        return sketch
+
+
+class SurveyStream:
+    """
+    (그룹, 질문) 별 스트리밍 설문 요약
+
+    relative_accuracy / max_exact: QuantileSketch 설정 (모든 셀 공통)
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY, max_exact: int = DEFAULT_MAX_EXACT):
+        self.relative_accuracy = relative_accuracy
+        self.max_exact = max_exact
+        self.cells: Dict[Key, Tuple[RunningStats, QuantileSketch]] = {}
+
+    def _cell(self, group: str, question: str) -> Tuple[RunningStats, QuantileSketch]:
+        key = (str(group), str(question))
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = (RunningStats(), QuantileSketch(self.relative_accuracy, self.max_exact))
+        return cell
+
+    def add(self, group: str, question: str, score: float):
+        """응답 하나 (NaN 은 무응답으로 무시)"""
+        stats, sketch = self._cell(group, question)
+        stats.update(score)
+        sketch.add(score)
+
+    def add_response(self, group: str, answers: Dict[str, float]):
+        """응답자 한 명의 질문별 점수"""
+        for question, score in answers.items():
+            self.add(group, question, score)
+
+    def add_values(self, group: str, question: str, scores: Sequence[float]):
+        """한 셀의 점수 묶음 (NaN 무시)"""
+        scores = np.asarray(scores, dtype=float)
+        stats, sketch = self._cell(group, question)
+        stats.update_many(scores)
+        sketch.add_many(scores)
+
+    def add_many(self, frame: pd.DataFrame, group: str = 'chatbot', question: str = 'question',
+                 value: str = 'score', default_question: str = 'score'):
+        """long-format 응답 묶음 (question 열이 없으면 모두 default_question)"""
+        scores = pd.to_numeric(frame[value], errors='coerce')
+        questions = frame[question] if question in frame else pd.Series(default_question, index=frame.index)
+        for (group_name, question_name), cell_scores in scores.groupby([frame[group], questions], sort=False):
+            self.add_values(group_name, question_name, cell_scores.to_numpy())
+
+    def merge(self, other: 'SurveyStream') -> 'SurveyStream':
+        for key, (stats, sketch) in other.cells.items():
+            own_stats, own_sketch = self._cell(*key)
+            own_stats.merge(stats)
+            own_sketch.merge(sketch)
+        return self
+
+    def keys(self, group: Optional[str] = None, question: Optional[str] = None) -> List[Key]:
+        """입력 순서의 (그룹, 질문) 목록 (group / question 으로 거름)"""
+        return [key for key in self.cells
+                if (group is None or key[0] == group) and (question is None or key[1] == question)]
+
+    def stats(self, group: str, question: str) -> RunningStats:
+        return self.cells[(group, question)][0]
+
+    def quantiles(self, group: str, question: str, q) -> np.ndarray:
+        stats, sketch = self.cells[(group, question)]
+        return sketch.quantile(q, stats.min, stats.max)
+
+    def summary(self) -> pd.DataFrame:
+        """셀별 n, 평균, 표준편차, 최솟값, 사분위수, 최댓값"""
+        rows = []
+        for (group, question), (stats, sketch) in self.cells.items():
+            q1, median, q3 = sketch.quantile([0.25, 0.5, 0.75], stats.min, stats.max)
+            rows.append({'group': group, 'question': question, 'n': stats.count, 'mean': stats.mean,
+                         'std': stats.std(), 'min': stats.min, 'q1': q1, 'median': median, 'q3': q3,
+                         'max': stats.max, 'exact': sketch.is_exact})
+        return pd.DataFrame(rows)
+
+    def to_dict(self) -> Dict:
+        return {'relative_accuracy': self.relative_accuracy, 'max_exact': self.max_exact,
+                'cells': [{'group': group, 'question': question, 'stats': stats.to_dict(), 'sketch': sketch.to_dict()}
+                          for (group, question), (stats, sketch) in self.cells.items()]}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'SurveyStream':
+        stream = cls(state['relative_accuracy'], state['max_exact'])
+        for cell in state['cells']:
+            stream.cells[(cell['group'], cell['question'])] = (RunningStats.from_dict(cell['stats']),
+                                                               QuantileSketch.from_dict(cell['sketch']))
+        return stream
+
+    def save(self, path: str):
+        """JSON 상태 저장 (임시 파일에 쓴 뒤 교체)"""
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SurveyStream':
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+# ---------------------------------------------------------------------------
+# 플롯 (스케치 → matplotlib bxp / violin 입력)
+# ---------------------------------------------------------------------------
+
+def boxplot_stats(stream: SurveyStream, keys: Sequence[Key], labels: Optional[Sequence[str]] = None,
+                  whis: float = 1.5) -> List[Dict]:
+    """
+    Axes.bxp 입력 (matplotlib.cbook.boxplot_stats 와 같은 정의: 사분위수, 1.5 IQR 수염, 이상값)
+
+    이상값은 서로 다른 값마다 한 번씩만 넣습니다 (같은 위치에 겹쳐 그려지는 점).
+    """
+    result = []
+    for i, key in enumerate(keys):
+        stats, sketch = stream.cells[key]
+        values, _ = sketch.items()
+        values = np.clip(values, stats.min, stats.max)
+        q1, median, q3 = sketch.quantile([0.25, 0.5, 0.75], stats.min, stats.max)
+        iqr = q3 - q1
+        inside = values[(values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)]
+        result.append({
+            'label': labels[i] if labels is not None else key[1],
+            'mean': stats.mean, 'med': median, 'q1': q1, 'q3': q3, 'iqr': iqr,
+            'whislo': float(inside.min()) if len(inside) else q1,
+            'whishi': float(inside.max()) if len(inside) else q3,
+            'fliers': values[(values < q1 - whis * iqr) | (values > q3 + whis * iqr)],
+        })
+    return result
+
+
+def violin_stats(stream: SurveyStream, keys: Sequence[Key], points: int = 100, cut: float = 2.0) -> List[Dict]:
+    """
+    Axes.violin 입력 - 스케치 값 / 개수로 계산한 가우시안 KDE (Scott 대역폭, seaborn violinplot 기본값과 같은 정의)
+
+    정확한 개수 모드에서는 전체 점수로 계산한 scipy.stats.gaussian_kde 와 같은 밀도입니다.
+    """
+    result = []
+    for key in keys:
+        stats, sketch = stream.cells[key]
+        values, counts = sketch.items()
+        values = np.clip(values, stats.min, stats.max)
+        std = stats.std() if stats.count > 1 else 0.0
+        bandwidth = std * stats.count ** (-1 / 5) if std > 0 else 1.0
+        coords = np.linspace(stats.min - cut * bandwidth, stats.max + cut * bandwidth, points)
+        kernel = np.exp(-0.5 * ((coords[:, None] - values[None, :]) / bandwidth) ** 2)
+        density = (kernel * counts).sum(axis=1) / (stats.count * bandwidth * math.sqrt(2 * math.pi))
+        result.append({'coords': coords, 'vals': density, 'mean': stats.mean,
+                       'median': float(sketch.quantile(0.5, stats.min, stats.max)),
+                       'min': stats.min, 'max': stats.max})
+    return result
+
+
+def plot_box(ax, stream: SurveyStream, keys: Sequence[Key], labels: Optional[Sequence[str]] = None,
+             colors=None, vert: bool = True, show_means: bool = True):
+    """스케치로 박스 플롯 (평균은 검은 점)"""
+    stats = boxplot_stats(stream, keys, labels)
+    # matplotlib 3.10 부터 vert 대신 orientation
+    if 'orientation' in inspect.signature(ax.bxp).parameters:
+        box = ax.bxp(stats, orientation='vertical' if vert else 'horizontal', patch_artist=True)
+    else:
+        box = ax.bxp(stats, vert=vert, patch_artist=True)
+    for patch, color in zip(box['boxes'], colors or []):
+        patch.set_facecolor(color)
+    if show_means:
+        for i, item in enumerate(stats):
+            ax.plot(*((item['mean'], i + 1) if not vert else (i + 1, item['mean'])), 'ko')
+    return box
+
+
+def plot_violin(ax, stream: SurveyStream, keys: Sequence[Key], labels: Optional[Sequence[str]] = None,
+                colors=None, show_points: bool = True):
+    """스케치로 바이올린 플롯 (show_points: 서로 다른 점수를 점으로 표시)"""
+    parts = ax.violin(violin_stats(stream, keys), showextrema=False)
+    for body, color in zip(parts['bodies'], colors or []):
+        body.set_facecolor(color)
+        body.set_alpha(0.8)
+    if show_points:
+        for i, key in enumerate(keys):
+            values, _ = stream.cells[key][1].items()
+            ax.scatter(np.full(len(values), i + 1), values, s=8, color='white', edgecolors='black',
+                       linewidths=0.5, zorder=3)
+    ax.set_xticks(range(1, len(keys) + 1))
+    ax.set_xticklabels(labels if labels is not None else [key[0] for key in keys])
+    return parts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="설문 응답을 스트리밍 요약에 더하고 요약 출력")
+    parser.add_argument('responses', nargs='*', help="long-format CSV (chatbot, [question,] score)")
+    parser.add_argument('--state', help="요약 상태 JSON (있으면 이어서 더하고 다시 저장)")
+    parser.add_argument('--group-column', default='chatbot')
+    parser.add_argument('--question-column', default='question')
+    parser.add_argument('--score-column', default='score')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    stream = SurveyStream.load(args.state) if args.state and os.path.exists(args.state) else SurveyStream()
+    for path in args.responses:
+        for chunk in pd.read_csv(path, chunksize=args.chunksize):
+            stream.add_many(chunk, group=args.group_column, question=args.question_column, value=args.score_column)
+    if args.state:
+        stream.save(args.state)
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(stream.summary().round(3).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
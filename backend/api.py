@@ -1,4 +1,5 @@
-from fastapi import FastAPI, Query, HTTPException, Form
+from fastapi import FastAPI, Query, HTTPException, Form, Request
+from fastapi.responses import JSONResponse
 import httpx
 from pydantic import BaseModel
 from typing import Optional
@@ -6,10 +7,17 @@ from typing import List
 import openai
 import os
 import sys
+import json
+import asyncio
+import hashlib
+import time
+import contextlib
+import signal
 from fastapi.middleware.cors import CORSMiddleware
 import mysql.connector
 import bcrypt
 from dotenv import load_dotenv
+from telemetry import TelemetryWriter, turn_record
 
 # 환경변수 로드
 load_dotenv()
@@ -57,6 +65,24 @@ client = OpenAI(
     api_key=OPENAI_API_KEY,
 )
 
+# 롤링 대화 요약 설정 - 최근 메시지는 원문 그대로, 그 이전은 요약으로 대체
+# (chat_summary 테이블 필요 - 켜면 시작 시 CREATE TABLE IF NOT EXISTS, 실패하면 요약 기능을 끔)
+SUMMARY_ENABLED = os.getenv('SUMMARY_ENABLED', 'false').lower() == 'true'
+SUMMARY_MODEL = os.getenv('SUMMARY_MODEL', 'gpt-4-turbo-preview')
+SUMMARY_RECENT_MESSAGES = int(os.getenv('SUMMARY_RECENT_MESSAGES', '8'))
+SUMMARY_MIN_NEW_MESSAGES = int(os.getenv('SUMMARY_MIN_NEW_MESSAGES', '2'))
+
+# 대화 품질 텔레메트리 - 턴별 길이 / 지연 시간 / userEmotion / 위험 안내 / 토큰 사용량을
+# 백그라운드 스레드가 Arrow IPC 로그로 기록 (telemetry.py, 분석 코드는 ratings_io.load_telemetry 로 읽음)
+TELEMETRY_ENABLED = os.getenv('TELEMETRY_ENABLED', 'true').lower() == 'true'
+telemetry = TelemetryWriter(
+    os.getenv('TELEMETRY_DIR', 'telemetry'),
+    batch_size=int(os.getenv('TELEMETRY_BATCH_SIZE', '256')),
+    flush_seconds=float(os.getenv('TELEMETRY_FLUSH_SECONDS', '5')),
+    rotate_bytes=int(os.getenv('TELEMETRY_ROTATE_BYTES', str(64 * 1024 * 1024))),
+    rotate_seconds=float(os.getenv('TELEMETRY_ROTATE_SECONDS', '3600'))
+)
+
 class Message(BaseModel):
     from_: str
     text: str
@@ -132,9 +158,389 @@ def get_count_and_token(user_email):
         if conn:
             conn.close()
 
+# ---------------------------------------------------------------------------
+# 롤링 대화 요약
+#
+# 채팅 기록이 저장된 뒤 백그라운드 워커가 chat_uuid별 요약을 갱신하고,
+# 채팅 API는 "요약 + 최근 메시지"로 프롬프트를 구성합니다.
+# 요약은 앞쪽 turn_count개 메시지를 대상으로 하며 covered_hash로 버전을 확인하므로
+# 현재 대화와 맞지 않는(오래된) 요약은 사용되지 않습니다.
+# chat_summary 테이블은 SUMMARY_ENABLED=true 일 때 서버 시작 시 생성합니다.
+# ---------------------------------------------------------------------------
+
+CHAT_SUMMARY_DDL = """
+    CREATE TABLE IF NOT EXISTS chat_summary (
+        chat_uuid    VARCHAR(64) PRIMARY KEY,
+        summary      TEXT NOT NULL,
+        turn_count   INT NOT NULL,
+        covered_hash CHAR(40) NOT NULL,
+        updated_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+"""
+
+def ensure_summary_table() -> bool:
+    """chat_summary 테이블 생성 (이미 있으면 그대로), 실패 시 False"""
+    conn = None
+    cursor = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(CHAT_SUMMARY_DDL)
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"Summary table setup error: {e}")
+        return False
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def dialogue_hash(dialogue: List[dict]) -> str:
+    """대화 메시지 목록의 버전 해시"""
+    payload = json.dumps([[m["role"], m["content"]] for m in dialogue], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def get_chat_summary(chat_uuid: str, raise_errors: bool = False):
+    """저장된 대화 요약 조회 (없으면 None, 오류 시 None - raise_errors=True 면 예외를 그대로 전달)"""
+    conn = None
+    cursor = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT summary, turn_count, covered_hash FROM chat_summary WHERE chat_uuid = %s",
+            (chat_uuid,)
+        )
+        return cursor.fetchone()
+    except Exception as e:
+        print(f"Summary query error: {e}")
+        if raise_errors:
+            raise
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def db_upsert_summary(chat_uuid: str, summary: str, turn_count: int, covered_hash: str,
+                      stale_hash: Optional[str] = None):
+    """
+    대화 요약 저장 (더 많은 메시지를 포함한 요약만 덮어씀)
+
+    stale_hash: 저장된 요약이 현재 대화와 다를 때 조회한 covered_hash - 그 요약이 그대로면
+    turn_count 와 상관없이 교체 (그 사이 다른 작업이 새 요약을 썼으면 건드리지 않음)
+    """
+    conn = None
+    cursor = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        if stale_hash is not None:
+            replace_query = """
+                UPDATE chat_summary SET summary = %s, turn_count = %s, covered_hash = %s
+                WHERE chat_uuid = %s AND covered_hash = %s
+            """
+            cursor.execute(replace_query, (summary, turn_count, covered_hash, chat_uuid, stale_hash))
+        else:
+            upsert_query = """
+                INSERT INTO chat_summary (chat_uuid, summary, turn_count, covered_hash)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    summary = IF(VALUES(turn_count) >= turn_count, VALUES(summary), summary),
+                    covered_hash = IF(VALUES(turn_count) >= turn_count, VALUES(covered_hash), covered_hash),
+                    turn_count = GREATEST(turn_count, VALUES(turn_count))
+            """
+            cursor.execute(upsert_query, (chat_uuid, summary, turn_count, covered_hash))
+        conn.commit()
+    except Exception as e:
+        print(f"Summary upsert error: {e}")
+        if conn:
+            conn.rollback()
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def to_dialogue(messages: List[Message]) -> List[dict]:
+    """프론트엔드 메시지를 OpenAI 대화 형식으로 변환"""
+    return [
+        {"role": "assistant" if msg.from_ == "ai" else "user", "content": msg.text}
+        for msg in messages
+    ]
+
+def build_conversation_messages(prefix: List[dict], dialogue: List[dict], chat_uuid: Optional[str]) -> List[dict]:
+    """프롬프트 구성: 유효한 요약이 있으면 요약 + 최근 메시지, 없으면 전체 대화"""
+    conversation_messages = list(prefix)
+
+    summary = get_chat_summary(chat_uuid) if SUMMARY_ENABLED and chat_uuid else None
+    if summary:
+        turn_count = summary["turn_count"]
+        # 요약이 다루는 구간이 현재 대화와 정확히 일치할 때만 사용
+        if 0 < turn_count < len(dialogue) and dialogue_hash(dialogue[:turn_count]) == summary["covered_hash"]:
+            conversation_messages.append({
+                "role": "system",
+                "content": f"지금까지의 대화 요약 (Summary of the conversation so far): {summary['summary']}"
+            })
+            dialogue = dialogue[turn_count:]
+
+    conversation_messages.extend(dialogue)
+    return conversation_messages
+
+def summarize_dialogue(previous_summary: Optional[str], dialogue: List[dict], lang: str) -> str:
+    """이전 요약과 새 메시지를 합쳐 새 요약 생성"""
+    language = "Korean" if lang == "ko" else "English"
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in dialogue)
+    prompt = f"""Update the running summary of a counselling conversation between a user and Care Sam.
+Keep the user's main concerns, emotions, important personal details, agreed coping strategies and any risk signals.
+Write at most 200 words in {language}.
+
+Previous summary:
+{previous_summary or '(none)'}
+
+New messages:
+{transcript}"""
+
+    response = client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=512,
+        temperature=0.3
+    )
+    return response.choices[0].message.content.strip()
+
+def refresh_chat_summary(chat_uuid: str, dialogue: List[dict], lang: str):
+    """대화 요약 갱신 (백그라운드 스레드에서 실행)"""
+    target = len(dialogue) - SUMMARY_RECENT_MESSAGES
+    if target <= 0:
+        return
+
+    try:
+        current = get_chat_summary(chat_uuid, raise_errors=True)
+    except Exception:
+        # 조회 오류를 "요약 없음"으로 보면 저장도 실패할 요약을 매번 새로 생성하게 됨
+        return
+    previous_summary = None
+    start = 0
+    stale_hash = None
+    if current:
+        covered = current["turn_count"]
+        if 0 < covered <= len(dialogue) and dialogue_hash(dialogue[:covered]) == current["covered_hash"]:
+            if covered >= target:
+                return  # 저장된 요약이 이 대화를 이미 target 이상 포함
+            previous_summary = current["summary"]
+            start = covered
+        else:
+            # 저장된 요약은 이 대화의 것이 아님 (수정/재시작) → 처음부터 요약해 turn_count 와 상관없이 교체
+            stale_hash = current["covered_hash"]
+
+    if target - start < SUMMARY_MIN_NEW_MESSAGES:
+        return
+
+    summary = summarize_dialogue(previous_summary, dialogue[start:target], lang)
+    db_upsert_summary(chat_uuid, summary, target, dialogue_hash(dialogue[:target]), stale_hash)
+
+class SummaryWorker:
+    """chat_uuid별 요약 작업을 모아 요청 경로 밖에서 순차 처리하는 워커"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.pending = {}
+        self.task = None
+        self.busy = False
+        self.completed = 0
+
+    def enqueue(self, chat_uuid: Optional[str], dialogue: List[dict], lang: str):
+        """요약 작업 등록 (같은 chat_uuid의 대기 작업은 최신 대화로 교체)"""
+        if not SUMMARY_ENABLED or not chat_uuid or self.task is None:
+            return
+        if chat_uuid not in self.pending:
+            self.queue.put_nowait(chat_uuid)
+        self.pending[chat_uuid] = (dialogue, lang)
+
+    async def run(self):
+        while True:
+            chat_uuid = await self.queue.get()
+            dialogue, lang = self.pending.pop(chat_uuid)
+            self.busy = True
+            try:
+                await asyncio.to_thread(refresh_chat_summary, chat_uuid, dialogue, lang)
+            except Exception as e:
+                print(f"Summary worker error: {e}")
+            finally:
+                self.busy = False
+                self.completed += 1
+                self.queue.task_done()
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def drain(self, timeout: float):
+        """대기 중인 요약 작업을 제한 시간 안에 처리하고 (완료, 중단) 건수 반환"""
+        if self.task is None:
+            return 0, 0
+        completed_before = self.completed
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            pass
+        aborted = len(self.pending) + (1 if self.busy else 0)
+        self.task.cancel()
+        self.task = None
+        return self.completed - completed_before, aborted
+
+summary_worker = SummaryWorker()
+
+# ---------------------------------------------------------------------------
+# 종료 시 graceful drain
+#
+# SIGTERM을 받으면 새 채팅 요청은 503으로 거절하고, 진행 중인 LLM 호출과
+# DB 저장(채팅 기록, 대기 중인 요약)은 SHUTDOWN_DRAIN_TIMEOUT 안에서 마무리합니다.
+# drain 은 시작 시 설치하는 시그널 훅에서 시작되므로 python api.py 와 uvicorn api:app 모두 동작합니다.
+# uvicorn CLI로 실행할 때는 --timeout-graceful-shutdown 을 같은 값으로 지정하세요.
+# ---------------------------------------------------------------------------
+
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', '30'))
+CHAT_PATHS = {"/thank/chat", "/cons/chat", "/thank/diary"}
+
+class RequestLifecycle:
+    """진행 중인 채팅 요청 추적 및 종료 시 drain 결과 집계"""
+
+    def __init__(self):
+        self.draining = False
+        self.drain_started = None
+        self.inflight = 0
+        self.drained = 0
+        self.aborted = 0
+        self.rejected = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    def begin_drain(self):
+        """새 채팅 요청 수신 중단 (여러 번 호출해도 안전)"""
+        if not self.draining:
+            self.draining = True
+            self.drain_started = time.monotonic()
+            print(f"Draining: {self.inflight} chat request(s) in flight")
+
+    def remaining(self) -> float:
+        """drain 마감까지 남은 시간(초)"""
+        if self.drain_started is None:
+            return SHUTDOWN_DRAIN_TIMEOUT
+        return SHUTDOWN_DRAIN_TIMEOUT - (time.monotonic() - self.drain_started)
+
+    @contextlib.asynccontextmanager
+    async def track(self):
+        self.inflight += 1
+        self.idle.clear()
+        completed = False
+        try:
+            yield
+            completed = True
+        finally:
+            self.inflight -= 1
+            if self.draining:
+                if completed:
+                    self.drained += 1
+                else:
+                    self.aborted += 1
+            if self.inflight == 0:
+                self.idle.set()
+
+    async def wait_idle(self):
+        """진행 중인 요청이 끝나거나 마감될 때까지 대기, 남은 요청 수 반환"""
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout=max(self.remaining(), 0))
+        except asyncio.TimeoutError:
+            pass
+        return self.inflight
+
+lifecycle = RequestLifecycle()
+
+def install_drain_signal_handlers():
+    """SIGTERM/SIGINT 수신 즉시 drain 시작 (서버가 설치한 기존 핸들러 앞에 연결)"""
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+
+        def handler(signum, frame, previous=previous):
+            lifecycle.begin_drain()
+            if callable(previous):
+                previous(signum, frame)
+            elif previous == signal.SIG_DFL:
+                signal.signal(signum, signal.SIG_DFL)
+                os.kill(os.getpid(), signum)
+
+        try:
+            signal.signal(sig, handler)
+        except ValueError:
+            # 메인 스레드가 아닌 곳에서 앱을 실행한 경우 (테스트 클라이언트 등)
+            print("Drain signal hook not installed: not running in the main thread")
+            return
+
+@app.middleware("http")
+async def drain_guard(request: Request, call_next):
+    """drain 중에는 새 채팅 요청 거절, 그 외 채팅 요청은 진행 중으로 추적"""
+    if request.url.path not in CHAT_PATHS:
+        return await call_next(request)
+    if lifecycle.draining:
+        lifecycle.rejected += 1
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server is shutting down"},
+            headers={"Retry-After": "5", "Connection": "close"}
+        )
+    async with lifecycle.track():
+        return await call_next(request)
+
+@app.on_event("startup")
+async def install_drain_hook():
+    install_drain_signal_handlers()
+
+@app.on_event("startup")
+async def start_summary_worker():
+    global SUMMARY_ENABLED
+    if SUMMARY_ENABLED and not await asyncio.to_thread(ensure_summary_table):
+        print("Rolling summaries disabled: chat_summary table is unavailable")
+        SUMMARY_ENABLED = False
+    summary_worker.start()
+
+@app.on_event("startup")
+async def start_telemetry():
+    if TELEMETRY_ENABLED:
+        telemetry.start()
+
+@app.on_event("shutdown")
+async def drain_on_shutdown():
+    lifecycle.begin_drain()
+    still_running = await lifecycle.wait_idle()
+    summary_drained, summary_aborted = await summary_worker.drain(lifecycle.remaining())
+    await asyncio.to_thread(telemetry.close, max(lifecycle.remaining(), 1))
+    print(
+        f"Shutdown drain report: chats drained={lifecycle.drained}, "
+        f"aborted={lifecycle.aborted + still_running}, "
+        f"rejected={lifecycle.rejected}; summaries drained={summary_drained}, aborted={summary_aborted}; "
+        f"telemetry written={telemetry.written}, dropped={telemetry.dropped}"
+    )
+
+async def create_chat_completion(conversation_messages: List[dict]):
+    """채팅 응답과 토큰 사용량 생성 (이벤트 루프를 막지 않도록 스레드에서 호출)"""
+    response = await asyncio.to_thread(
+        client.chat.completions.create,
+        model="gpt-4-turbo-preview",
+        messages=conversation_messages,
+        max_tokens=4096,
+        temperature=1.0
+    )
+    return response.choices[0].message.content.strip(), response.usage
+
 @app.get("/")
 async def root():
     """API 상태 확인"""
+    if lifecycle.draining:
+        raise HTTPException(status_code=503, detail="Server is shutting down")
     return {"message": "HoMemeTown Dr. CareSam API is running", "status": "healthy"}
 
 @app.post("/userinfo")
@@ -272,26 +678,23 @@ She likes real storytelling.
 Answer flexibly and with fun. Also frequently mix in emoticons in your responses. 
 {lang}"""
 
-    # 대화 메시지 구성
-    conversation_messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "assistant", "content": f"사용자의 감사일기는 현재 {diaryCount}번 작성되어 있고, {diaryToken}의 감사토큰이 발급되어 있습니다."}
-    ]
-    
-    # 사용자 메시지 추가
-    for msg in messages.messages:
-        role = "assistant" if msg.from_ == "ai" else "user"
-        conversation_messages.append({"role": role, "content": msg.text})
-
+    # 대화 메시지 구성 (요약 + 최근 메시지)
+    dialogue = to_dialogue(messages.messages)
+    conversation_messages = build_conversation_messages(
+        [
+            {"role": "system", "content": system_prompt},
+            {"role": "assistant", "content": f"사용자의 감사일기는 현재 {diaryCount}번 작성되어 있고, {diaryToken}의 감사토큰이 발급되어 있습니다."}
+        ],
+        dialogue,
+        last_message.uniqeChatId
+    )
+
+    ai_response = None
+    usage = None
+    started = time.perf_counter()
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=conversation_messages,
-            max_tokens=4096,
-            temperature=1.0
-        )
-        
-        ai_response = response.choices[0].message.content.strip()
+        ai_response, usage = await create_chat_completion(conversation_messages)
+        latency_ms = (time.perf_counter() - started) * 1000
         
         # 채팅 기록 저장
         db_insert_chat(
@@ -302,6 +705,12 @@ Answer flexibly and with fun. Also frequently mix in emoticons in your responses
             last_message.text, 
             ai_response
         )
+        summary_worker.enqueue(
+            last_message.uniqeChatId,
+            dialogue + [{"role": "assistant", "content": ai_response}],
+            messages.lang
+        )
+        telemetry.emit(turn_record("/thank/chat", messages.messages, messages.lang, ai_response, latency_ms, usage))
         
         return {
             "success": True,
@@ -309,6 +718,8 @@ Answer flexibly and with fun. Also frequently mix in emoticons in your responses
         }
     except Exception as e:
         print(f"OpenAI API error: {e}")
+        telemetry.emit(turn_record("/thank/chat", messages.messages, messages.lang, ai_response,
+                                   (time.perf_counter() - started) * 1000, usage, status="error"))
         raise HTTPException(status_code=500, detail="Failed to generate response")
 
 @app.post("/thank/diary")
@@ -401,22 +812,20 @@ Answer flexibly and with fun. Also frequently mix in emoticons in your responses
     if last_message.userEmotion:
         emotion_context = f"사용자의 현재 감정 상태는 {last_message.userEmotion}입니다. "
 
-    # 대화 메시지 구성
-    conversation_messages = [{"role": "system", "content": system_prompt}]
-    
-    for msg in messages.messages:
-        role = "assistant" if msg.from_ == "ai" else "user"
-        conversation_messages.append({"role": role, "content": msg.text})
-
+    # 대화 메시지 구성 (요약 + 최근 메시지)
+    dialogue = to_dialogue(messages.messages)
+    conversation_messages = build_conversation_messages(
+        [{"role": "system", "content": system_prompt}],
+        dialogue,
+        last_message.uniqeChatId
+    )
+
+    ai_response = None
+    usage = None
+    started = time.perf_counter()
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=conversation_messages,
-            max_tokens=4096,
-            temperature=1.0
-        )
-        
-        ai_response = response.choices[0].message.content.strip()
+        ai_response, usage = await create_chat_completion(conversation_messages)
+        latency_ms = (time.perf_counter() - started) * 1000
         
         # 채팅 기록 저장
         db_insert_chat(
@@ -427,6 +836,12 @@ Answer flexibly and with fun. Also frequently mix in emoticons in your responses
             last_message.text,
             ai_response
         )
+        summary_worker.enqueue(
+            last_message.uniqeChatId,
+            dialogue + [{"role": "assistant", "content": ai_response}],
+            messages.lang
+        )
+        telemetry.emit(turn_record("/cons/chat", messages.messages, messages.lang, ai_response, latency_ms, usage))
         
         return {
             "success": True,
@@ -434,6 +849,8 @@ Answer flexibly and with fun. Also frequently mix in emoticons in your responses
         }
     except Exception as e:
         print(f"OpenAI API error: {e}")
+        telemetry.emit(turn_record("/cons/chat", messages.messages, messages.lang, ai_response,
+                                   (time.perf_counter() - started) * 1000, usage, status="error"))
         raise HTTPException(status_code=500, detail="Failed to generate response")
 
 @app.post('/login')
@@ -475,4 +892,5 @@ async def login(request: dict):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    uvicorn.run(app, host="0.0.0.0", port=8000, timeout_graceful_shutdown=int(SHUTDOWN_DRAIN_TIMEOUT))
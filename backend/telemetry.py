@@ -0,0 +1,200 @@
+"""
+대화 품질 텔레메트리 (턴별 요약 기록 → Arrow IPC 로그)
+
+채팅 API(/thank/chat, /cons/chat)가 턴마다 작은 기록(길이, 지연 시간, userEmotion, 위험 안내 여부,
+토큰 사용량)을 남기면 백그라운드 스레드가 모아서 Arrow IPC 스트림 파일에 배치 단위로 추가합니다.
+요청 경로에서는 큐에 넣기만 하므로 응답 지연이 늘지 않고, 큐가 가득 차면 기록을 버리고 dropped 로 셉니다.
+
+- 파일: TELEMETRY_DIR/telemetry-<시작 시각>-<일련번호 6자리>-<pid>.arrows (쓰는 중에는 .arrows.open)
+  → 이름순 정렬 = 시작 순서 (같은 초에 회전해도 일련번호로 순서 유지)
+- 회전: TELEMETRY_ROTATE_BYTES 를 넘거나 TELEMETRY_ROTATE_SECONDS 가 지나면 파일을 닫고 새 파일 시작
+- 대화 원문, 이메일, 이름은 저장하지 않습니다 (chat_uuid 로 chat_history 와 연결)
+
+분석 코드에서 읽기 (phd-thesis/experiment3-hypothesis-testing/ratings_io.py):
+    from ratings_io import load_telemetry
+    turns = load_telemetry('telemetry/')
+"""
+
+import contextlib
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+
+TELEMETRY_VERSION = 1
+
+SCHEMA = pa.schema([
+    ('ts', pa.timestamp('ms', tz='UTC')),
+    ('endpoint', pa.string()),
+    ('chat_mode', pa.string()),
+    ('chat_uuid', pa.string()),
+    ('lang', pa.string()),
+    ('turn', pa.int32()),
+    ('user_chars', pa.int32()),
+    ('reply_chars', pa.int32()),
+    ('latency_ms', pa.float32()),
+    ('user_emotion', pa.string()),
+    ('risk_referral', pa.bool_()),
+    ('prompt_tokens', pa.int32()),
+    ('completion_tokens', pa.int32()),
+    ('status', pa.string()),
+], metadata={'telemetry_version': str(TELEMETRY_VERSION)})
+
+# 상담 프롬프트의 전문기관 안내 번호 - 응답에 두 개 이상 있으면 위험 안내(risk_referral)로 기록
+RISK_HOTLINES = ("109", "1577-0199", "129", "1588-9191")
+
+FILE_PREFIX = "telemetry-"
+FILE_SUFFIX = ".arrows"
+OPEN_SUFFIX = ".open"
+
+
+def risk_referral(reply: str) -> bool:
+    """응답이 전문기관 안내(자살예방상담전화 등)를 포함하는지"""
+    return sum(hotline in reply for hotline in RISK_HOTLINES) >= 2
+
+
+def turn_record(endpoint: str, messages, lang: str, reply: Optional[str], latency_ms: float,
+                usage=None, status: str = "ok") -> Dict:
+    """요청 메시지 목록(마지막 = 사용자 발화)과 응답으로 턴 기록 만들기"""
+    last_message = messages[-1]
+    return {
+        'ts': datetime.now(timezone.utc),
+        'endpoint': endpoint,
+        'chat_mode': last_message.chatMode,
+        'chat_uuid': last_message.uniqeChatId,
+        'lang': lang,
+        'turn': len(messages),
+        'user_chars': len(last_message.text),
+        'reply_chars': len(reply) if reply is not None else None,
+        'latency_ms': latency_ms,
+        'user_emotion': last_message.userEmotion,
+        'risk_referral': risk_referral(reply) if reply is not None else None,
+        'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+        'completion_tokens': getattr(usage, 'completion_tokens', None),
+        'status': status,
+    }
+
+
+class TelemetryWriter:
+    """
+    턴 기록을 백그라운드 스레드에서 Arrow IPC 스트림 파일로 쓰는 기록기 (start 전에는 emit 이 아무것도 하지 않음)
+
+    directory: 로그 디렉터리
+    batch_size / flush_seconds: 이만큼 모이거나 이 시간이 지나면 한 배치로 기록
+    rotate_bytes / rotate_seconds: 파일 회전 기준
+    queue_size: 대기 기록 상한 (넘으면 버림)
+    """
+
+    def __init__(self, directory: str, batch_size: int = 256, flush_seconds: float = 5.0,
+                 rotate_bytes: int = 64 * 1024 * 1024, rotate_seconds: float = 3600.0, queue_size: int = 10000):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.written = 0
+        self.dropped = 0
+        self.files = 0
+        self._stop = threading.Event()
+        self._sink = None
+        self._writer = None
+        self._path = None
+        self._opened_at = 0.0
+
+    # -- 요청 경로 ---------------------------------------------------------
+
+    def emit(self, record: Dict):
+        """기록 하나를 큐에 넣음 (막지 않음, 가득 차면 버림)"""
+        if self.thread is None:
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    # -- 백그라운드 스레드 -------------------------------------------------
+
+    def start(self):
+        if self.thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self.thread.start()
+
+    def _open(self):
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self._path = os.path.join(self.directory, f"{FILE_PREFIX}{stamp}-{self.files:06d}-{os.getpid()}{FILE_SUFFIX}")
+        self._sink = pa.OSFile(self._path + OPEN_SUFFIX, "wb")
+        self._writer = pa.ipc.new_stream(self._sink, SCHEMA)
+        self._opened_at = time.monotonic()
+        self.files += 1
+
+    def _close(self):
+        """현재 파일을 닫고 완료된 이름으로 변경"""
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._sink.close()
+        os.replace(self._path + OPEN_SUFFIX, self._path)
+        self._writer = self._sink = None
+
+    def _write(self, records: List[Dict]):
+        if self._writer is not None and (self._sink.tell() >= self.rotate_bytes
+                                         or time.monotonic() - self._opened_at >= self.rotate_seconds):
+            self._close()
+        if self._writer is None:
+            self._open()
+        self._writer.write_batch(pa.RecordBatch.from_pylist(records, schema=SCHEMA))
+        self._sink.flush()
+        self.written += len(records)
+
+    def _run(self):
+        records: List[Dict] = []
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                record = self.queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+                if record is not None:
+                    records.append(record)
+            except queue.Empty:
+                pass
+            stopping = self._stop.is_set()
+            if stopping:
+                # 남은 기록을 모두 꺼내서 마지막 배치에 포함
+                while True:
+                    try:
+                        record = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if record is not None:
+                        records.append(record)
+            if records and (len(records) >= self.batch_size or time.monotonic() >= deadline or stopping):
+                try:
+                    self._write(records)
+                except Exception as e:
+                    print(f"Telemetry write error: {e}")
+                    self.dropped += len(records)
+                records = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_seconds
+            if stopping:
+                break
+        self._close()
+
+    def close(self, timeout: float = 5.0):
+        """남은 기록을 쓰고 파일을 닫음"""
+        if self.thread is None:
+            return
+        self._stop.set()
+        with contextlib.suppress(queue.Full):
+            self.queue.put_nowait(None)    # 대기 중인 스레드 깨우기
+        self.thread.join(timeout=max(timeout, 0))
+        self.thread = None
+
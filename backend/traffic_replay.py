@@ -0,0 +1,365 @@
+"""
+chat_history 기반 트래픽 캡처 및 재생 도구
+
+운영 DB의 chat_history / thank_diary 기록에서 세션 형태(턴 길이, chat_mode 비율,
+chat_uuid별 요청 간격)를 재구성해 재생 파일(JSONL)로 저장하고, 이를 로컬 백엔드에
+배속 재생하여 실제 워크로드 기준으로 용량을 계획합니다.
+대화 원문은 저장하지 않으며 길이만 보존합니다 (재생 시 같은 길이의 합성 문장 사용).
+
+사용 예:
+    # 1) 운영 기록 캡처 (.env 의 DB_* 환경변수 사용)
+    python traffic_replay.py capture --out replay.jsonl --since 2025-01-01
+
+    # 2) 로컬 LLM 스텁 실행 (OpenAI 호환 /v1/chat/completions)
+    python traffic_replay.py stub --port 8001 --latency-ms 800
+
+    # 3) 스텁을 바라보는 백엔드 실행 후 10배속 재생
+    OPENAI_BASE_URL=http://localhost:8001/v1 python api.py
+    python traffic_replay.py replay replay.jsonl --target http://localhost:8000 --speedup 10
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+# chat_mode → 재생 대상 엔드포인트 (/userlist 집계 기준과 동일)
+MODE_ENDPOINTS = {
+    "thanks": "/thank/chat",
+    "cons": "/cons/chat",
+    "thanks-dia": "/cons/chat",
+}
+DIARY_ENDPOINT = "/thank/diary"
+
+FILLER_WORDS = {
+    "ko": ["오늘", "기분이", "조금", "불안해요", "발표가", "있어서", "잠을", "못", "잤어요", "그래도", "괜찮아질까요"],
+    "en": ["today", "I", "feel", "a", "bit", "anxious", "about", "my", "presentation", "and", "sleep"],
+}
+
+
+def anonymize(value: Optional[str]) -> str:
+    """식별자 익명화 (재생 파일에 원본 chat_uuid/이메일을 남기지 않음)"""
+    return hashlib.sha1((value or "").encode("utf-8")).hexdigest()[:16]
+
+
+def synthetic_text(length: int, lang: str, seed: int) -> str:
+    """원문 길이와 같은 합성 문장 생성"""
+    rng = random.Random(seed)
+    words = FILLER_WORDS.get(lang, FILLER_WORDS["en"])
+    text = ""
+    while len(text) < max(length, 1):
+        text += rng.choice(words) + " "
+    return text[:max(length, 1)].strip() or words[0]
+
+
+# ---------------------------------------------------------------------------
+# 캡처
+# ---------------------------------------------------------------------------
+
+def iter_rows(cursor, query: str, params: tuple, batch_size: int = 5000):
+    """대용량 결과를 배치 단위로 읽기"""
+    cursor.execute(query, params)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield row
+
+
+def capture(args):
+    """chat_history / thank_diary 에서 세션을 재구성해 재생 파일로 저장"""
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    conn = mysql.connector.connect(
+        host=os.getenv('DB_HOST'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME'),
+    )
+    cursor = conn.cursor(dictionary=True)
+    time_col = args.time_column
+
+    where = f"WHERE {time_col} >= %s" if args.since else ""
+    params = (args.since,) if args.since else ()
+
+    sessions: Dict[str, dict] = {}
+    try:
+        chat_query = f"""
+            SELECT chat_uuid, chat_mode, user_email, CHAR_LENGTH(user_msg) AS user_len,
+                   CHAR_LENGTH(ai_msg) AS ai_len, {time_col} AS ts
+            FROM chat_history {where}
+            ORDER BY {time_col}
+        """
+        for row in iter_rows(cursor, chat_query, params):
+            key = anonymize(row["chat_uuid"])
+            session = sessions.setdefault(key, {
+                "session": key,
+                "kind": "chat",
+                "chat_mode": row["chat_mode"],
+                "user": anonymize(row["user_email"]),
+                "start": row["ts"].timestamp(),
+                "turns": [],
+            })
+            session["turns"].append({
+                "at": round(row["ts"].timestamp() - session["start"], 3),
+                "user_len": row["user_len"] or 0,
+                "ai_len": row["ai_len"] or 0,
+            })
+
+        diary_query = f"""
+            SELECT chat_uuid, user_email, CHAR_LENGTH(diary_text) AS diary_len, {time_col} AS ts
+            FROM thank_diary {where}
+            ORDER BY {time_col}
+        """
+        for row in iter_rows(cursor, diary_query, params):
+            key = "diary-" + anonymize(f"{row['chat_uuid']}:{row['ts']}")
+            sessions[key] = {
+                "session": key,
+                "kind": "diary",
+                "chat_mode": "diary",
+                "user": anonymize(row["user_email"]),
+                "start": row["ts"].timestamp(),
+                "turns": [{"at": 0.0, "user_len": row["diary_len"] or 0, "ai_len": 0}],
+            }
+    finally:
+        cursor.close()
+        conn.close()
+
+    if not sessions:
+        print("No rows found - nothing to write")
+        return
+
+    # 전체 캡처 시작 시각 기준의 상대 시각으로 변환
+    origin = min(s["start"] for s in sessions.values())
+    ordered = sorted(sessions.values(), key=lambda s: s["start"])
+    with open(args.out, "w", encoding="utf-8") as f:
+        for session in ordered:
+            session["start"] = round(session["start"] - origin, 3)
+            f.write(json.dumps(session, ensure_ascii=False) + "\n")
+
+    describe(ordered)
+    print(f"Wrote {len(ordered)} sessions to {args.out}")
+
+
+def load_replay(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def describe(sessions: List[dict]):
+    """재생 파일의 워크로드 형태 요약 출력"""
+    mode_counts: Dict[str, int] = {}
+    gaps: List[float] = []
+    user_lens: List[float] = []
+    for session in sessions:
+        mode_counts[session["chat_mode"]] = mode_counts.get(session["chat_mode"], 0) + len(session["turns"])
+        offsets = [t["at"] for t in session["turns"]]
+        gaps.extend(b - a for a, b in zip(offsets, offsets[1:]))
+        user_lens.extend(t["user_len"] for t in session["turns"])
+
+    duration = max(s["start"] + s["turns"][-1]["at"] for s in sessions)
+    total = sum(mode_counts.values())
+    print(f"Sessions: {len(sessions)}, requests: {total}, span: {duration / 3600:.2f}h")
+    for mode, count in sorted(mode_counts.items(), key=lambda x: -x[1]):
+        print(f"  {mode}: {count} ({count / total:.1%})")
+    print(f"Inter-turn gap p50/p95: {percentile(gaps, 50):.1f}s / {percentile(gaps, 95):.1f}s")
+    print(f"User message length p50/p95: {percentile(user_lens, 50):.0f} / {percentile(user_lens, 95):.0f} chars")
+
+
+# ---------------------------------------------------------------------------
+# 재생
+# ---------------------------------------------------------------------------
+
+class ReplayStats:
+    """엔드포인트별 응답 시간 및 오류 집계"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.lag: List[float] = []
+
+    def record(self, endpoint: str, latency: float, ok: bool):
+        self.latencies.setdefault(endpoint, []).append(latency)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed: float):
+        total = sum(len(v) for v in self.latencies.values())
+        print(f"\nReplayed {total} requests in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.2f} req/s)")
+        for endpoint, values in sorted(self.latencies.items()):
+            print(f"  {endpoint}: n={len(values)}, errors={self.errors.get(endpoint, 0)}, "
+                  f"p50={percentile(values, 50) * 1000:.0f}ms, p95={percentile(values, 95) * 1000:.0f}ms, "
+                  f"p99={percentile(values, 99) * 1000:.0f}ms")
+        if self.lag:
+            print(f"  schedule lag p95: {percentile(self.lag, 95) * 1000:.0f}ms")
+
+
+async def replay_session(client, session: dict, t0: float, speedup: float, lang: str, stats: ReplayStats):
+    """세션 하나를 원래 간격(배속 적용)대로 재생"""
+    seed = int(session["session"][-8:], 16)
+    user_name = f"replay-{session['user'][:8]}"
+    user_email = f"{user_name}@replay.local"
+
+    messages = []
+    for i, turn in enumerate(session["turns"]):
+        scheduled = t0 + (session["start"] + turn["at"]) / speedup
+        delay = scheduled - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        stats.lag.append(max(time.monotonic() - scheduled, 0.0))
+
+        text = synthetic_text(turn["user_len"], lang, seed + i)
+        if session["kind"] == "diary":
+            endpoint = DIARY_ENDPOINT
+            payload = {
+                "user_name": user_name,
+                "user_email": user_email,
+                "chat_uuid": f"replay-{session['session']}",
+                "diary_text": text,
+            }
+        else:
+            endpoint = MODE_ENDPOINTS.get(session["chat_mode"], "/cons/chat")
+            messages.append({
+                "from_": "user",
+                "text": text,
+                "userName": user_name,
+                "userEmail": user_email,
+                "uniqeChatId": f"replay-{session['session']}",
+                "chatMode": session["chat_mode"],
+            })
+            payload = {"messages": messages, "lang": lang}
+
+        started = time.monotonic()
+        ok = False
+        try:
+            response = await client.post(endpoint, json=payload)
+            ok = response.status_code == 200
+            if ok and session["kind"] == "chat":
+                messages.append({"from_": "ai", "text": response.json().get("data", "")})
+        except Exception as e:
+            print(f"Replay request error ({endpoint}): {e}")
+        stats.record(endpoint, time.monotonic() - started, ok)
+
+        if not ok and session["kind"] == "chat":
+            # 응답이 없으면 같은 길이의 합성 응답으로 대화를 이어감
+            messages.append({"from_": "ai", "text": synthetic_text(turn["ai_len"], lang, seed - i)})
+
+
+async def replay(args):
+    """재생 파일을 대상 백엔드에 배속 재생"""
+    import httpx
+
+    sessions = load_replay(args.replay_file)
+    if args.max_sessions:
+        sessions = sessions[:args.max_sessions]
+    describe(sessions)
+
+    stats = ReplayStats()
+    limits = httpx.Limits(max_connections=args.max_connections)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(base_url=args.target, limits=limits, timeout=timeout) as client:
+        t0 = time.monotonic()
+        await asyncio.gather(*(
+            replay_session(client, session, t0, args.speedup, args.lang, stats)
+            for session in sessions
+        ))
+        stats.report(time.monotonic() - t0)
+
+
+# ---------------------------------------------------------------------------
+# 로컬 LLM 스텁
+# ---------------------------------------------------------------------------
+
+def create_stub_app(latency_ms: float, jitter_ms: float, reply_chars: int):
+    """OpenAI 호환 chat completions 스텁 앱"""
+    from fastapi import FastAPI
+
+    stub = FastAPI(title="LLM stub for traffic replay")
+
+    @stub.post("/v1/chat/completions")
+    async def chat_completions(request: dict):
+        delay = max(latency_ms + random.uniform(-jitter_ms, jitter_ms), 0) / 1000
+        await asyncio.sleep(delay)
+        prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+        content = synthetic_text(reply_chars, "ko", prompt_chars)
+        return {
+            "id": f"chatcmpl-stub-{int(time.time() * 1000)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (prompt_chars + len(content)) // 4,
+            },
+        }
+
+    return stub
+
+
+def stub(args):
+    import uvicorn
+
+    uvicorn.run(create_stub_app(args.latency_ms, args.jitter_ms, args.reply_chars), host=args.host, port=args.port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="chat_history 기반 트래픽 캡처/재생 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_capture = sub.add_parser("capture", help="chat_history/thank_diary 에서 재생 파일 생성")
+    p_capture.add_argument("--out", default="replay.jsonl")
+    p_capture.add_argument("--since", help="이 시각 이후 기록만 사용 (예: 2025-01-01)")
+    p_capture.add_argument("--time-column", default="created_at", help="기록 시각 컬럼명")
+
+    p_replay = sub.add_parser("replay", help="재생 파일을 백엔드에 재생")
+    p_replay.add_argument("replay_file")
+    p_replay.add_argument("--target", default="http://localhost:8000")
+    p_replay.add_argument("--speedup", type=float, default=1.0, help="배속 (10 = 10배 빠르게)")
+    p_replay.add_argument("--lang", default="ko", choices=["ko", "en"])
+    p_replay.add_argument("--max-sessions", type=int, default=0)
+    p_replay.add_argument("--max-connections", type=int, default=200)
+    p_replay.add_argument("--timeout", type=float, default=120.0)
+
+    p_stub = sub.add_parser("stub", help="로컬 LLM 스텁 서버 실행")
+    p_stub.add_argument("--host", default="127.0.0.1")
+    p_stub.add_argument("--port", type=int, default=8001)
+    p_stub.add_argument("--latency-ms", type=float, default=800.0)
+    p_stub.add_argument("--jitter-ms", type=float, default=200.0)
+    p_stub.add_argument("--reply-chars", type=int, default=300)
+
+    args = parser.parse_args(argv)
+    if args.command == "replay" and args.speedup <= 0:
+        parser.error("--speedup must be positive")
+
+    if args.command == "capture":
+        capture(args)
+    elif args.command == "replay":
+        asyncio.run(replay(args))
+    else:
+        stub(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+"""
+가설검증 단계별 결과 캐시
+
+각 분석 단계(가설 1–4, 재표본 추론, 시각화)의 결과를 입력 데이터의 내용 해시로 메모이즈하고
+디스크(JSON + NPZ)에 저장합니다. 단계 간 의존성 그래프를 따라 키가 전파되므로
+NLP 지표만 바뀌면 H4 와 그에 의존하는 단계만 다시 계산됩니다.
+
+캐시 키 = sha256(단계 이름, 단계 코드, 입력 해시, 의존 단계 키)
+단계 실행 중 출력된 콘솔 로그도 함께 저장해 캐시 사용 시 그대로 다시 출력합니다.
+"""
+
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from profiling import stage
+from ratings_cube import RatingsCube
+
+CACHE_FORMAT_VERSION = 1
+
+
+# ---------------------------------------------------------------------------
+# 내용 해시
+# ---------------------------------------------------------------------------
+
+def _update_hash(digest, obj):
+    """객체를 자료형 태그와 함께 정규화해 해시에 반영 (dict 는 키 정렬)"""
+    if obj is None or isinstance(obj, (bool, np.bool_)):
+        digest.update(f"b:{obj};".encode())
+    elif isinstance(obj, (int, np.integer)):
+        digest.update(f"i:{int(obj)};".encode())
+    elif isinstance(obj, (float, np.floating)):
+        digest.update(f"f:{float(obj)!r};".encode())
+    elif isinstance(obj, str):
+        digest.update(f"s:{len(obj)}:".encode() + obj.encode('utf-8'))
+    elif isinstance(obj, bytes):
+        digest.update(f"y:{len(obj)}:".encode() + obj)
+    elif isinstance(obj, np.ndarray):
+        array = np.ascontiguousarray(obj)
+        if array.dtype == object:
+            _update_hash(digest, array.tolist())
+        else:
+            digest.update(f"a:{array.dtype.str}:{array.shape};".encode())
+            digest.update(array.tobytes())
+    elif isinstance(obj, pd.DataFrame):
+        digest.update(b"df:")
+        _update_hash(digest, [str(column) for column in obj.columns])
+        for column in obj.columns:
+            _update_hash(digest, np.asarray(obj[column].astype(str) if obj[column].dtype == object
+                                            or isinstance(obj[column].dtype, pd.CategoricalDtype)
+                                            else obj[column]))
+    elif isinstance(obj, dict):
+        digest.update(f"d:{len(obj)};".encode())
+        for key in sorted(obj, key=str):
+            _update_hash(digest, str(key))
+            _update_hash(digest, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f"l:{len(obj)};".encode())
+        for item in obj:
+            _update_hash(digest, item)
+    elif isinstance(obj, RatingsCube):
+        _update_hash(digest, [obj.values, obj.criteria, obj.evaluators, obj.chatbots])
+    else:
+        raise TypeError(f"cannot hash object of type {type(obj).__name__}")
+
+
+def content_hash(*objects) -> str:
+    """내용 기반 sha256 해시 (같은 내용이면 실행/프로세스가 달라도 같은 값)"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        _update_hash(digest, obj)
+    return digest.hexdigest()
+
+
+def code_fingerprint(*objects) -> str:
+    """함수/모듈 소스 코드 해시 - 분석 코드가 바뀌면 캐시가 무효화되도록 키에 포함"""
+    sources = []
+    for obj in objects:
+        try:
+            sources.append(inspect.getsource(obj))
+        except (OSError, TypeError):
+            sources.append(getattr(obj, '__qualname__', repr(obj)))
+    return content_hash(sources)
+
+
+# ---------------------------------------------------------------------------
+# 결과 직렬화 (JSON + NPZ)
+# ---------------------------------------------------------------------------
+
+class _Encoder:
+    """결과 객체 → JSON 호환 구조 + NPZ 배열 목록"""
+
+    def __init__(self):
+        self.arrays: Dict[str, np.ndarray] = {}
+
+    def _store(self, array: np.ndarray) -> str:
+        name = f"a{len(self.arrays)}"
+        self.arrays[name] = array
+        return name
+
+    def encode(self, obj):
+        if obj is None or isinstance(obj, (bool, int, float, str)):
+            return obj
+        if isinstance(obj, np.bool_):
+            return bool(obj)
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return float(obj)
+        if isinstance(obj, np.ndarray):
+            if obj.dtype == object:
+                return {'__list_array__': [self.encode(item) for item in obj.tolist()]}
+            return {'__ndarray__': self._store(obj)}
+        if isinstance(obj, pd.DataFrame):
+            columns = {}
+            for column in obj.columns:
+                series = obj[column]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    columns[column] = {'codes': self._store(series.cat.codes.to_numpy()),
+                                       'categories': [str(c) for c in series.cat.categories]}
+                elif series.dtype == object:
+                    columns[column] = {'values': [self.encode(v) for v in series.tolist()]}
+                else:
+                    columns[column] = {'array': self._store(series.to_numpy())}
+            return {'__dataframe__': columns, 'order': [str(c) for c in obj.columns]}
+        if isinstance(obj, tuple):
+            return {'__tuple__': [self.encode(item) for item in obj]}
+        if isinstance(obj, list):
+            return [self.encode(item) for item in obj]
+        if isinstance(obj, dict):
+            if not all(isinstance(key, str) for key in obj):
+                raise TypeError("cached results must use string dictionary keys")
+            return {key: self.encode(value) for key, value in obj.items()}
+        raise TypeError(f"cannot cache object of type {type(obj).__name__}")
+
+
+def _decode(obj, arrays):
+    if isinstance(obj, list):
+        return [_decode(item, arrays) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    if '__ndarray__' in obj:
+        return arrays[obj['__ndarray__']]
+    if '__list_array__' in obj:
+        return np.array([_decode(item, arrays) for item in obj['__list_array__']], dtype=object)
+    if '__tuple__' in obj:
+        return tuple(_decode(item, arrays) for item in obj['__tuple__'])
+    if '__dataframe__' in obj:
+        data = {}
+        for column in obj['order']:
+            spec = obj['__dataframe__'][column]
+            if 'codes' in spec:
+                data[column] = pd.Categorical.from_codes(arrays[spec['codes']],
+                                                         dtype=pd.CategoricalDtype(spec['categories']))
+            elif 'values' in spec:
+                data[column] = [_decode(v, arrays) for v in spec['values']]
+            else:
+                data[column] = arrays[spec['array']]
+        return pd.DataFrame(data, columns=obj['order'])
+    return {key: _decode(value, arrays) for key, value in obj.items()}
+
+
+class _Tee(io.TextIOBase):
+    """콘솔 출력을 그대로 내보내면서 기록"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = io.StringIO()
+
+    def write(self, text):
+        self.buffer.write(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+# ---------------------------------------------------------------------------
+# 디스크 캐시
+# ---------------------------------------------------------------------------
+
+class AnalysisCache:
+    """
+    단계 결과 저장소: <cache_dir>/<단계>/<키>.json (+ <키>.npz)
+
+    키는 내용 주소이므로 오래된 항목을 지워도 다음 실행에서 다시 계산될 뿐입니다.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits: List[str] = []
+        self.misses: List[str] = []
+
+    def _paths(self, step: str, key: str):
+        base = os.path.join(self.cache_dir, step, key)
+        return base + '.json', base + '.npz'
+
+    def load(self, step: str, key: str) -> Optional[Dict[str, Any]]:
+        """저장된 항목 ({'result', 'log'}) 또는 None"""
+        json_path, npz_path = self._paths(step, key)
+        if not os.path.exists(json_path):
+            return None
+        try:
+            with open(json_path, encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry.get('format') != CACHE_FORMAT_VERSION:
+                return None
+            arrays = {}
+            if entry.get('has_arrays'):
+                with np.load(npz_path, allow_pickle=False) as npz:
+                    arrays = {name: npz[name] for name in npz.files}
+            return {'result': _decode(entry['result'], arrays), 'log': entry.get('log', '')}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 캐시 항목 손상 ({step}/{key[:12]}): {e} - 다시 계산합니다")
+            return None
+
+    def save(self, step: str, key: str, result, log: str = ''):
+        encoder = _Encoder()
+        payload = encoder.encode(result)
+        json_path, npz_path = self._paths(step, key)
+        os.makedirs(os.path.dirname(json_path), exist_ok=True)
+
+        # 배열을 먼저 쓰고 JSON 을 마지막에 원자적으로 교체 (JSON 이 있으면 항목이 완전함)
+        if encoder.arrays:
+            tmp_npz = npz_path + '.tmp.npz'
+            np.savez(tmp_npz, **encoder.arrays)
+            os.replace(tmp_npz, npz_path)
+        entry = {'format': CACHE_FORMAT_VERSION, 'step': step, 'key': key,
+                 'has_arrays': bool(encoder.arrays), 'result': payload, 'log': log}
+        tmp_json = json_path + '.tmp'
+        with open(tmp_json, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_json, json_path)
+
+
+# ---------------------------------------------------------------------------
+# 단계 의존성 그래프
+# ---------------------------------------------------------------------------
+
+class StepGraph:
+    """
+    분석 단계 그래프
+
+    add(name, func, inputs, depends) 로 단계를 등록하면 run() 이 위상 순서로 실행합니다.
+    func 는 의존 단계 결과 딕셔너리({의존 단계 이름: 결과})를 인자로 받습니다.
+    cache 가 None 이면 캐시 없이 모든 단계를 실행합니다.
+    """
+
+    def __init__(self, cache: Optional[AnalysisCache] = None, code_version: str = ''):
+        self.cache = cache
+        self.code_version = code_version
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.keys: Dict[str, str] = {}
+        self.results: Dict[str, Any] = {}
+        self.executed: List[str] = []
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], inputs: Any = None,
+            depends: Sequence[str] = (), code: Any = None,
+            is_valid: Optional[Callable[[Any], bool]] = None):
+        """
+        단계 등록
+
+        inputs: 이 단계가 직접 읽는 데이터 (내용 해시 대상)
+        code: 코드 해시 대상 또는 그 목록 (기본: func) - 람다로 감싼 메서드는 메서드를 지정
+        is_valid: 캐시된 결과가 여전히 유효한지 확인 (예: 출력 파일 존재 여부)
+        """
+        for dependency in depends:
+            if dependency not in self.steps:
+                raise ValueError(f"step '{name}' depends on unknown step '{dependency}'")
+        self.steps[name] = {
+            'func': func,
+            'inputs_hash': content_hash(inputs),
+            'depends': list(depends),
+            'code_hash': code_fingerprint(*(code if isinstance(code, (list, tuple)) else [code or func])),
+            'is_valid': is_valid,
+        }
+
+    def key(self, name: str) -> str:
+        """단계 키 (의존 단계 키를 포함하므로 상류 변경이 하류로 전파됨)"""
+        if name not in self.keys:
+            step = self.steps[name]
+            self.keys[name] = content_hash(
+                name, self.code_version, step['code_hash'], step['inputs_hash'],
+                [self.key(dependency) for dependency in step['depends']],
+            )
+        return self.keys[name]
+
+    def run(self, targets: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        대상 단계(기본: 전체)와 그 의존 단계를 등록 순서(위상 순서)로 실행
+
+        이미 실행한 단계의 결과는 그래프에 보관되어 다시 실행하지 않습니다.
+        """
+        needed = set()
+
+        def collect(name):
+            if name not in needed:
+                needed.add(name)
+                for dependency in self.steps[name]['depends']:
+                    collect(dependency)
+
+        for name in (targets or list(self.steps)):
+            collect(name)
+
+        for name in self.steps:
+            if name in needed and name not in self.results:
+                self.results[name] = self._run_step(name)
+        return {name: self.results[name] for name in self.steps if name in needed}
+
+    def _run_step(self, name: str):
+        with stage(name) as record:
+            return self._execute_step(name, record)
+
+    def _execute_step(self, name: str, record):
+        step = self.steps[name]
+        key = self.key(name)
+        dependencies = {dependency: self.results[dependency] for dependency in step['depends']}
+
+        if self.cache is not None:
+            entry = self.cache.load(name, key)
+            if entry is not None and (step['is_valid'] is None or step['is_valid'](entry['result'])):
+                self.cache.hits.append(name)
+                if record is not None:
+                    record['note'] = 'cache'
+                print(f"\n♻️  {name}: 캐시된 결과 사용 ({key[:12]})")
+                sys.stdout.write(entry['log'])
+                return entry['result']
+
+        self.executed.append(name)
+        tee = _Tee(sys.stdout)
+        with contextlib.redirect_stdout(tee):
+            result = step['func'](dependencies)
+        if self.cache is not None:
+            self.cache.misses.append(name)
+            try:
+                self.cache.save(name, key, result, tee.buffer.getvalue())
+            except TypeError as e:
+                print(f"⚠️ {name} 결과를 캐시에 저장할 수 없음: {e}")
+        return result
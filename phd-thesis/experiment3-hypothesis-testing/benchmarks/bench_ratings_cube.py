@@ -0,0 +1,117 @@
+"""
+평가 점수 큐브 스케일링 벤치마크
+
+기존 중첩 딕셔너리 + 파이썬 루프 방식과 RatingsCube 벡터 연산 방식의
+주변 합계 / 분산분석 제곱합 / 평가자 총점 계산 시간을 최대 10^6 개 평가까지 비교합니다.
+
+실행:
+    python benchmarks/bench_ratings_cube.py
+    python benchmarks/bench_ratings_cube.py --max-ratings 100000 --skip-legacy-above 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ratings_cube import RatingsCube  # noqa: E402
+
+# (기준, 평가자, 챗봇) 크기 - 논문 규모(84개)부터 10^6 개까지
+SIZES = [
+    (7, 3, 4),
+    (7, 10, 100),
+    (7, 20, 1000),
+    (10, 50, 2000),
+]
+
+
+def make_nested_dict(n_criteria, n_evaluators, n_chatbots, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(1, 4, size=(n_criteria, n_evaluators, n_chatbots))
+    criteria = [f"criterion_{i}" for i in range(n_criteria)]
+    evaluators = [f"rater_{i}" for i in range(n_evaluators)]
+    chatbots = [f"bot_{i}" for i in range(n_chatbots)]
+    data = {
+        criterion: {
+            evaluator: {chatbot: int(values[c, e, b]) for b, chatbot in enumerate(chatbots)}
+            for e, evaluator in enumerate(evaluators)
+        }
+        for c, criterion in enumerate(criteria)
+    }
+    return data, criteria, evaluators, chatbots
+
+
+def legacy_analysis(data, criteria, evaluators, chatbots):
+    """기존 _prepare_data / hypothesis_1 / hypothesis_3 의 루프 기반 계산"""
+    individual_scores = {chatbot: [] for chatbot in chatbots}
+    for chatbot in chatbots:
+        for criterion in criteria:
+            for evaluator in evaluators:
+                individual_scores[chatbot].append(data[criterion][evaluator][chatbot])
+
+    group_scores = [individual_scores[chatbot] for chatbot in chatbots]
+    all_scores = [score for scores in group_scores for score in scores]
+    grand_mean = np.mean(all_scores)
+    group_means = [np.mean(scores) for scores in group_scores]
+    ssb = len(group_scores[0]) * sum((mean - grand_mean) ** 2 for mean in group_means)
+    ssw = sum(sum((score - group_mean) ** 2 for score in group_scores[i])
+              for i, group_mean in enumerate(group_means))
+
+    evaluator_totals = {
+        evaluator: [sum(data[criterion][evaluator][chatbot] for criterion in criteria) for chatbot in chatbots]
+        for evaluator in evaluators
+    }
+    return ssb, ssw, evaluator_totals
+
+
+def cube_analysis(cube):
+    cube.chatbot_totals()
+    cube.chatbot_means()
+    anova = cube.anova_oneway()
+    totals = cube.evaluator_totals()
+    return anova['ssb'], anova['ssw'], totals
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RatingsCube scaling benchmark")
+    parser.add_argument("--max-ratings", type=int, default=10 ** 6)
+    parser.add_argument("--skip-legacy-above", type=int, default=10 ** 6)
+    args = parser.parse_args(argv)
+
+    print(f"{'criteria×raters×bots':>22} {'ratings':>9} {'legacy(s)':>10} {'cube(s)':>9} {'speedup':>8}")
+    for n_criteria, n_evaluators, n_chatbots in SIZES:
+        n_ratings = n_criteria * n_evaluators * n_chatbots
+        if n_ratings > args.max_ratings:
+            continue
+
+        data, criteria, evaluators, chatbots = make_nested_dict(n_criteria, n_evaluators, n_chatbots)
+        cube = RatingsCube.from_nested_dict(data)
+        cube_time, (ssb, ssw, _) = timed(cube_analysis, cube)
+
+        legacy_text = speedup_text = "-"
+        if n_ratings <= args.skip_legacy_above:
+            legacy_time, (ssb_ref, ssw_ref, _) = timed(legacy_analysis, data, criteria, evaluators, chatbots, repeat=1)
+            assert np.isclose(ssb, ssb_ref) and np.isclose(ssw, ssw_ref), "cube and legacy results differ"
+            legacy_text = f"{legacy_time:.4f}"
+            speedup_text = f"{legacy_time / cube_time:.0f}x"
+
+        label = f"{n_criteria}×{n_evaluators}×{n_chatbots}"
+        print(f"{label:>22} {n_ratings:>9} {legacy_text:>10} {cube_time:>9.4f} {speedup_text:>8}")
+
+
+if __name__ == "__main__":
+    main()
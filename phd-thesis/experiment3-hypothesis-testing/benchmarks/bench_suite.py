@@ -0,0 +1,402 @@
+"""
+통계 분석 / NLP 지표 벤치마크 모음
+
+- PhDThesisExperiment3Analysis: 데이터 전처리, 가설 1–4, 재표본 추론을 합성 데이터
+  (챗봇 / 평가자 / 평가 기준 수 조절)로 각각 측정
+- NLPMetricsCalculator: calculate_* 지표와 배치 엔진(nlp_scoring.CorpusScorer)을
+  합성 대화 (응답 길이 / 참조 응답 수 조절)로 측정
+- 정확성 검사: 기본 논문 데이터로 계산한 값이 논문에 보고된 수치와 같은지 확인
+
+결과는 benchmarks/results/<커밋>.json 에 저장되며 --compare 로 다른 커밋의 결과와 비교합니다.
+정확성 검사가 하나라도 실패하면 종료 코드 1 을 반환합니다.
+
+실행:
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --quick --compare benchmarks/results/<이전 커밋>.json
+    python benchmarks/bench_suite.py --checks-only
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+EXPERIMENT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, EXPERIMENT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from hypothesis_analysis import PhDThesisExperiment3Analysis  # noqa: E402
+from correlation import METHODS as CORRELATION_METHODS, correlation_matrix  # noqa: E402
+from nlp_scoring import CorpusScorer  # noqa: E402
+from ratings_io import load_nlp_evaluation  # noqa: E402
+from semantic_similarity import TfidfSimilarity, VectorCache  # noqa: E402
+from synthetic import chatbot_names, make_dialogues, make_nlp_metrics, make_ratings  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# 상관 행렬 (지표, 평가자, 평가 대상) - 1–3점 평가
+CORRELATION_SIZE = (200, 5, 2000)
+
+# (기준, 평가자, 챗봇) - 논문 규모부터 챗봇 변형 100개까지
+ANALYSIS_SIZES = [
+    (7, 3, 4),
+    (7, 10, 20),
+    (7, 20, 60),
+    (10, 50, 100),
+]
+
+# (챗봇, 응답 단어 수, 참조 응답 수)
+NLP_SIZES = [
+    (4, 40, 4),
+    (20, 100, 10),
+    (50, 200, 20),
+]
+
+HYPOTHESIS_METHODS = [
+    'hypothesis_1_discrimination_analysis',
+    'hypothesis_2_drcare_performance',
+    'hypothesis_3_inter_rater_reliability',
+    'hypothesis_4_nlp_vs_counseling',
+]
+
+PAIR_METRICS = ['calculate_bleu_score', 'calculate_rouge_score', 'calculate_meteor_score', 'calculate_bertscore']
+
+# 논문 보고 수치 (기본 데이터) - (기대값, 허용 오차)
+PINNED_ANALYSIS = {
+    'h1.f_stat': (9.725490196078436, 1e-9),
+    'h1.p_value': (1.525e-05, 5e-08),
+    'h1.eta_squared': (0.2672413793103449, 1e-9),
+    'h1.tukey.Dr.CareSam-Replika.p_adj': (0.0064, 5e-05),
+    'means.Replika': (1.810, 5e-04),
+    'means.Wysa': (2.714, 5e-04),
+    'means.Youper': (2.238, 5e-04),
+    'means.Dr.CareSam': (2.380952380952381, 1e-9),
+    'totals.Replika': (38, 0),
+    'totals.Wysa': (57, 0),
+    'totals.Youper': (47, 0),
+    'totals.Dr.CareSam': (50, 0),
+    'h2.rank': (2, 0),
+    'h3.cronbach_alpha': (0.14035087719298273, 1e-9),
+    'h3.mean_correlation': (0.5877191583853506, 1e-9),
+    'h3.r.Claude_vs_ChatGPT': (0.859, 5e-04),
+    'h3.r.Claude_vs_Human': (0.231, 5e-04),
+    'h3.r.ChatGPT_vs_Human': (0.673, 5e-04),
+    'h3.icc2': (0.565, 5e-04),
+    'h3.icc3k': (0.802, 5e-04),
+    'h3.krippendorff_alpha': (0.610, 5e-04),
+    'h4.r.bleu': (0.703, 5e-04),
+    'h4.r.rouge': (0.487, 5e-04),
+    'h4.r.meteor': (0.216, 5e-04),
+    'h4.r.bertscore': (-0.255, 5e-04),
+    'h4.mean_abs_correlation': (0.415, 5e-04),
+}
+
+# NLPMetricsCalculator 기본 데이터 (참조 응답 중 최고 점수, BLEU 1–4-gram add-one 스무딩 / ROUGE-L F1 /
+# BERTScore 대체 = 문자 3–5-gram TF-IDF 코사인)
+PINNED_NLP = {
+    'Wysa.bleu': 0.10716915539472395,
+    'Wysa.rouge': 0.19354838709677416,
+    'Wysa.meteor': 0.2903225806451613,
+    'Wysa.bertscore': 0.17427814924713725,
+    '닥터케어쌤.bleu': 0.031782897044671854,
+    '닥터케어쌤.rouge': 0.08695652173913043,
+    '닥터케어쌤.meteor': 0.14492753623188404,
+    '닥터케어쌤.bertscore': 0.1282515678997379,
+    'Youper.bleu': 0.10108725584708196,
+    'Youper.rouge': 0.19718309859154928,
+    'Youper.meteor': 0.30985915492957744,
+    'Youper.bertscore': 0.3353432463995153,
+    'Replika.bleu': 0.05835260168180159,
+    'Replika.rouge': 0.13636363636363635,
+    'Replika.meteor': 0.22727272727272727,
+    'Replika.bertscore': 0.13384118849041093,
+    'r.bleu': 0.7457288200970243,
+    'r.rouge': 0.5299558180464562,
+    'r.meteor': 0.25963596061225674,
+    'r.bertscore': -0.2250164496097211,
+    'r.average': 0.4135870425166047,
+    'required_n.0.3': 85,
+    'required_n.0.5': 30,
+    'required_n.0.7': 14,
+    'required_n.0.9': 7,
+}
+
+
+def quiet(func, *args, **kwargs):
+    """출력 없이 실행 (분석 메서드는 결과를 print 로 보고함)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = quiet(func, *args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def git_revision():
+    """현재 커밋 (작업 트리가 변경되었으면 -dirty)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=EXPERIMENT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=EXPERIMENT_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f"{commit}-dirty" if dirty else commit
+
+
+# ----------------------------------------------------------------------
+# 정확성 검사
+# ----------------------------------------------------------------------
+
+def analysis_values():
+    """기본 논문 데이터로 가설 1–4 를 실행해 고정 수치와 비교할 값 추출"""
+    analyzer = quiet(PhDThesisExperiment3Analysis)
+    h1 = quiet(analyzer.hypothesis_1_discrimination_analysis)
+    h2 = quiet(analyzer.hypothesis_2_drcare_performance)
+    h3 = quiet(analyzer.hypothesis_3_inter_rater_reliability)
+    h4 = quiet(analyzer.hypothesis_4_nlp_vs_counseling)
+
+    tukey = h1['tukey_result']
+    pair = tukey[(tukey['group1'].astype(str) == 'Dr.CareSam') & (tukey['group2'].astype(str) == 'Replika')]
+    values = {
+        'h1.f_stat': h1['f_stat'],
+        'h1.p_value': h1['p_value'],
+        'h1.eta_squared': h1['eta_squared'],
+        'h1.tukey.Dr.CareSam-Replika.p_adj': float(pair['p_adj'].iloc[0]),
+        'h2.rank': h2['rank'],
+        'h3.cronbach_alpha': h3['cronbach_alpha'],
+        'h3.mean_correlation': h3['mean_correlation'],
+        'h3.icc2': h3['icc']['ICC2']['icc'],
+        'h3.icc3k': h3['icc']['ICC3k']['icc'],
+        'h3.krippendorff_alpha': h3['krippendorff_alpha'],
+        'h4.mean_abs_correlation': h4['mean_abs_correlation'],
+    }
+    for chatbot in analyzer.chatbots:
+        values[f'means.{chatbot}'] = analyzer.chatbot_means[chatbot]
+        values[f'totals.{chatbot}'] = analyzer.chatbot_totals[chatbot]
+    for name, result in h3['correlations'].items():
+        values[f'h3.r.{name}'] = result['correlation']
+    for metric, result in h4['nlp_correlations'].items():
+        values[f'h4.r.{metric}'] = result['correlation']
+    return values
+
+
+def nlp_values():
+    """기본 대화 데이터로 calculate_* 지표와 상관 / 표본 크기 계산"""
+    calculator = load_nlp_evaluation().NLPMetricsCalculator()
+    values = {}
+    for bot in calculator.chatbots:
+        candidate = calculator.dialogues[bot]
+        for method, metric in zip(PAIR_METRICS, ['bleu', 'rouge', 'meteor', 'bertscore']):
+            scorer = getattr(calculator, method)
+            values[f'{bot}.{metric}'] = max(scorer(ref, candidate) for ref in calculator.reference_responses)
+
+    # 배치 엔진도 같은 값을 내야 함 (batch.<챗봇>.<지표>)
+    best = CorpusScorer(calculator.reference_responses).best([calculator.dialogues[bot] for bot in calculator.chatbots])
+    for i, bot in enumerate(calculator.chatbots):
+        for metric in best:
+            values[f'batch.{bot}.{metric}'] = best[metric][i]
+
+    human_scores = [calculator.human_evaluation[bot] for bot in calculator.chatbots]
+    for metric in calculator.metrics:
+        nlp_scores = [calculator.nlp_results[bot][metric] for bot in calculator.chatbots]
+        values[f'r.{metric}'] = calculator.calculate_correlation(human_scores, nlp_scores)['r']
+    for r in [0.3, 0.5, 0.7, 0.9]:
+        values[f'required_n.{r}'] = calculator.calculate_required_sample_size(r)
+    return values
+
+
+def run_checks():
+    """고정 수치와 비교 → [{'name', 'expected', 'actual', 'passed'}]"""
+    pinned = [(f'analysis.{name}', expected, tolerance, actual)
+              for name, actual in analysis_values().items()
+              for expected, tolerance in [PINNED_ANALYSIS[name]]]
+    pinned += [(f'nlp.{name}', PINNED_NLP[name.removeprefix('batch.')], 1e-12, actual)
+               for name, actual in nlp_values().items()]
+
+    checks = []
+    for name, expected, tolerance, actual in pinned:
+        actual = float(actual)
+        checks.append({'name': name, 'expected': expected, 'actual': actual,
+                       'passed': bool(abs(actual - expected) <= tolerance)})
+    return checks
+
+
+# ----------------------------------------------------------------------
+# 타이밍
+# ----------------------------------------------------------------------
+
+def bench_analysis(sizes, n_resamples, repeat):
+    timings = []
+    for n_criteria, n_evaluators, n_chatbots in sizes:
+        label = f"{n_criteria}×{n_evaluators}×{n_chatbots}"
+        cube = make_ratings(n_criteria, n_evaluators, n_chatbots)
+        nlp_metrics = make_nlp_metrics(chatbot_names(n_chatbots))
+
+        seconds, analyzer = timed(lambda: PhDThesisExperiment3Analysis(ratings=cube, nlp_metrics=nlp_metrics),
+                                  repeat=repeat)
+        timings.append({'suite': 'analysis', 'size': label, 'name': 'prepare_data', 'seconds': seconds})
+        for method in HYPOTHESIS_METHODS:
+            seconds, _ = timed(getattr(analyzer, method), repeat=repeat)
+            timings.append({'suite': 'analysis', 'size': label, 'name': method, 'seconds': seconds})
+        if n_resamples:
+            seconds, _ = timed(lambda: analyzer.resampling_inference(n_resamples=n_resamples, seed=0, workers=1),
+                               repeat=1)
+            timings.append({'suite': 'analysis', 'size': label, 'name': f'resampling_inference[{n_resamples}]',
+                            'seconds': seconds})
+    return timings
+
+
+def bench_nlp(sizes, repeat):
+    calculator = load_nlp_evaluation().NLPMetricsCalculator()
+    timings = []
+    for n_chatbots, n_words, n_references in sizes:
+        label = f"{n_chatbots}×{n_words}w×{n_references}ref"
+        dialogues, references = make_dialogues(n_chatbots, n_words, n_references)
+        pairs = [(ref, candidate) for candidate in dialogues.values() for ref in references]
+
+        for method in PAIR_METRICS:
+            scorer = getattr(calculator, method)
+            seconds, _ = timed(lambda: [scorer(ref, candidate) for ref, candidate in pairs], repeat=repeat)
+            timings.append({'suite': 'nlp', 'size': label, 'name': method, 'seconds': seconds})
+
+        # 배치 엔진: 토큰화 1회 + 후보 × 참조 행렬 전체
+        candidates = list(dialogues.values())
+        seconds, _ = timed(lambda: CorpusScorer(references).score(candidates), repeat=repeat)
+        timings.append({'suite': 'nlp', 'size': label, 'name': 'CorpusScorer.score (all metrics)', 'seconds': seconds})
+
+        # BERTScore 대체 지표: 벡터화 포함 vs 메모리 맵 캐시 재사용
+        seconds, _ = timed(lambda: TfidfSimilarity(references).score(candidates), repeat=repeat)
+        timings.append({'suite': 'nlp', 'size': label, 'name': 'TfidfSimilarity.score', 'seconds': seconds})
+        with tempfile.TemporaryDirectory() as cache_dir:
+            TfidfSimilarity(references, cache=VectorCache(cache_dir)).score(candidates)
+            seconds, _ = timed(lambda: TfidfSimilarity(references, cache=VectorCache(cache_dir)).score(candidates),
+                               repeat=repeat)
+        timings.append({'suite': 'nlp', 'size': label, 'name': 'TfidfSimilarity.score (warm cache)',
+                        'seconds': seconds})
+
+        rng = np.random.default_rng(0)
+        human_scores = rng.uniform(1, 3, size=n_chatbots).tolist()
+        metric_scores = rng.uniform(0, 0.4, size=(len(PAIR_METRICS), n_chatbots)).tolist()
+        seconds, _ = timed(lambda: [calculator.calculate_correlation(human_scores, scores)
+                                    for scores in metric_scores], repeat=repeat)
+        timings.append({'suite': 'nlp', 'size': label, 'name': 'calculate_correlation', 'seconds': seconds})
+
+    # 상관 행렬 엔진: 지표 전체 × 평가자 전체 한 번에
+    n_metrics, n_raters, n_items = CORRELATION_SIZE
+    rng = np.random.default_rng(0)
+    metric_matrix = rng.uniform(0, 0.4, size=(n_metrics, n_items))
+    rater_matrix = rng.integers(1, 4, size=(n_raters, n_items)).astype(float)
+    for method in CORRELATION_METHODS:
+        seconds, _ = timed(lambda: correlation_matrix(metric_matrix, rater_matrix, method=method), repeat=repeat)
+        timings.append({'suite': 'nlp', 'size': f"{n_metrics}×{n_raters}×{n_items}",
+                        'name': f'correlation_matrix[{method}]', 'seconds': seconds})
+
+    targets = np.linspace(0.05, 0.95, 91)
+    seconds, _ = timed(lambda: [calculator.calculate_required_sample_size(r) for r in targets], repeat=repeat)
+    timings.append({'suite': 'nlp', 'size': f"{len(targets)} r", 'name': 'calculate_required_sample_size',
+                    'seconds': seconds})
+    return timings
+
+
+# ----------------------------------------------------------------------
+# 기록 / 비교
+# ----------------------------------------------------------------------
+
+def timing_key(timing):
+    return timing['suite'], timing['size'], timing['name']
+
+
+def print_timings(timings, baseline=None):
+    previous = {timing_key(timing): timing['seconds'] for timing in (baseline or {}).get('timings', [])}
+    header = f"{'suite':8} {'size':18} {'benchmark':40} {'time(s)':>9}"
+    if baseline:
+        header += f" {'base(s)':>9} {'ratio':>7}"
+    print(header)
+    print("─" * len(header))
+    for timing in timings:
+        line = f"{timing['suite']:8} {timing['size']:18} {timing['name']:40} {timing['seconds']:9.4f}"
+        if baseline:
+            base = previous.get(timing_key(timing))
+            line += f" {base:9.4f} {timing['seconds'] / base:6.2f}x" if base else f" {'-':>9} {'-':>7}"
+        print(line)
+
+
+def print_checks(checks):
+    failed = [check for check in checks if not check['passed']]
+    print(f"\n정확성 검사: {len(checks) - len(failed)}/{len(checks)} 통과")
+    for check in failed:
+        print(f"  ❌ {check['name']}: 기대값 {check['expected']!r}, 실제 {check['actual']!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Statistics and NLP metric benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="가장 작은 두 크기만 측정")
+    parser.add_argument("--checks-only", action="store_true", help="정확성 검사만 실행")
+    parser.add_argument("--resamples", type=int, default=1000, help="재표본 추론 반복 횟수 (0이면 생략)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/<커밋>.json)")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    checks = run_checks()
+    if args.checks_only:
+        print_checks(checks)
+        return 0 if all(check['passed'] for check in checks) else 1
+
+    analysis_sizes = ANALYSIS_SIZES[:2] if args.quick else ANALYSIS_SIZES
+    nlp_sizes = NLP_SIZES[:2] if args.quick else NLP_SIZES
+    timings = bench_analysis(analysis_sizes, args.resamples, args.repeat) + bench_nlp(nlp_sizes, args.repeat)
+
+    revision = git_revision()
+    record = {
+        'commit': revision,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'resamples': args.resamples,
+        'timings': timings,
+        'checks': checks,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"기준 결과: {baseline['commit']} ({baseline['timestamp']})")
+    print_timings(timings, baseline)
+    print_checks(checks)
+
+    if not args.no_save:
+        path = args.output or os.path.join(RESULTS_DIR, f"{revision}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {path}")
+
+    return 0 if all(check['passed'] for check in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+BLEU / ROUGE-L 커널 검증 및 긴 대화 기록 벤치마크
+
+text_metrics 의 sentence_bleu / corpus_bleu / rouge_l 을 참조 구현
+(nltk.translate.bleu_score, rouge-score)과 비교하고, 응답 길이를 늘려 가며 실행 시간을 측정합니다.
+참조 구현이 설치되어 있지 않으면 해당 항목은 건너뜁니다.
+
+실행:
+    pip install nltk rouge-score   # 검증용 (선택)
+    python benchmarks/bench_text_metrics.py
+    python benchmarks/bench_text_metrics.py --max-words 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_dialogues  # noqa: E402
+from text_metrics import corpus_bleu, rouge_l, sentence_bleu  # noqa: E402
+
+try:
+    from nltk.translate import bleu_score as nltk_bleu
+except ImportError:
+    nltk_bleu = None
+
+try:
+    from rouge_score import rouge_scorer
+except ImportError:
+    rouge_scorer = None
+
+# 응답 단어 수 (짧은 응답 → 긴 상담 대화 기록)
+LENGTHS = [20, 100, 500, 2000, 5000]
+
+# text_metrics 스무딩 이름 → nltk SmoothingFunction 메서드
+NLTK_SMOOTHING = {'none': 'method0', 'epsilon': 'method1', 'add1': 'method2', 'exp': 'method3'}
+
+
+class _WhitespaceTokenizer:
+    """rouge-score 에 calculate_* 와 같은 토큰화를 적용"""
+
+    def tokenize(self, text):
+        return text.lower().split()
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def validate(n_cases=50, seed=0):
+    """무작위 짧은 문장으로 참조 구현과의 최대 오차 계산"""
+    rng = np.random.default_rng(seed)
+    errors = {}
+    smoothing = nltk_bleu.SmoothingFunction() if nltk_bleu else None
+    scorer = rouge_scorer.RougeScorer(['rougeL'], tokenizer=_WhitespaceTokenizer()) if rouge_scorer else None
+
+    for case in range(n_cases):
+        dialogues, references = make_dialogues(4, int(rng.integers(1, 60)), int(rng.integers(1, 5)),
+                                               vocabulary_size=int(rng.integers(5, 200)), seed=case)
+        refs = [text.lower().split() for text in references]
+        hyps = [text.lower().split() for text in dialogues.values()]
+        if nltk_bleu:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                for name, method in NLTK_SMOOTHING.items():
+                    function = getattr(smoothing, method)
+                    for hyp in hyps:
+                        error = abs(sentence_bleu(refs, hyp, smoothing=name)
+                                    - nltk_bleu.sentence_bleu(refs, hyp, smoothing_function=function))
+                        errors[f'sentence_bleu[{name}]'] = max(errors.get(f'sentence_bleu[{name}]', 0.0), error)
+                    error = abs(corpus_bleu([refs] * len(hyps), hyps, smoothing=name)
+                                - nltk_bleu.corpus_bleu([refs] * len(hyps), hyps, smoothing_function=function))
+                    errors[f'corpus_bleu[{name}]'] = max(errors.get(f'corpus_bleu[{name}]', 0.0), error)
+        if scorer:
+            for ref_text, ref in zip(references, refs):
+                for hyp_text, hyp in zip(dialogues.values(), hyps):
+                    expected = scorer.score(ref_text, hyp_text)['rougeL']
+                    actual = rouge_l(ref, hyp)
+                    error = max(abs(actual['precision'] - expected.precision), abs(actual['recall'] - expected.recall),
+                                abs(actual['fmeasure'] - expected.fmeasure))
+                    errors['rouge_l'] = max(errors.get('rouge_l', 0.0), error)
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BLEU / ROUGE-L kernel validation and benchmark")
+    parser.add_argument("--max-words", type=int, default=5000)
+    parser.add_argument("--skip-reference-above", type=int, default=2000,
+                        help="이 길이를 넘으면 참조 구현 시간 측정 생략 (rouge-score 는 O(n²) 파이썬 DP)")
+    args = parser.parse_args(argv)
+
+    print("참조 구현과의 최대 절대 오차:")
+    errors = validate()
+    if not errors:
+        print("  (nltk / rouge-score 미설치 - 검증 생략)")
+    for name, error in errors.items():
+        print(f"  {name:24} {error:.2e} {'✅' if error < 1e-12 else '❌'}")
+
+    smoothing = nltk_bleu.SmoothingFunction().method2 if nltk_bleu else None
+    scorer = rouge_scorer.RougeScorer(['rougeL'], tokenizer=_WhitespaceTokenizer()) if rouge_scorer else None
+
+    print(f"\n{'words':>7} {'bleu(s)':>9} {'nltk(s)':>9} {'rougeL(s)':>10} {'rouge-score(s)':>15}")
+    for n_words in LENGTHS:
+        if n_words > args.max_words:
+            continue
+        dialogues, references = make_dialogues(1, n_words, 1, seed=n_words)
+        ref_text, hyp_text = references[0], next(iter(dialogues.values()))
+        ref, hyp = ref_text.lower().split(), hyp_text.lower().split()
+
+        bleu_time, _ = timed(sentence_bleu, [ref], hyp)
+        rouge_time, _ = timed(rouge_l, ref, hyp)
+        nltk_text = rouge_ref_text = "-"
+        if n_words <= args.skip_reference_above:
+            if nltk_bleu:
+                nltk_time, _ = timed(lambda: nltk_bleu.sentence_bleu([ref], hyp, smoothing_function=smoothing), repeat=1)
+                nltk_text = f"{nltk_time:.4f}"
+            if scorer:
+                ref_time, _ = timed(scorer.score, ref_text, hyp_text, repeat=1)
+                rouge_ref_text = f"{ref_time:.4f}"
+        print(f"{n_words:>7} {bleu_time:>9.4f} {nltk_text:>9} {rouge_time:>10.4f} {rouge_ref_text:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+벤치마크용 합성 데이터 생성기
+
+- 평가 점수 큐브: 챗봇 수 / 평가자 수 / 평가 기준 수를 자유롭게 늘린 RatingsCube
+  (챗봇별 실제 수준 + 평가자 편향 + 잡음을 1–3점 척도로 반올림)
+- NLP 지표: 챗봇별 bleu / rouge / meteor / bertscore
+- 대화 데이터: 응답 길이(단어 수)와 참조 응답 수를 조절한 후보 응답 / 그라운드 트루스
+
+같은 seed 로 생성하면 항상 같은 데이터가 나오므로 커밋 간 타이밍 비교에 사용할 수 있습니다.
+"""
+
+import os
+import sys
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ratings_cube import RatingsCube  # noqa: E402
+
+# 가설 2 는 닥터케어쌤을 기준으로 비교하므로 첫 번째 챗봇 이름으로 사용
+REFERENCE_CHATBOT = 'Dr.CareSam'
+
+NLP_METRICS = ['bleu', 'rouge', 'meteor', 'bertscore']
+
+# 상담 응답에 자주 나오는 단어 + 일반 단어 (참조 응답과 후보 응답이 일부 겹치도록)
+COUNSELING_WORDS = (
+    "i you your feel feeling anxious anxiety nervous normal common help support together "
+    "presentation stress techniques manage confident prepared understand explore would like "
+    "to the a it is can some these that this let's me we through about before very"
+).split()
+
+
+def chatbot_names(n_chatbots: int) -> List[str]:
+    return [REFERENCE_CHATBOT] + [f"bot_{i}" for i in range(1, n_chatbots)]
+
+
+def make_ratings(n_criteria: int, n_evaluators: int, n_chatbots: int, seed: int = 0) -> RatingsCube:
+    """(기준 × 평가자 × 챗봇) 1–3점 평가 큐브"""
+    rng = np.random.default_rng(seed)
+    quality = rng.normal(2.0, 0.4, size=n_chatbots)
+    rater_bias = rng.normal(0.0, 0.2, size=n_evaluators)
+    criterion_effect = rng.normal(0.0, 0.2, size=n_criteria)
+    noise = rng.normal(0.0, 0.5, size=(n_criteria, n_evaluators, n_chatbots))
+
+    values = quality[None, None, :] + rater_bias[None, :, None] + criterion_effect[:, None, None] + noise
+    values = np.clip(np.rint(values), 1, 3)
+    return RatingsCube(values,
+                       criteria=[f"criterion_{i}" for i in range(n_criteria)],
+                       evaluators=[f"rater_{i}" for i in range(n_evaluators)],
+                       chatbots=chatbot_names(n_chatbots))
+
+
+def make_nlp_metrics(chatbots: List[str], seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """챗봇별 NLP 지표 (0–1)"""
+    rng = np.random.default_rng(seed + 1)
+    scores = rng.uniform(0.0, 0.4, size=(len(chatbots), len(NLP_METRICS)))
+    return {
+        chatbot: {metric: float(scores[b, m]) for m, metric in enumerate(NLP_METRICS)}
+        for b, chatbot in enumerate(chatbots)
+    }
+
+
+def make_dialogues(n_chatbots: int, n_words: int, n_references: int, vocabulary_size: int = 2000,
+                   seed: int = 0) -> Tuple[Dict[str, str], List[str]]:
+    """
+    후보 응답(챗봇별 n_words 단어)과 참조 응답(n_references 개) 생성
+
+    단어의 절반은 상담 단어 목록에서, 나머지는 vocabulary_size 개의 합성 단어에서 뽑습니다.
+    """
+    rng = np.random.default_rng(seed + 2)
+    vocabulary = COUNSELING_WORDS + [f"w{i}" for i in range(vocabulary_size)]
+    weights = np.full(len(vocabulary), 0.5 / vocabulary_size)
+    weights[:len(COUNSELING_WORDS)] = 0.5 / len(COUNSELING_WORDS)
+
+    def sentence(length):
+        return " ".join(rng.choice(vocabulary, size=length, p=weights))
+
+    dialogues = {chatbot: sentence(n_words) for chatbot in chatbot_names(n_chatbots)}
+    references = [sentence(max(1, int(rng.integers(n_words // 2, n_words + 1)))) for _ in range(n_references)]
+    return dialogues, references
@@ -0,0 +1,311 @@
+"""
+상관 행렬 엔진 (NLP 지표 × 평가자 점수)
+
+여러 변수(행) 두 묶음 사이의 Pearson / Spearman / Kendall 상관을 한 번의 호출로 계산합니다.
+입력은 (변수 × 평가 대상) 배열이며, 예를 들어 x = (NLP 지표 × 챗봇), y = (평가자 × 챗봇) 입니다.
+
+- Pearson: 중심화 / 정규화한 행렬의 곱 하나 (BLAS)
+- Spearman: 행별 평균 순위 → Pearson
+- Pearson / Spearman p-value: t = r·√(df / (1 − r²)), df = n − 2 의 t 분포 (양측) - 임의의 n 에 정확
+  (scipy.stats.pearsonr / spearmanr 와 같은 값)
+- Kendall tau-b: 변수 쌍마다 x 순서(동점은 y 순서)로 정렬한 y 순위의 역전 수를 벡터화한 상향식 병합 정렬로
+  셉니다 (O(n log² n), 변수 쌍 묶음 단위로 나눠 메모리 제한). 한쪽 값의 종류가 적으면(1-3점 평가 등)
+  수준별 누적 개수로 O(n · 수준 수) 에 셉니다. p-value 는 scipy.stats.kendalltau 와 같이
+  동점이 없고 n ≤ 33 이면 정확 분포, 그 밖에는 동점 보정 정규 근사
+- 다중검정 보정: posthoc.adjust_pvalues (기본 Benjamini-Hochberg FDR), y 를 생략한 대칭 행렬은 위 삼각만 보정
+
+결측(NaN)이 있는 평가 대상은 모든 변수에서 제외합니다 (목록별 제외).
+"""
+
+from functools import lru_cache
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+from posthoc import adjust_pvalues
+
+METHODS = ('pearson', 'spearman', 'kendall')
+DEFAULT_CORRECTION = 'bh'
+
+# Kendall 병합 정렬 한 묶음의 최대 원소 수 (변수 쌍 수 × 평가 대상 수)
+KENDALL_BLOCK_ELEMENTS = 1 << 22
+# 순위 종류가 이 수 이하인 쪽(예: 1-3점 평가)은 병합 정렬 대신 수준별 누적 개수로 역전 수를 셈
+KENDALL_COUNTING_MAX_LEVELS = 16
+# 동점이 없을 때 정확 분포를 쓰는 최대 표본 크기 (scipy 와 동일)
+KENDALL_EXACT_MAX_N = 33
+
+
+def critical_t(df, alpha: float = 0.05):
+    """양측 t 검정 임계값 (자유도 df)"""
+    return stats.t.ppf(1 - alpha / 2, df)
+
+
+def _as_rows(values) -> np.ndarray:
+    array = np.asarray(values, dtype=float)
+    return array[None, :] if array.ndim == 1 else array
+
+
+def _complete_columns(x: np.ndarray, y: np.ndarray, nan_policy: str):
+    missing = np.isnan(x).any(axis=0) | np.isnan(y).any(axis=0)
+    if missing.any():
+        if nan_policy == 'raise':
+            raise ValueError(f"결측값이 있는 평가 대상 {int(missing.sum())}개")
+        if nan_policy != 'omit':
+            raise ValueError(f"unknown nan_policy: {nan_policy} (choose 'omit' or 'raise')")
+    return x[:, ~missing], y[:, ~missing]
+
+
+# ---------------------------------------------------------------------------
+# Pearson / Spearman
+# ---------------------------------------------------------------------------
+
+def _pearson(x: np.ndarray, y: np.ndarray):
+    n = x.shape[1]
+    xc = x - x.mean(axis=1, keepdims=True)
+    yc = y - y.mean(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = (xc @ yc.T) / np.outer(np.sqrt((xc ** 2).sum(axis=1)), np.sqrt((yc ** 2).sum(axis=1)))
+        # 완전 상관이 반올림 오차로 1 보다 약간 작게 나오는 경우 (p-value 가 0 이 되도록)
+        r = np.where(np.abs(r) > 1 - 1e-12, np.sign(r), r)
+        df = n - 2
+        t_stat = r * np.sqrt(df / (1 - r ** 2))
+        p_value = 2 * stats.t.sf(np.abs(t_stat), df) if df > 0 else np.full(r.shape, np.nan)
+    p_value = np.where(np.isnan(r), np.nan, p_value)
+    return r, t_stat, p_value
+
+
+# ---------------------------------------------------------------------------
+# Kendall tau-b
+# ---------------------------------------------------------------------------
+
+def _dense_ranks(x: np.ndarray) -> np.ndarray:
+    """행별 조밀 순위 (0부터, 같은 값은 같은 순위)"""
+    order = np.argsort(x, axis=1, kind='stable')
+    sorted_x = np.take_along_axis(x, order, axis=1)
+    new_value = np.ones(x.shape, dtype=bool)
+    new_value[:, 1:] = sorted_x[:, 1:] != sorted_x[:, :-1]
+    ranks = np.empty(x.shape, dtype=np.int64)
+    np.put_along_axis(ranks, order, np.cumsum(new_value, axis=1) - 1, axis=1)
+    return ranks
+
+
+def _tie_statistics(ranks: np.ndarray):
+    """행별 동점 통계량 (동점 쌍 수, Σ t(t−1)(t−2), Σ t(t−1)(2t+5))"""
+    rows, n = ranks.shape
+    counts = np.bincount((ranks + n * np.arange(rows)[:, None]).ravel(), minlength=rows * n) \
+        .reshape(rows, n).astype(float)
+    ties = (counts * (counts - 1) / 2).sum(axis=1)
+    v0 = (counts * (counts - 1) * (counts - 2)).sum(axis=1)
+    v1 = (counts * (counts - 1) * (2 * counts + 5)).sum(axis=1)
+    return ties, v0, v1
+
+
+def _count_inversions(sequences: np.ndarray) -> np.ndarray:
+    """
+    행별 엄격한 역전 수 (i < j 이고 s[i] > s[j] 인 쌍) - 모든 행을 한꺼번에 상향식 병합 정렬
+
+    값은 0 이상 n 미만의 정수여야 합니다. 각 단계에서 (행, 블록) 구간마다 다른 오프셋을 더하면
+    정렬된 왼쪽 블록들이 하나의 정렬된 배열이 되므로 searchsorted 한 번으로 모든 구간을 처리합니다.
+    """
+    rows, n = sequences.shape
+    size = 1 << max(0, (n - 1).bit_length())
+    merged = np.full((rows, size), n, dtype=np.int64)    # 끝에 붙인 최댓값은 역전을 만들지 않음
+    merged[:, :n] = sequences
+    inversions = np.zeros(rows, dtype=np.int64)
+    width = 1
+    while width < size:
+        segments = size // (2 * width)
+        blocks = merged.reshape(rows, segments, 2, width)
+        offsets = (np.arange(rows * segments, dtype=np.int64) * (n + 1)).reshape(rows, segments, 1)
+        left = (blocks[:, :, 0, :] + offsets).ravel()
+        right = (blocks[:, :, 1, :] + offsets).ravel()
+        starts = (np.arange(rows * segments, dtype=np.int64) * width).reshape(rows, segments, 1)
+        not_greater = np.searchsorted(left, right, side='right').reshape(rows, segments, width) - starts
+        inversions += (width - not_greater).sum(axis=(1, 2))
+        merged = np.sort(blocks.reshape(rows, segments, 2 * width), axis=2).reshape(rows, size)
+        width *= 2
+    return inversions
+
+
+def _count_inversions_by_level(sequences: np.ndarray, levels: int) -> np.ndarray:
+    """_count_inversions 와 같은 값 - 값의 종류(levels)가 적을 때 O(n · levels)"""
+    inversions = np.zeros(len(sequences), dtype=np.int64)
+    for level in range(levels - 1):
+        greater = sequences > level
+        # 값이 level 인 원소마다 앞에 있는 더 큰 원소 수
+        inversions += (np.cumsum(greater, axis=1) * (sequences == level)).sum(axis=1)
+    return inversions
+
+
+@lru_cache(maxsize=64)
+def _kendall_exact_cdf(n: int) -> np.ndarray:
+    """동점이 없을 때 일치 쌍 수 c 의 누적 확률 P(C ≤ c) (역전 수별 순열 개수, Mahonian 수)"""
+    counts = np.ones(1)
+    for j in range(2, n + 1):
+        # 원소 j 를 끼워 넣으면 역전이 0..j−1 개 늘어남
+        counts = np.convolve(counts, np.ones(j))
+    return np.cumsum(counts) / counts.sum()
+
+
+def _kendall_exact_p(n: int, concordant: np.ndarray) -> np.ndarray:
+    total = n * (n - 1) // 2
+    tail = np.minimum(concordant, total - concordant).astype(np.int64)
+    return np.minimum(1.0, 2 * _kendall_exact_cdf(n)[tail])
+
+
+def _kendall(x: np.ndarray, y: np.ndarray, block_elements: int = KENDALL_BLOCK_ELEMENTS):
+    n = x.shape[1]
+    x_ranks, y_ranks = _dense_ranks(x), _dense_ranks(y)
+    if len(x_ranks) and len(y_ranks) and x_ranks.max() < y_ranks.max():
+        # tau 는 대칭 - 순위 종류가 적은 쪽을 역전 수를 세는 순서열로
+        tau, p_value = _kendall(y, x, block_elements)
+        return tau.T, p_value.T
+    levels = int(y_ranks.max()) + 1 if y_ranks.size else 0
+    x_ties, x0, x1 = _tie_statistics(x_ranks)
+    y_ties, y0, y1 = _tie_statistics(y_ranks)
+    total = n * (n - 1) / 2
+
+    pairs_x, pairs_y = np.divmod(np.arange(len(x) * len(y)), len(y))
+    discordant = np.empty(len(pairs_x))
+    joint_ties = np.empty(len(pairs_x))
+    step = max(1, block_elements // max(n, 1))
+    for start in range(0, len(pairs_x), step):
+        i, j = pairs_x[start:start + step], pairs_y[start:start + step]
+        # x 순서, x 가 같으면 y 순서로 정렬 → y 의 엄격한 역전 수 = 불일치 쌍 수
+        keys = x_ranks[i] * n + y_ranks[j]
+        order = np.argsort(keys, axis=1, kind='stable')
+        sequences = np.take_along_axis(y_ranks[j], order, axis=1)
+        discordant[start:start + step] = (_count_inversions_by_level(sequences, levels)
+                                          if levels <= KENDALL_COUNTING_MAX_LEVELS else _count_inversions(sequences))
+        sorted_keys = np.take_along_axis(keys, order, axis=1)
+        same = np.zeros(sorted_keys.shape, dtype=bool)
+        same[:, 1:] = sorted_keys[:, 1:] == sorted_keys[:, :-1]
+        # 같은 (x, y) 묶음 크기 t → t(t−1)/2: 각 원소가 앞의 같은 원소 수만큼 기여
+        run_start = np.maximum.accumulate(np.where(same, 0, np.arange(n)), axis=1)
+        joint_ties[start:start + step] = (np.arange(n) - run_start).sum(axis=1)
+
+    shape = (len(x), len(y))
+    discordant = discordant.reshape(shape)
+    joint_ties = joint_ties.reshape(shape)
+    xt, yt = x_ties[:, None], y_ties[None, :]
+    con_minus_dis = total - xt - yt + joint_ties - 2 * discordant
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = np.clip(con_minus_dis / np.sqrt(total - xt) / np.sqrt(total - yt), -1.0, 1.0)
+        m = n * (n - 1.0)
+        variance = ((m * (2 * n + 5) - x1[:, None] - y1[None, :]) / 18 + 2 * xt * yt / m
+                    + x0[:, None] * y0[None, :] / (9 * m * (n - 2)))
+        p_value = 2 * stats.norm.sf(np.abs(con_minus_dis) / np.sqrt(variance))
+
+    no_ties = (xt == 0) & (yt == 0)
+    exact = no_ties & ((n <= KENDALL_EXACT_MAX_N) | (np.minimum(discordant, total - discordant) <= 1))
+    if exact.any() and n >= 2:
+        if n <= KENDALL_EXACT_MAX_N:
+            p_value = np.where(exact, _kendall_exact_p(n, total - discordant), p_value)
+        else:
+            # 거의 완전한 (역)순서: P(C ≤ 0) = 1/n!, P(C ≤ 1) = n/n! (scipy 와 같은 식)
+            c = np.minimum(discordant, total - discordant)
+            tail = np.where(c == 0, 2.0 / _factorial(n), 2.0 / _factorial(n - 1))
+            p_value = np.where(exact, tail, p_value)
+    undefined = (xt == total) | (yt == total)
+    tau = np.where(undefined, np.nan, tau)
+    p_value = np.where(undefined | np.isnan(tau), np.nan, p_value)
+    return tau, p_value
+
+
+def _factorial(n: int) -> float:
+    return float(np.exp(np.sum(np.log(np.arange(2, n + 1))))) if n < 171 else np.inf
+
+
+# ---------------------------------------------------------------------------
+# 공개 API
+# ---------------------------------------------------------------------------
+
+def correlation_matrix(x, y=None, method: str = 'pearson', correction: str = DEFAULT_CORRECTION,
+                       nan_policy: str = 'omit') -> Dict[str, np.ndarray]:
+    """
+    상관 행렬과 p-value
+
+    x: (변수 × 평가 대상), y: (변수 × 평가 대상) - 생략하면 x 안의 모든 변수 쌍
+    method: 'pearson', 'spearman', 'kendall' (tau-b)
+    correction: 다중검정 보정 (posthoc.adjust_pvalues - 'bh', 'holm', 'bonferroni', 'none')
+    반환: r, p_value, p_adjusted (x 변수 × y 변수), t_stat (Pearson / Spearman), n (사용한 평가 대상 수)
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown correlation method: {method} (choose from {METHODS})")
+    symmetric = y is None
+    x = _as_rows(x)
+    y = x if symmetric else _as_rows(y)
+    if x.shape[1] != y.shape[1]:
+        raise ValueError(f"평가 대상 수가 다름: x {x.shape[1]}, y {y.shape[1]}")
+    x, y = _complete_columns(x, y, nan_policy)
+
+    result: Dict[str, np.ndarray] = {}
+    if method == 'kendall':
+        r, p_value = _kendall(x, y)
+    else:
+        if method == 'spearman':
+            x, y = stats.rankdata(x, axis=1), stats.rankdata(y, axis=1)
+        r, t_stat, p_value = _pearson(x, y)
+        result['t_stat'] = t_stat
+
+    if symmetric:
+        upper = np.triu(np.ones(r.shape, dtype=bool), k=1)
+        adjusted = np.full(r.shape, np.nan)
+        adjusted[upper] = adjust_pvalues(p_value[upper], correction)
+        adjusted = np.where(upper, adjusted, adjusted.T)
+        np.fill_diagonal(adjusted, 0.0)
+    else:
+        adjusted = adjust_pvalues(p_value.ravel(), correction).reshape(p_value.shape)
+
+    result.update({'r': r, 'p_value': p_value, 'p_adjusted': adjusted, 'n': x.shape[1], 'method': method})
+    return result
+
+
+def correlation_table(x, y, x_labels: Sequence[str], y_labels: Sequence[str],
+                      methods: Sequence[str] = ('pearson',), correction: str = DEFAULT_CORRECTION,
+                      alpha: float = 0.05, nan_policy: str = 'omit') -> pd.DataFrame:
+    """
+    long-format 상관 표 (x, y, method, r, p_value, p_adjusted, n, significant)
+
+    보정은 방법별 행렬 전체(x 변수 × y 변수)를 한 묶음으로 합니다.
+    """
+    frames = []
+    for method in methods:
+        result = correlation_matrix(x, y, method=method, correction=correction, nan_policy=nan_policy)
+        r = result['r']
+        frames.append(pd.DataFrame({
+            'x': np.repeat(list(x_labels), r.shape[1]),
+            'y': np.tile(list(y_labels), r.shape[0]),
+            'method': method,
+            'r': r.ravel(),
+            'p_value': result['p_value'].ravel(),
+            'p_adjusted': result['p_adjusted'].ravel(),
+            'n': result['n'],
+        }))
+    table = pd.concat(frames, ignore_index=True)
+    table['significant'] = table['p_adjusted'] < alpha
+    return table
+
+
+def correlation_summary(x, y, alpha: float = 0.05, correction: str = DEFAULT_CORRECTION,
+                        method: str = 'pearson') -> Dict[str, np.ndarray]:
+    """
+    correlation_matrix + 양측 임계 t 값과 유의성 (calculate_correlation / 가설 4 출력용)
+
+    significant: |t| > 임계값 (보정 전), significant_adjusted: 보정 p < alpha
+    """
+    result = correlation_matrix(x, y, method=method, correction=correction)
+    df = result['n'] - 2
+    result['df'] = df
+    result['critical_t'] = float(critical_t(df, alpha)) if df > 0 else np.nan
+    if 't_stat' in result:
+        with np.errstate(invalid='ignore'):
+            result['significant'] = np.abs(result['t_stat']) > result['critical_t']
+    else:
+        result['significant'] = result['p_value'] < alpha
+    result['significant_adjusted'] = result['p_adjusted'] < alpha
+    return result
+
@@ -0,0 +1,322 @@
+"""
+chat_history 내보내기 전체에 대한 병렬 오프라인 NLP 평가 파이프라인
+
+NLPMetricsCalculator 는 챗봇별 대화 하나만 평가하지만, 운영 chat_history 에는 수십만 개의 응답이 있습니다.
+이 파이프라인은 내보내기 파일을 청크(shard) 단위로 스트리밍해 프로세스 풀에 나눠 주고,
+참조 응답 세트별로 4개 NLP 지표(nlp_scoring.CorpusScorer)를 계산해 Parquet 으로 저장합니다.
+
+- 출력 디렉터리
+  - parts/part-<shard>.parquet: 응답별 점수 (shard, position, chat_mode, chat_uuid, reference_set, 지표들)
+  - aggregates.parquet: (reference_set, chat_mode) 별 응답 수 / 지표 평균 / 표준편차
+  - manifest.json: 설정과 완료된 shard 목록 (shard 별 합계 / 제곱합 포함)
+- 체크포인트: shard 가 끝날 때마다 Parquet 파일을 원자적으로 쓰고(임시 파일 → os.replace) manifest 를 갱신
+  → 중단된 실행을 같은 명령으로 다시 시작하면 완료된 shard 는 건너뜀
+  (입력 파일 / 참조 응답 / 토큰화 / 청크 크기가 바뀌면 --restart 필요)
+- 집계는 shard 별 합계를 합쳐 계산하므로 점수 파일을 다시 읽지 않고, 메모리는 동시에 처리하는 shard 수에만 비례
+
+실행:
+    python eval_pipeline.py chat_history.parquet --output-dir eval_runs/2024-06 --workers 8
+    python eval_pipeline.py chat_history.csv --output-dir eval_runs/ko \\
+        --references ko=refs_ko.txt --references en=refs_en.txt --tokenizer syllable --token-cache .token_cache.sqlite
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from analysis_cache import content_hash
+from nlp_scoring import METRICS, CorpusScorer, default_references, read_references
+from ratings_io import DEFAULT_CHUNKSIZE, iter_chat_history_export
+from tokenization import TOKENIZERS, get_tokenizer
+
+PIPELINE_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+PARTS_DIR = 'parts'
+AGGREGATES_NAME = 'aggregates.parquet'
+
+SCORE_COLUMNS = ['shard', 'position', 'chat_mode', 'chat_uuid', 'reference_set', *METRICS]
+
+# 프로세스별 채점기 (작업 프로세스 초기화 시 한 번 생성)
+_WORKER: Dict[str, Any] = {}
+
+
+# ---------------------------------------------------------------------------
+# 설정 / manifest
+# ---------------------------------------------------------------------------
+
+def parse_reference_sets(specs: Sequence[str]) -> Dict[str, List[str]]:
+    """
+    '--references 이름=경로' 목록 → {이름: 참조 응답}
+
+    이름을 생략하면 파일 이름(확장자 제외), 목록이 비면 NLPMetricsCalculator 의 참조 응답('default')
+    """
+    if not specs:
+        return {'default': default_references()}
+    reference_sets: Dict[str, List[str]] = {}
+    for spec in specs:
+        name, _, path = spec.rpartition('=')
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        if name in reference_sets:
+            raise ValueError(f"참조 응답 세트 이름 중복: {name}")
+        references = read_references(path)
+        if not references:
+            raise ValueError(f"참조 응답이 비어 있음: {path}")
+        reference_sets[name] = references
+    return reference_sets
+
+
+def pipeline_config(input_path: str, reference_sets: Dict[str, List[str]], tokenizer: str,
+                    ngram: Optional[int], chunksize: int) -> Dict[str, Any]:
+    """재개 가능 여부를 판단하는 설정 (하나라도 바뀌면 이전 shard 를 재사용할 수 없음)"""
+    stat = os.stat(input_path)
+    return {
+        'version': PIPELINE_VERSION,
+        'input': os.path.abspath(input_path),
+        'input_size': stat.st_size,
+        'input_mtime_ns': stat.st_mtime_ns,
+        'reference_sets': {name: content_hash(references) for name, references in reference_sets.items()},
+        'tokenizer': tokenizer,
+        'ngram': ngram,
+        'chunksize': chunksize,
+    }
+
+
+def load_manifest(output_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir: str, manifest: Dict[str, Any]):
+    """임시 파일에 쓴 뒤 교체 (중단되어도 이전 manifest 가 온전히 남음)"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, path)
+
+
+# ---------------------------------------------------------------------------
+# shard 채점 (작업 프로세스)
+# ---------------------------------------------------------------------------
+
+def _init_worker(reference_sets: Dict[str, List[str]], tokenizer: str, ngram: Optional[int],
+                 token_cache: Optional[str]):
+    """참조 응답 세트별 채점기 생성 (토큰화기와 분할 캐시는 세트 간 공유)"""
+    tokenize = get_tokenizer(tokenizer, n=ngram, cache_path=token_cache)
+    _WORKER['scorers'] = {name: CorpusScorer(references, tokenize=tokenize)
+                          for name, references in reference_sets.items()}
+
+
+def shard_aggregates(scores: pd.DataFrame) -> List[Dict[str, Any]]:
+    """(reference_set, chat_mode) 별 응답 수 / 지표 합계 / 제곱합 (shard 간 합산 가능)"""
+    squares = scores[list(METRICS)] ** 2
+    squares.columns = [f'{metric}_sq' for metric in METRICS]
+    grouped = pd.concat([scores[['reference_set', 'chat_mode', *METRICS]], squares], axis=1) \
+        .groupby(['reference_set', 'chat_mode'], sort=True)
+    sums = grouped.sum()
+    counts = grouped.size()
+    return [{'reference_set': reference_set, 'chat_mode': chat_mode, 'replies': int(counts[(reference_set, chat_mode)]),
+             **{column: float(value) for column, value in row.items()}}
+            for (reference_set, chat_mode), row in sums.iterrows()]
+
+
+def score_shard(shard: int, chunk: pd.DataFrame, parts_dir: str) -> Dict[str, Any]:
+    """shard 하나를 모든 참조 응답 세트로 채점해 Parquet 으로 저장 → manifest 항목"""
+    started = time.perf_counter()
+    texts = chunk['ai_msg'].tolist()
+    frames = []
+    for name, scorer in _WORKER['scorers'].items():
+        best = scorer.best(texts)
+        frame = pd.DataFrame({
+            'shard': np.full(len(texts), shard, dtype=np.int64),
+            'position': np.arange(len(texts), dtype=np.int64),
+            'chat_mode': chunk['chat_mode'].to_numpy(),
+            'chat_uuid': chunk['chat_uuid'].to_numpy(),
+            'reference_set': name,
+        })
+        for metric in METRICS:
+            frame[metric] = best[metric]
+        frames.append(frame)
+    scores = pd.concat(frames, ignore_index=True)[SCORE_COLUMNS]
+
+    file_name = f'part-{shard:06d}.parquet'
+    temp_path = os.path.join(parts_dir, f'.{file_name}.{os.getpid()}.tmp')
+    scores.to_parquet(temp_path, index=False)
+    os.replace(temp_path, os.path.join(parts_dir, file_name))
+    return {'shard': shard, 'file': os.path.join(PARTS_DIR, file_name), 'replies': len(texts),
+            'aggregates': shard_aggregates(scores), 'seconds': time.perf_counter() - started}
+
+
+# ---------------------------------------------------------------------------
+# 집계 / 결과 읽기
+# ---------------------------------------------------------------------------
+
+def combine_aggregates(parts: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+    """shard 별 합계 → (reference_set, chat_mode) 별 응답 수 / 평균 / 표준편차 (ddof=1)"""
+    columns = ['reference_set', 'chat_mode', 'replies'] + [f'{metric}_{stat}' for metric in METRICS
+                                                            for stat in ('mean', 'std')]
+    rows = [row for part in parts for row in part['aggregates']]
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    totals = pd.DataFrame(rows).groupby(['reference_set', 'chat_mode'], sort=True).sum().reset_index()
+    n = totals['replies'].to_numpy(dtype=float)
+    for metric in METRICS:
+        mean = totals[metric].to_numpy() / n
+        # 합계 / 제곱합 → 표본 분산 (음수 반올림 오차는 0 으로)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = np.where(n > 1, (totals[f'{metric}_sq'].to_numpy() - n * mean ** 2) / (n - 1), np.nan)
+        totals[f'{metric}_mean'] = mean
+        totals[f'{metric}_std'] = np.sqrt(np.maximum(variance, 0.0))
+    return totals[columns]
+
+
+def read_scores(output_dir: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """완료된 shard 의 응답별 점수를 하나의 DataFrame 으로 읽기 (shard 순서)"""
+    manifest = load_manifest(output_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"{output_dir}: {MANIFEST_NAME} 없음")
+    parts = sorted(manifest['parts'].values(), key=lambda part: part['shard'])
+    frames = [pd.read_parquet(os.path.join(output_dir, part['file']), columns=columns) for part in parts]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns or SCORE_COLUMNS)
+
+
+# ---------------------------------------------------------------------------
+# 실행
+# ---------------------------------------------------------------------------
+
+def run_pipeline(input_path: str, output_dir: str, reference_sets: Dict[str, List[str]],
+                 tokenizer: str = 'whitespace', ngram: Optional[int] = None, token_cache: Optional[str] = None,
+                 chunksize: int = DEFAULT_CHUNKSIZE, workers: Optional[int] = None,
+                 restart: bool = False, max_shards: Optional[int] = None) -> pd.DataFrame:
+    """
+    파이프라인 실행 (이전 실행이 있으면 이어서) → 집계 DataFrame
+
+    max_shards: 이번 실행에서 처리할 최대 shard 수 (긴 작업을 나눠 실행할 때)
+    """
+    config = pipeline_config(input_path, reference_sets, tokenizer, ngram, chunksize)
+    parts_dir = os.path.join(output_dir, PARTS_DIR)
+
+    manifest = load_manifest(output_dir)
+    if manifest is not None and (restart or manifest['config'] != config):
+        if not restart:
+            changed = sorted(key for key in config if manifest['config'].get(key) != config[key])
+            raise ValueError(f"{output_dir}: 이전 실행과 설정이 다름 ({', '.join(changed)}) - "
+                             "--restart 로 처음부터 다시 실행하거나 다른 출력 디렉터리를 사용하세요")
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        manifest = None
+    if manifest is None:
+        manifest = {'config': config, 'parts': {}, 'complete': False}
+    os.makedirs(parts_dir, exist_ok=True)
+    for name in os.listdir(parts_dir):
+        if name.endswith('.tmp'):
+            os.remove(os.path.join(parts_dir, name))
+
+    done = {int(shard) for shard, part in manifest['parts'].items()
+            if os.path.exists(os.path.join(output_dir, part['file']))}
+    manifest['parts'] = {str(shard): manifest['parts'][str(shard)] for shard in sorted(done)}
+    manifest['complete'] = False
+    save_manifest(output_dir, manifest)
+    if done:
+        print(f"⏩ 이전 실행 재개: 완료된 shard {len(done)}개 건너뜀")
+
+    def record(part: Dict[str, Any]):
+        manifest['parts'][str(part['shard'])] = part
+        save_manifest(output_dir, manifest)
+        print(f"  ✅ shard {part['shard']}: 응답 {part['replies']}개 ({part['seconds']:.1f}초)")
+
+    workers = workers or os.cpu_count() or 1
+    initargs = (reference_sets, tokenizer, ngram, token_cache)
+    chunks = iter_chat_history_export(input_path, chunksize=chunksize)
+    submitted = 0
+    finished_all = True
+
+    if workers > 1:
+        # 읽기는 현재 프로세스, 채점은 풀 - 대기 중인 shard 수를 제한해 메모리를 일정하게 유지
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            pending = set()
+            try:
+                for shard, chunk in enumerate(chunks):
+                    if shard in done:
+                        continue
+                    if max_shards is not None and submitted >= max_shards:
+                        finished_all = False
+                        break
+                    pending.add(pool.submit(score_shard, shard, chunk[['chat_mode', 'chat_uuid', 'ai_msg']],
+                                            parts_dir))
+                    submitted += 1
+                    while len(pending) >= 2 * workers:
+                        completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in completed:
+                            record(future.result())
+                for future in wait(pending).done:
+                    record(future.result())
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+    else:
+        _init_worker(*initargs)
+        for shard, chunk in enumerate(chunks):
+            if shard in done:
+                continue
+            if max_shards is not None and submitted >= max_shards:
+                finished_all = False
+                break
+            record(score_shard(shard, chunk, parts_dir))
+            submitted += 1
+
+    aggregates = combine_aggregates(list(manifest['parts'].values()))
+    if finished_all:
+        aggregates.to_parquet(os.path.join(output_dir, AGGREGATES_NAME), index=False)
+        manifest['complete'] = True
+        save_manifest(output_dir, manifest)
+    return aggregates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="chat_history 전체 병렬 NLP 평가 (Parquet 출력, 중단 후 재개)")
+    parser.add_argument('chat_history', help="chat_history 내보내기 파일 (CSV / Parquet / NDJSON)")
+    parser.add_argument('--output-dir', required=True, help="출력 디렉터리 (같은 디렉터리로 다시 실행하면 이어서 진행)")
+    parser.add_argument('--references', action='append', default=[], metavar='[NAME=]PATH',
+                        help="참조 응답 세트 파일 (여러 번 지정 가능, 없으면 NLPMetricsCalculator 의 참조 응답)")
+    parser.add_argument('--tokenizer', choices=TOKENIZERS, default='whitespace', help="토큰화 방식")
+    parser.add_argument('--ngram', type=int, help="syllable / jamo 토큰 n-gram 길이 (기본: 음절 2, 자모 3)")
+    parser.add_argument('--token-cache', help="분할 결과 sqlite 캐시 경로 (프로세스 간 공유)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="shard 크기 (응답 수)")
+    parser.add_argument('--workers', type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument('--max-shards', type=int, help="이번 실행에서 처리할 최대 shard 수")
+    parser.add_argument('--restart', action='store_true', help="이전 결과를 지우고 처음부터 실행")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    reference_sets = parse_reference_sets(args.references)
+    print(f"🚀 평가 시작: {args.chat_history} → {args.output_dir} "
+          f"(참조 세트 {', '.join(f'{name}({len(refs)})' for name, refs in reference_sets.items())})")
+    try:
+        aggregates = run_pipeline(args.chat_history, args.output_dir, reference_sets, tokenizer=args.tokenizer,
+                                  ngram=args.ngram, token_cache=args.token_cache, chunksize=args.chunksize,
+                                  workers=args.workers, restart=args.restart, max_shards=args.max_shards)
+    except KeyboardInterrupt:
+        print("\n⏸️ 중단됨 - 같은 명령으로 다시 실행하면 완료된 shard 다음부터 이어서 진행합니다")
+        raise SystemExit(130)
+
+    manifest = load_manifest(args.output_dir)
+    replies = sum(part['replies'] for part in manifest['parts'].values())
+    status = "완료" if manifest['complete'] else "일부 완료 (같은 명령으로 이어서 실행)"
+    print(f"\n📊 {status}: shard {len(manifest['parts'])}개, 응답 {replies}개 "
+          f"({time.perf_counter() - started:.1f}초)")
+    print(aggregates[['reference_set', 'chat_mode', 'replies', *[f'{metric}_mean' for metric in METRICS]]]
+          .to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
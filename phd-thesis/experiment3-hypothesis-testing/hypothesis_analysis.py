@@ -11,13 +11,24 @@ Date: 2025
 업데이트: ICC 분석 → 피어슨 상관분석으로 변경
 """
 
+import argparse
+import contextlib
+import json
+import os
+import sys
 import numpy as np
 import pandas as pd
-import scipy.stats as stats
-from scipy.stats import f_oneway, pearsonr
 import matplotlib.pyplot as plt
 import seaborn as sns
-from statsmodels.stats.multicomp import pairwise_tukeyhsd
+from ratings_cube import RatingsCube, as_number
+from ratings_io import DEFAULT_CHUNKSIZE, load_ratings, load_nlp_metrics
+from resampling import ResamplingEngine, evaluator_pairs, format_result
+from correlation import correlation_summary
+from reliability import pairwise_correlations, icc, krippendorff_alpha
+from posthoc import tukey_hsd, games_howell, permutation_pairwise, versus_reference, format_table
+from analysis_cache import AnalysisCache, StepGraph, code_fingerprint
+from profiling import StageProfiler, stage, profiled, format_report, format_cprofile
+from reporting import FIGURE_NAME, FIGURE_DPI, figure_data, draw_figure, render_figure, write_results
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -25,6 +36,10 @@ warnings.filterwarnings('ignore')
 plt.rcParams['font.family'] = 'DejaVu Sans'
 plt.rcParams['figure.figsize'] = (12, 8)
 
+def format_p(p_value):
+    """요약 출력용 p 값 표기 (p < 0.001 또는 p = 0.xxx)"""
+    return "p < 0.001" if p_value < 0.001 else f"p = {p_value:.3f}"
+
 class PhDThesisExperiment3Analysis:
     """
     박사논문 실험 3: 정신건강 챗봇 상담학적 평가 가설검증
@@ -36,11 +51,22 @@ class PhDThesisExperiment3Analysis:
     H₄: NLP vs 상담학적 평가의 차이
     """
     
-    def __init__(self):
-        """실제 박사논문 평가 데이터 초기화"""
+    FIGURE_PATH = FIGURE_NAME
+    REFERENCE_CHATBOT = 'Dr.CareSam'   # 가설 2 의 비교 기준 챗봇 (평가 데이터에 없으면 가설 2 생략)
+    NLP_METRICS = ['bleu', 'rouge', 'meteor', 'bertscore']
+    
+    def __init__(self, evaluation_data=None, nlp_metrics=None, ratings=None):
+        """
+        실제 박사논문 평가 데이터 초기화
+        
+        evaluation_data (criterion → evaluator → chatbot 딕셔너리) 또는
+        ratings (RatingsCube)를 넘기면 기본 논문 데이터 대신 사용합니다.
+        nlp_metrics 를 넘겼는데 평가 데이터의 챗봇을 모두 포함하지 않으면 ValueError,
+        넘기지 않았고 기본 논문 지표가 평가 데이터의 챗봇을 포함하지 않으면 가설 4 를 생략합니다.
+        """
         
         # 실제 평가 데이터 (7개 기준 × 3명 평가자 × 4개 챗봇)
-        self.evaluation_data = {
+        self.evaluation_data = evaluation_data or {
             '공감성': {
                 'Claude': {'Replika': 3, 'Wysa': 2, 'Youper': 2, 'Dr.CareSam': 3},
                 'ChatGPT': {'Replika': 2, 'Wysa': 3, 'Youper': 2, 'Dr.CareSam': 3},
@@ -79,50 +105,61 @@ class PhDThesisExperiment3Analysis:
         }
         
         # NLP 지표 데이터 (기존 논문에서 계산된 값)
-        self.nlp_metrics = {
+        self.nlp_metrics = nlp_metrics or {
             'Youper': {'bleu': 0.144, 'rouge': 0.254, 'meteor': 0.31, 'bertscore': 0.288},
             'Wysa': {'bleu': 0.141, 'rouge': 0.25, 'meteor': 0.29, 'bertscore': 0.27},
             'Replika': {'bleu': 0.0, 'rouge': 0.15, 'meteor': 0.227, 'bertscore': 0.28},
             'Dr.CareSam': {'bleu': 0.04, 'rouge': 0.129, 'meteor': 0.159, 'bertscore': 0.184}
         }
         
+        # 평가 점수 큐브 (기준 × 평가자 × 챗봇) - 딕셔너리는 입력 형식으로만 사용
+        if ratings is None:
+            default_order = evaluation_data is None
+            ratings = RatingsCube.from_nested_dict(
+                self.evaluation_data,
+                evaluators=['Claude', 'ChatGPT', 'Human'] if default_order else None,
+                chatbots=['Replika', 'Wysa', 'Youper', 'Dr.CareSam'] if default_order else None
+            )
+        elif evaluation_data is None:
+            self.evaluation_data = None
+        self.ratings = ratings
+        
         # 기본 설정
-        self.chatbots = ['Replika', 'Wysa', 'Youper', 'Dr.CareSam']
-        self.criteria = list(self.evaluation_data.keys())
-        self.evaluators = ['Claude', 'ChatGPT', 'Human']
+        self.chatbots = ratings.chatbots
+        self.criteria = ratings.criteria
+        self.evaluators = ratings.evaluators
+        
+        # NLP 지표가 평가 데이터의 챗봇을 모두 포함하는지 확인 (기본 논문 지표는 논문 챗봇 4개만 포함)
+        missing = [chatbot for chatbot in self.chatbots
+                   if not set(self.NLP_METRICS) <= set(self.nlp_metrics.get(chatbot, {}))]
+        if missing and nlp_metrics:
+            raise ValueError(f"NLP 지표에 없는 챗봇: {', '.join(missing)} "
+                             f"(챗봇마다 {', '.join(self.NLP_METRICS)} 필요)")
+        if missing:
+            print(f"⚠️  기본 NLP 지표에 없는 챗봇({', '.join(missing)}) - 가설 4 생략 (NLP 지표 파일 필요)")
+            self.nlp_metrics = None
         
         # 데이터 전처리
-        self._prepare_data()
+        with stage('prepare_data'):
+            self._prepare_data()
         
     def _prepare_data(self):
-        """분석을 위한 데이터 전처리"""
+        """분석을 위한 데이터 전처리 (큐브의 벡터 연산으로 주변 합계 계산)"""
         
-        # 1. 모든 개별 점수 추출
-        self.individual_scores = {chatbot: [] for chatbot in self.chatbots}
-        self.chatbot_totals = {}
-        self.chatbot_means = {}
+        # 1. 챗봇별 개별 점수, 총점, 평균
+        group_scores = self.ratings.group_scores()
+        totals = self.ratings.chatbot_totals()
+        means = self.ratings.chatbot_means()
         
-        for chatbot in self.chatbots:
-            total = 0
-            for criterion in self.criteria:
-                for evaluator in self.evaluators:
-                    score = self.evaluation_data[criterion][evaluator][chatbot]
-                    self.individual_scores[chatbot].append(score)
-                    total += score
-            
-            self.chatbot_totals[chatbot] = total
-            self.chatbot_means[chatbot] = total / (len(self.criteria) * len(self.evaluators))
+        self.individual_scores = {chatbot: group_scores[i] for i, chatbot in enumerate(self.chatbots)}
+        self.chatbot_totals = {chatbot: as_number(totals[i]) for i, chatbot in enumerate(self.chatbots)}
+        self.chatbot_means = {chatbot: float(means[i]) for i, chatbot in enumerate(self.chatbots)}
         
-        # 2. 평가자별 총점 계산
-        self.evaluator_totals = {}
-        for evaluator in self.evaluators:
-            self.evaluator_totals[evaluator] = []
-            for chatbot in self.chatbots:
-                chatbot_total = sum(
-                    self.evaluation_data[criterion][evaluator][chatbot] 
-                    for criterion in self.criteria
-                )
-                self.evaluator_totals[evaluator].append(chatbot_total)
+        # 2. 평가자별 총점 계산 (평가자 × 챗봇)
+        evaluator_totals = self.ratings.evaluator_totals()
+        self.evaluator_totals = {
+            evaluator: evaluator_totals[e] for e, evaluator in enumerate(self.evaluators)
+        }
         
         print("📊 데이터 전처리 완료")
         print(f"구조: {len(self.criteria)}개 기준 × {len(self.evaluators)}명 평가자 × {len(self.chatbots)}개 챗봇")
@@ -140,56 +177,41 @@ class PhDThesisExperiment3Analysis:
         print("가설 1 검증: 7가지 상담학적 평가 기준의 변별력")
         print("="*80)
         
-        # One-way ANOVA 수행
-        group_scores = [self.individual_scores[chatbot] for chatbot in self.chatbots]
-        f_stat, p_value = f_oneway(*group_scores)
-        
-        # 효과크기 계산 (eta-squared)
-        all_scores = []
-        for scores in group_scores:
-            all_scores.extend(scores)
-        
-        grand_mean = np.mean(all_scores)
-        n_per_group = len(group_scores[0])  # 21
-        k = len(group_scores)  # 4
-        
-        # SSB (Between-group sum of squares)
-        group_means = [np.mean(scores) for scores in group_scores]
-        ssb = n_per_group * sum((mean - grand_mean)**2 for mean in group_means)
-        
-        # SSW (Within-group sum of squares)
-        ssw = sum(sum((score - group_mean)**2 for score in group_scores[i]) 
-                 for i, group_mean in enumerate(group_means))
+        # One-way ANOVA 수행 (SSB/SSW를 큐브에서 벡터 연산으로 계산)
+        with stage('anova'):
+            anova = self.ratings.anova_oneway()
+        f_stat = anova['f_stat']
+        p_value = anova['p_value']
         
-        eta_squared = ssb / (ssb + ssw)
+        # 효과크기 계산 (eta-squared = SSB / (SSB + SSW))
+        eta_squared = anova['eta_squared']
         
         # 결과 출력
-        df_between = k - 1
-        df_within = len(all_scores) - k
+        df_between = anova['df_between']
+        df_within = anova['df_within']
         
         print(f"일원배치 분산분석 결과:")
         print(f"F({df_between}, {df_within}) = {f_stat:.2f}")
         print(f"p-value = {p_value:.6f} {'(p < 0.001)' if p_value < 0.001 else ''}")
         print(f"η² = {eta_squared:.3f} ({'큰' if eta_squared > 0.14 else '중간' if eta_squared > 0.06 else '작은'} 효과크기)")
         
-        # Tukey HSD 사후검정
-        all_data = []
-        all_labels = []
-        for chatbot, scores in zip(self.chatbots, group_scores):
-            all_data.extend(scores)
-            all_labels.extend([chatbot] * len(scores))
-        
-        df_tukey = pd.DataFrame({'score': all_data, 'chatbot': all_labels})
-        tukey_result = pairwise_tukeyhsd(df_tukey['score'], df_tukey['chatbot'], alpha=0.05)
+        # 사후검정: 모든 챗봇 쌍을 한 번에 계산 (Tukey HSD, 등분산 가정이 없는 Games-Howell)
+        with stage('posthoc'):
+            all_data, all_labels = self.ratings.long_format()
+            tukey_result = tukey_hsd(all_data, all_labels, alpha=0.05)
+            games_howell_result = games_howell(all_data, all_labels, alpha=0.05)
+        table_columns = ['group1', 'group2', 'meandiff', 'p_adj', 'lower', 'upper', 'reject']
         
         print(f"\nTukey HSD 사후검정 결과:")
-        print(tukey_result)
+        print(format_table(tukey_result[table_columns], "Multiple Comparison of Means - Tukey HSD, FWER=0.05"))
+        print(f"\nGames-Howell 사후검정 결과 (등분산 가정 없음):")
+        print(format_table(games_howell_result[table_columns], "Games-Howell, FWER=0.05"))
         
         # 가설 검증 결론
         if p_value < 0.05:
             print(f"\n✅ 가설 1 채택")
             print(f"   상담학적 평가 기준이 챗봇 간 유의미한 차이를 변별함")
-            print(f"   F({df_between},{df_within}) = {f_stat:.2f}, p < 0.001, η² = {eta_squared:.3f}")
+            print(f"   F({df_between},{df_within}) = {f_stat:.2f}, {format_p(p_value)}, η² = {eta_squared:.3f}")
         else:
             print(f"\n❌ 가설 1 기각: 유의미한 차이 없음 (p = {p_value:.3f})")
         
@@ -197,7 +219,10 @@ class PhDThesisExperiment3Analysis:
             'f_stat': f_stat,
             'p_value': p_value,
             'eta_squared': eta_squared,
+            'df_between': df_between,
+            'df_within': df_within,
             'tukey_result': tukey_result,
+            'games_howell_result': games_howell_result,
             'hypothesis_accepted': p_value < 0.05
         }
     
@@ -210,6 +235,10 @@ class PhDThesisExperiment3Analysis:
         print("가설 2 검증: 닥터케어쌤의 글로벌 수준 성능")
         print("="*80)
         
+        reference = self.REFERENCE_CHATBOT
+        if reference not in self.chatbots:
+            raise ValueError(f"평가 데이터에 기준 챗봇이 없습니다: {reference}")
+        
         # 성능 순위 계산
         ranked_chatbots = sorted(self.chatbot_means.items(), key=lambda x: x[1], reverse=True)
         
@@ -219,38 +248,35 @@ class PhDThesisExperiment3Analysis:
             print(f"{i}위: {chatbot} - 총 {total_score}점 (평균 {mean_score:.3f})")
         
         # 닥터케어쌤 위치 분석
-        drcare_rank = next(i for i, (name, _) in enumerate(ranked_chatbots, 1) if name == 'Dr.CareSam')
-        drcare_mean = self.chatbot_means['Dr.CareSam']
+        drcare_rank = next(i for i, (name, _) in enumerate(ranked_chatbots, 1) if name == reference)
+        drcare_mean = self.chatbot_means[reference]
         
         print(f"\n닥터케어쌤 성능 분석:")
-        print(f"- 전체 순위: {drcare_rank}위/4개 챗봇")
+        print(f"- 전체 순위: {drcare_rank}위/{len(self.chatbots)}개 챗봇")
         print(f"- 평균 점수: {drcare_mean:.3f}")
-        print(f"- 총점: {self.chatbot_totals['Dr.CareSam']}점")
+        print(f"- 총점: {self.chatbot_totals[reference]}점")
         
-        # 개별 t-검정으로 다른 챗봇과 비교
-        drcare_scores = self.individual_scores['Dr.CareSam']
+        # 독립표본 t-검정으로 다른 챗봇과 비교 (모든 챗봇을 한 번에 계산)
+        all_data, all_labels = self.ratings.long_format()
+        versus = versus_reference(all_data, all_labels, reference, groups=self.chatbots)
         
         print(f"\n다른 챗봇과의 성능 비교 (독립표본 t-검정):")
         comparisons = []
         
-        for other_chatbot in self.chatbots:
-            if other_chatbot != 'Dr.CareSam':
-                other_scores = self.individual_scores[other_chatbot]
-                t_stat, p_value = stats.ttest_ind(drcare_scores, other_scores)
-                mean_diff = np.mean(drcare_scores) - np.mean(other_scores)
-                
-                comparisons.append({
-                    'chatbot': other_chatbot,
-                    't_stat': t_stat,
-                    'p_value': p_value,
-                    'mean_diff': mean_diff,
-                    'significant': p_value < 0.05
-                })
-                
-                significance = "**" if p_value < 0.01 else "*" if p_value < 0.05 else "ns"
-                direction = "우위" if mean_diff > 0 else "열위"
-                print(f"vs {other_chatbot}: t = {t_stat:.3f}, p = {p_value:.3f} {significance} "
-                      f"({direction}, 차이: {mean_diff:+.3f})")
+        for other_chatbot, t_stat, p_value, mean_diff in zip(
+                versus['group2'].astype(str), versus['t_stat'], versus['p_value'], versus['meandiff']):
+            comparisons.append({
+                'chatbot': other_chatbot,
+                't_stat': t_stat,
+                'p_value': p_value,
+                'mean_diff': mean_diff,
+                'significant': p_value < 0.05
+            })
+            
+            significance = "**" if p_value < 0.01 else "*" if p_value < 0.05 else "ns"
+            direction = "우위" if mean_diff > 0 else "열위"
+            print(f"vs {other_chatbot}: t = {t_stat:.3f}, p = {p_value:.3f} {significance} "
+                  f"({direction}, 차이: {mean_diff:+.3f})")
         
         # 가설 검증 결론
         # "대등한 성능"을 상위 50% (2위 이내)로 해석
@@ -263,7 +289,7 @@ class PhDThesisExperiment3Analysis:
             
             # 상위 챗봇과 유의한 차이가 없으면 더 강한 근거
             top_chatbot = ranked_chatbots[0][0]
-            if top_chatbot != 'Dr.CareSam':
+            if top_chatbot != reference:
                 top_comparison = next(c for c in comparisons if c['chatbot'] == top_chatbot)
                 if not top_comparison['significant']:
                     print(f"   최고 성능 {top_chatbot}와 유의한 차이 없음 (p = {top_comparison['p_value']:.3f})")
@@ -298,25 +324,22 @@ class PhDThesisExperiment3Analysis:
             std_score = np.std(evaluator_scores, ddof=1)
             print(f"{evaluator}: M = {mean_score:.3f}, SD = {std_score:.3f}")
         
-        # 개별 평가자 간 상관관계 분석
+        # 개별 평가자 간 상관관계 분석 (모든 평가자 쌍을 한 번의 행렬 연산으로 계산)
         print(f"\n개별 평가자 간 상관관계:")
         print("─" * 50)
-        evaluator_pairs = [
-            ('Claude', 'ChatGPT'),
-            ('Claude', 'Human'), 
-            ('ChatGPT', 'Human')
-        ]
+        with stage('correlations'):
+            pair_matrix = pairwise_correlations(self.ratings.evaluator_totals())
         
         correlations = {}
+        llm_human_pairs = []
         threshold = 0.5  # 중간 수준 상관관계 기준
         llm_human_above_threshold = 0
         significant_correlations = 0
         
-        for eval1, eval2 in evaluator_pairs:
-            correlation, p_value = pearsonr(
-                self.evaluator_totals[eval1], 
-                self.evaluator_totals[eval2]
-            )
+        for eval1, eval2 in evaluator_pairs(self.evaluators):
+            i, j = self.evaluators.index(eval1), self.evaluators.index(eval2)
+            correlation = pair_matrix['r'][i, j]
+            p_value = pair_matrix['p_value'][i, j]
             correlations[f"{eval1}_vs_{eval2}"] = {
                 'correlation': correlation,
                 'p_value': p_value,
@@ -335,6 +358,7 @@ class PhDThesisExperiment3Analysis:
             
             # LLM-인간 상관관계만 카운트
             if 'Human' in [eval1, eval2]:
+                llm_human_pairs.append(f"{eval1}_vs_{eval2}")
                 if correlation > threshold:
                     llm_human_above_threshold += 1
         
@@ -345,16 +369,7 @@ class PhDThesisExperiment3Analysis:
         print(f"\n전체 평가자 간 평균 상관관계: r = {mean_correlation:.3f}")
         
         # Cronbach's Alpha 계산 (내적 일관성)
-        scores_matrix = []
-        for chatbot in self.chatbots:
-            chatbot_scores = []
-            for evaluator in self.evaluators:
-                total = sum(self.evaluation_data[criterion][evaluator][chatbot] 
-                          for criterion in self.criteria)
-                chatbot_scores.append(total)
-            scores_matrix.append(chatbot_scores)
-        
-        transposed = np.array(scores_matrix).T
+        transposed = self.ratings.evaluator_totals()
         n_items = transposed.shape[1]
         item_variances = np.var(transposed, axis=0, ddof=1)
         total_scores = np.sum(transposed, axis=1)
@@ -366,24 +381,32 @@ class PhDThesisExperiment3Analysis:
         reliability_level = "높음" if cronbach_alpha > 0.8 else "중간" if cronbach_alpha > 0.7 else "낮음"
         print(f"Cronbach's α = {cronbach_alpha:.3f} ({reliability_level} 신뢰도)")
         
+        # 급내상관계수 (챗봇 × 평가자 총점) 및 Krippendorff's alpha (개별 평가, 서열 척도)
+        with stage('icc_krippendorff'):
+            icc_results = icc(self.ratings.evaluator_totals().T)
+            item_ratings = self.ratings.values.transpose(1, 0, 2).reshape(len(self.evaluators), -1)
+            kripp_alpha = krippendorff_alpha(item_ratings, level='ordinal')
+        
+        print(f"ICC(2,1) = {icc_results['ICC2']['icc']:.3f}, ICC(3,k) = {icc_results['ICC3k']['icc']:.3f} (챗봇별 총점)")
+        print(f"Krippendorff's α (ordinal) = {kripp_alpha:.3f} (개별 평가 {item_ratings.shape[1]}개 항목)")
+        
         # LLM과 인간 평가자 간 특별 분석
         print(f"\nLLM vs 인간 평가자 상관관계 특별 분석:")
         print("─" * 50)
         
-        claude_human_r = correlations['Claude_vs_Human']['correlation']
-        chatgpt_human_r = correlations['ChatGPT_vs_Human']['correlation']
-        
-        print(f"Claude vs Human: r = {claude_human_r:.3f}")
-        print(f"ChatGPT vs Human: r = {chatgpt_human_r:.3f}")
-        print(f"LLM-Human 평균 상관: r = {(claude_human_r + chatgpt_human_r)/2:.3f}")
+        llm_human_rs = [correlations[pair]['correlation'] for pair in llm_human_pairs]
+        for pair, r in zip(llm_human_pairs, llm_human_rs):
+            print(f"{pair.replace('_vs_', ' vs ')}: r = {r:.3f}")
+        if llm_human_rs:
+            print(f"LLM-Human 평균 상관: r = {np.mean(llm_human_rs):.3f}")
         
         # 가설 검증 결론
         print(f"\n가설 검증 결과:")
         print(f"주요 지표:")
         print(f"  • 평균 상관관계: r = {mean_correlation:.3f}")
-        print(f"  • LLM-Human 중간 이상: {llm_human_above_threshold}/2개")
+        print(f"  • LLM-Human 중간 이상: {llm_human_above_threshold}/{len(llm_human_pairs)}개")
         print(f"  • Cronbach's α = {cronbach_alpha:.3f}")
-        print(f"  • 유의한 상관관계: {significant_correlations}/3개")
+        print(f"  • 유의한 상관관계: {significant_correlations}/{len(correlations)}개")
         
         # 가설 채택 기준: LLM-인간 간 중간 수준 이상 상관관계 (r ≥ 0.5)
         hypothesis_accepted = (llm_human_above_threshold >= 1 and mean_correlation >= 0.4)
@@ -392,7 +415,7 @@ class PhDThesisExperiment3Analysis:
             print(f"\n✅ 가설 3 채택")
             print(f"   LLM-인간 평가자 간 중간 수준 이상의 상관관계 확인")
             print(f"   평균 상관계수 r = {mean_correlation:.3f} ≥ 0.4")
-            if llm_human_above_threshold == 2:
+            if llm_human_above_threshold == len(llm_human_pairs):
                 print(f"   모든 LLM-인간 쌍에서 중간 이상 상관관계 달성")
         else:
             print(f"\n❌ 가설 3 기각")
@@ -402,7 +425,10 @@ class PhDThesisExperiment3Analysis:
             'correlations': correlations,
             'mean_correlation': mean_correlation,
             'cronbach_alpha': cronbach_alpha,
+            'icc': icc_results,
+            'krippendorff_alpha': kripp_alpha,
             'llm_human_above_threshold': llm_human_above_threshold,
+            'llm_human_pairs': len(llm_human_pairs),
             'significant_correlations': significant_correlations,
             'hypothesis_accepted': hypothesis_accepted
         }
@@ -430,29 +456,25 @@ class PhDThesisExperiment3Analysis:
         nlp_correlations = {}
         significant_count = 0
         
-        for metric in ['bleu', 'rouge', 'meteor', 'bertscore']:
-            # NLP 점수 추출 (챗봇 순서와 동일하게)
-            nlp_scores = [self.nlp_metrics[chatbot][metric] for chatbot in self.chatbots]
-            
-            # 상관관계 계산
-            correlation, p_value = pearsonr(counseling_scores, nlp_scores)
-            
-            # t-검정 통계량 (n=4, df=2)
-            n = len(counseling_scores)
-            df = n - 2
-            if correlation != 1.0:  # 완전상관 방지
-                t_stat = correlation * np.sqrt(df) / np.sqrt(1 - correlation**2)
-            else:
-                t_stat = np.inf
-            
-            # 임계값 (양측검정, α=0.05, df=2)
-            critical_t = 4.303
-            significant = abs(t_stat) > critical_t
+        # 모든 지표를 한 번에 (correlation.correlation_summary - t 분포 임계값, FDR 보정 p)
+        metrics = self.NLP_METRICS
+        summary = correlation_summary([[self.nlp_metrics[chatbot][metric] for chatbot in self.chatbots]
+                                       for metric in metrics], [counseling_scores])
+        n = summary['n']
+        df = summary['df']
+        critical_t = summary['critical_t']
+        
+        for i, metric in enumerate(metrics):
+            correlation = summary['r'][i, 0]
+            t_stat = summary['t_stat'][i, 0]
+            p_value = summary['p_value'][i, 0]
+            significant = bool(summary['significant'][i, 0])
             
             nlp_correlations[metric] = {
                 'correlation': correlation,
                 't_stat': t_stat,
                 'p_value': p_value,
+                'p_fdr': summary['p_adjusted'][i, 0],
                 'significant': significant
             }
             
@@ -463,14 +485,14 @@ class PhDThesisExperiment3Analysis:
             strength = "강함" if abs(correlation) > 0.7 else "중간" if abs(correlation) > 0.3 else "약함"
             
             print(f"{metric.upper():10}: r = {correlation:7.3f}, t = {t_stat:6.3f}, "
-                  f"p = {p_value:.3f} {'*' if significant else 'ns'} "
+                  f"p = {p_value:.3f} (FDR q = {nlp_correlations[metric]['p_fdr']:.3f}) {'*' if significant else 'ns'} "
                   f"({strength}{direction_note})")
         
         # 검정력 분석
         print(f"\n통계적 검정력 분석:")
         print(f"- 표본 크기: n = {n} (매우 작음)")
         print(f"- 자유도: df = {df}")
-        print(f"- 임계값: ±{critical_t} (매우 높음)")
+        print(f"- 임계값: ±{critical_t:.3f} (매우 높음)")
         print(f"- 유의한 상관관계: {significant_count}/{len(nlp_correlations)}개")
         
         # 실질적 차이 분석
@@ -517,118 +539,150 @@ class PhDThesisExperiment3Analysis:
             'hypothesis_accepted': significant_count == 0
         }
     
-    def create_visualization(self, results):
-        """결과 시각화"""
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
-        
-        # 1. 챗봇별 평균 점수 (가설 1, 2)
-        names = list(self.chatbot_means.keys())
-        means = list(self.chatbot_means.values())
-        colors = ['#FF6B6B' if name == 'Dr.CareSam' else '#4ECDC4' for name in names]
-        
-        bars = ax1.bar(names, means, color=colors, alpha=0.8, edgecolor='black')
-        ax1.set_title('챗봇별 상담학적 평가 평균 점수', fontsize=14, fontweight='bold')
-        ax1.set_ylabel('평균 점수')
-        ax1.grid(True, alpha=0.3)
-        
-        # 순위 표시
-        sorted_items = sorted(zip(names, means), key=lambda x: x[1], reverse=True)
-        for i, (name, mean) in enumerate(sorted_items):
-            idx = names.index(name)
-            ax1.text(idx, mean + 0.05, f'{i+1}위\n{mean:.2f}', 
-                    ha='center', va='bottom', fontweight='bold')
-        
-        # 2. 피어슨 상관관계 결과 시각화 (가설 3)
-        if 'hypothesis_3' in results:
-            correlations = results['hypothesis_3']['correlations']
-            pairs = list(correlations.keys())
-            corr_values = [correlations[pair]['correlation'] for pair in pairs]
-            
-            # 상관관계 막대 그래프
-            colors_corr = ['lightgreen' if corr > 0.5 else 'orange' if corr > 0.3 else 'lightcoral' 
-                          for corr in corr_values]
-            
-            pair_labels = [pair.replace('_vs_', ' vs ') for pair in pairs]
-            bars = ax2.bar(pair_labels, corr_values, color=colors_corr, alpha=0.8, edgecolor='black')
-            
-            # 기준선 표시
-            ax2.axhline(y=0.5, color='green', linestyle='--', alpha=0.7, label='중간 기준 (0.5)')
-            ax2.axhline(y=0.7, color='blue', linestyle='--', alpha=0.7, label='강한 기준 (0.7)')
-            
-            ax2.set_title('평가자간 피어슨 상관관계 (가설 3)', fontsize=14, fontweight='bold')
-            ax2.set_ylabel('상관계수')
-            ax2.set_ylim(0, 1)
-            ax2.legend()
-            ax2.grid(True, alpha=0.3)
-            
-            # 상관계수 값 표시
-            for i, corr in enumerate(corr_values):
-                ax2.text(i, corr + 0.05, f'{corr:.3f}', 
-                        ha='center', va='bottom', fontweight='bold')
-        
-        # 3. NLP 지표 vs 상담학적 평가 (가설 4)
-        if 'hypothesis_4' in results:
-            nlp_corr = results['hypothesis_4']['nlp_correlations']
-            metrics = list(nlp_corr.keys())
-            correlations_vals = [nlp_corr[metric]['correlation'] for metric in metrics]
-            
-            colors_nlp = ['red' if corr < 0 else 'skyblue' for corr in correlations_vals]
-            bars = ax3.bar(metrics, correlations_vals, color=colors_nlp, alpha=0.7)
-            ax3.set_title('NLP 지표와 상담학적 평가 간 상관관계 (가설 4)', fontsize=14, fontweight='bold')
-            ax3.set_ylabel('상관계수')
-            ax3.axhline(y=0, color='black', linestyle='-', alpha=0.3)
-            ax3.axhline(y=0.5, color='green', linestyle='--', alpha=0.5, label='r=0.5')
-            ax3.axhline(y=-0.5, color='green', linestyle='--', alpha=0.5)
-            ax3.legend()
-            ax3.grid(True, alpha=0.3)
-            
-            # 상관계수 값 표시
-            for i, (metric, corr) in enumerate(zip(metrics, correlations_vals)):
-                ax3.text(i, corr + (0.02 if corr >= 0 else -0.05), f'{corr:.3f}', 
-                        ha='center', va='bottom' if corr >= 0 else 'top')
-        
-        # 4. 가설 검증 결과 요약
-        hypothesis_results = ['H₁', 'H₂', 'H₃', 'H₄']
-        acceptance = []
-        
-        if 'hypothesis_1' in results:
-            acceptance.append('채택' if results['hypothesis_1']['hypothesis_accepted'] else '기각')
-        if 'hypothesis_2' in results:
-            acceptance.append('채택' if results['hypothesis_2']['hypothesis_accepted'] else '기각')
-        if 'hypothesis_3' in results:
-            acceptance.append('채택' if results['hypothesis_3']['hypothesis_accepted'] else '기각')
-        if 'hypothesis_4' in results:
-            acceptance.append('채택' if results['hypothesis_4']['hypothesis_accepted'] else '기각')
-        
-        colors_hyp = ['green' if acc == '채택' else 'red' for acc in acceptance]
-        ax4.bar(hypothesis_results, [1]*len(hypothesis_results), color=colors_hyp, alpha=0.7)
-        ax4.set_title('가설 검증 결과 요약', fontsize=14, fontweight='bold')
-        ax4.set_ylabel('결과')
-        ax4.set_ylim(0, 1.2)
-        
-        # 결과 텍스트 표시
-        for i, (hyp, acc) in enumerate(zip(hypothesis_results, acceptance)):
-            ax4.text(i, 0.5, acc, ha='center', va='center', 
-                    fontweight='bold', fontsize=12, color='white')
-        
-        plt.tight_layout()
-        plt.savefig('phd_thesis_experiment3_pearson_results.png', dpi=300, bbox_inches='tight')
-        plt.show()
+    def resampling_inference(self, n_resamples=10000, seed=None, workers=None):
+        """
+        순열검정 / 부트스트랩 기반 추론 (H1–H4 보완)
+        
+        F 통계량, η², 평가자 간 피어슨 상관, Cronbach's α, NLP-상담 평가 상관,
+        닥터케어쌤 순위에 대해 순열 p-value 와 부트스트랩 95% 신뢰구간을 계산합니다.
+        """
+        print("\n" + "="*80)
+        print(f"재표본 기반 추론 (순열검정 / 부트스트랩, {n_resamples:,}회)")
+        print("="*80)
+        
+        engine = ResamplingEngine(n_resamples=n_resamples, workers=workers,
+                                  **({'seed': seed} if seed is not None else {}))
+        
+        # H1, H2: F, η², 닥터케어쌤 순위
+        groups = [self.individual_scores[chatbot] for chatbot in self.chatbots]
+        reference = self.REFERENCE_CHATBOT
+        target = self.chatbots.index(reference) if reference in self.chatbots else None
+        with stage('anova_rank'):
+            anova = engine.anova(groups, target=target)
+        
+        # H3: 평가자 간 상관, Cronbach's α
+        with stage('inter_rater'):
+            correlations = engine.pearson_many({
+                f"{eval1}_vs_{eval2}": (self.evaluator_totals[eval1], self.evaluator_totals[eval2])
+                for eval1, eval2 in evaluator_pairs(self.evaluators)
+            })
+            cronbach_alpha = engine.cronbach_alpha(self.ratings.evaluator_totals())
+        
+        # H4: NLP 지표 vs 상담학적 평가 (NLP 지표가 없으면 생략)
+        nlp_correlations = {}
+        if self.nlp_metrics is not None:
+            counseling_scores = [self.chatbot_means[chatbot] for chatbot in self.chatbots]
+            with stage('nlp_correlations'):
+                nlp_correlations = engine.pearson_many({
+                    metric: (counseling_scores, [self.nlp_metrics[chatbot][metric] for chatbot in self.chatbots])
+                    for metric in self.NLP_METRICS
+                })
+        
+        # H1 사후검정: 모든 챗봇 쌍의 순열검정 (Holm 보정)
+        all_data, all_labels = self.ratings.long_format()
+        with stage('pairwise_permutation'):
+            pairwise = permutation_pairwise(all_data, all_labels, n_resamples=n_resamples, correction='holm',
+                                            **({'seed': seed} if seed is not None else {}))
+        
+        print(format_result("F statistic", anova['f_stat']))
+        print(format_result("η²", anova['eta_squared']))
+        for pair, result in correlations.items():
+            print(format_result(f"r {pair}", result))
+        print(format_result("Cronbach's α", cronbach_alpha))
+        for metric, result in nlp_correlations.items():
+            print(format_result(f"r counseling vs {metric}", result))
+        if 'rank' in anova:
+            rank = anova['rank']
+            print(format_result(f"{reference} rank", rank))
+            print(f"{'':24}  P(2위 이내, 부트스트랩) = {rank['p_top2']:.3f}")
+        print(f"\n챗봇 쌍별 순열검정 (Holm 보정):")
+        print(format_table(pairwise[['group1', 'group2', 'meandiff', 'p_value', 'p_adj', 'reject']]))
+        
+        return {
+            'anova': anova,
+            'correlations': correlations,
+            'cronbach_alpha': cronbach_alpha,
+            'nlp_correlations': nlp_correlations,
+            'pairwise_permutation': pairwise,
+        }
+    
+    def create_visualization(self, results, show=True, output_path=None):
+        """
+        결과 시각화 (그림 구성은 reporting.draw_figure)
+        
+        show=False 이면 plt.show() 없이 저장만 합니다 (배치 작업용).
+        """
+        fig = draw_figure(figure_data(results, self.chatbot_means))
+        fig.savefig(output_path or self.FIGURE_PATH, dpi=FIGURE_DPI, bbox_inches='tight')
+        if show:
+            plt.show()
+        else:
+            plt.close(fig)
     
-    def run_complete_analysis(self):
-        """전체 가설검증 분석 실행"""
+    def build_step_graph(self, n_resamples=0, workers=None, cache=None, show=True, figure_path=None):
+        """
+        분석 단계 의존성 그래프
+        
+        가설 1–3 은 평가 점수, 가설 4 는 평가 점수 + NLP 지표에만 의존하며
+        시각화는 가설 1–4 결과에 의존합니다. cache 가 있으면 입력이 바뀐 단계만 다시 계산합니다.
+        기준 챗봇이 없으면 가설 2, NLP 지표가 없으면 가설 4 단계를 만들지 않습니다.
+        """
+        helpers = (RatingsCube, ResamplingEngine, icc, tukey_hsd, correlation_summary, figure_data, draw_figure)
+        helper_modules = list(dict.fromkeys(sys.modules[obj.__module__] for obj in helpers))
+        # 모든 단계가 _prepare_data 에서 계산한 값(chatbot_means, individual_scores 등)을 읽으므로 함께 해시
+        graph = StepGraph(cache, code_version=code_fingerprint(*helper_modules, self._prepare_data, format_p))
+        
+        graph.add('hypothesis_1', lambda deps: self.hypothesis_1_discrimination_analysis(),
+                  inputs=self.ratings, code=self.hypothesis_1_discrimination_analysis)
+        if self.REFERENCE_CHATBOT in self.chatbots:
+            graph.add('hypothesis_2', lambda deps: self.hypothesis_2_drcare_performance(),
+                      inputs=[self.ratings, self.REFERENCE_CHATBOT], code=self.hypothesis_2_drcare_performance)
+        graph.add('hypothesis_3', lambda deps: self.hypothesis_3_inter_rater_reliability(),
+                  inputs=self.ratings, code=self.hypothesis_3_inter_rater_reliability)
+        if self.nlp_metrics is not None:
+            graph.add('hypothesis_4', lambda deps: self.hypothesis_4_nlp_vs_counseling(),
+                      inputs=[self.ratings, self.nlp_metrics, self.NLP_METRICS],
+                      code=self.hypothesis_4_nlp_vs_counseling)
+        if n_resamples > 0:
+            # 재표본 결과는 seed 로 결정되며 워커 수와 무관하므로 workers 는 키에 포함하지 않음
+            graph.add('resampling', lambda deps: self.resampling_inference(n_resamples, workers=workers),
+                      inputs=[self.ratings, self.nlp_metrics, n_resamples], code=self.resampling_inference)
+        figure_path = figure_path or self.FIGURE_PATH
+        graph.add('visualization', lambda deps: self._render_figure(deps, figure_path, show),
+                  inputs=[figure_path, show],
+                  depends=[name for name in graph.steps if name.startswith('hypothesis_')],
+                  code=[self._render_figure, draw_figure], is_valid=lambda figure: os.path.exists(figure['path']))
+        return graph
+    
+    def _render_figure(self, results, figure_path, show):
+        if show:
+            self.create_visualization(results, show=True, output_path=figure_path)
+            rendered = True
+        else:
+            # 헤드리스: Agg 로 렌더링하며 그림 데이터가 바뀌지 않았으면 건너뜀
+            rendered = render_figure(figure_data(results, self.chatbot_means), figure_path)
+        return {'path': figure_path, 'rendered': rendered}
+    
+    def run_complete_analysis(self, n_resamples=0, workers=None, cache_dir=None, show=True, report_dir=None):
+        """
+        전체 가설검증 분석 실행
+        
+        n_resamples > 0 이면 순열검정 / 부트스트랩 추론 결과도 results['resampling'] 에 포함합니다.
+        cache_dir 를 지정하면 단계별 결과를 디스크에 캐시하고 입력이 바뀐 단계만 다시 계산합니다.
+        show=False 이면 그림 창을 띄우지 않으며(헤드리스), report_dir 를 지정하면
+        그림과 함께 results.json / summary.csv / 결과 표 CSV 를 그 디렉터리에 저장합니다.
+        """
         print("🎓 박사학위논문 실험 3: 정신건강 챗봇 상담학적 평가 가설검증")
         print("📊 Dr.CareSam vs Global Mental Health Chatbots Comparative Analysis")
         print("🔍 피어슨 상관분석 기반 평가자간 일치도 검증")
         print("="*80)
         
-        results = {}
-        
-        # 각 가설 순차 검증
-        results['hypothesis_1'] = self.hypothesis_1_discrimination_analysis()
-        results['hypothesis_2'] = self.hypothesis_2_drcare_performance()
-        results['hypothesis_3'] = self.hypothesis_3_inter_rater_reliability()
-        results['hypothesis_4'] = self.hypothesis_4_nlp_vs_counseling()
+        # 각 가설 순차 검증 (시각화는 종합 결과 출력 후)
+        cache = AnalysisCache(cache_dir) if cache_dir else None
+        figure_path = os.path.join(report_dir, FIGURE_NAME) if report_dir else self.FIGURE_PATH
+        graph = self.build_step_graph(n_resamples, workers, cache, show, figure_path)
+        targets = [name for name in graph.steps if name != 'visualization']
+        results = graph.run(targets)
         
         # 종합 결과 요약
         print("\n" + "="*80)
@@ -636,36 +690,52 @@ class PhDThesisExperiment3Analysis:
         print("="*80)
         
         h1 = results['hypothesis_1']
-        h2 = results['hypothesis_2']
+        h2 = results.get('hypothesis_2')
         h3 = results['hypothesis_3']
-        h4 = results['hypothesis_4']
+        h4 = results.get('hypothesis_4')
+        f_test = f"F({h1['df_between']},{h1['df_within']}) = {h1['f_stat']:.2f}, {format_p(h1['p_value'])}, η² = {h1['eta_squared']:.3f}"
+        
+        def verdict(result):
+            return '✅ 채택' if result['hypothesis_accepted'] else '❌ 기각'
         
         print(f"📊 통계적 검증 결과:")
         print(f"┌────────────────────────────────────────────────────────────────┐")
         print(f"│ H₁: 상담학적 평가 기준의 변별력                               │")
-        print(f"│     F(3,80) = {h1['f_stat']:.2f}, p < 0.001, η² = {h1['eta_squared']:.3f}         │")
-        print(f"│     결과: {'✅ 채택' if h1['hypothesis_accepted'] else '❌ 기각'}                                          │")
+        print(f"│     {f_test}         │")
+        print(f"│     결과: {verdict(h1)}                                          │")
         print(f"├────────────────────────────────────────────────────────────────┤")
         print(f"│ H₂: 닥터케어쌤의 글로벌 수준 성능                              │")
-        print(f"│     순위: {h2['rank']}위/4개, 평균: {h2['mean_score']:.3f}                     │")
-        print(f"│     결과: {'✅ 채택' if h2['hypothesis_accepted'] else '❌ 기각'}                                          │")
+        if h2 is not None:
+            print(f"│     순위: {h2['rank']}위/{len(self.chatbots)}개, 평균: {h2['mean_score']:.3f}                     │")
+            print(f"│     결과: {verdict(h2)}                                          │")
+        else:
+            print(f"│     생략: 평가 데이터에 {self.REFERENCE_CHATBOT} 없음                          │")
         print(f"├────────────────────────────────────────────────────────────────┤")
         print(f"│ H₃: LLM-인간 평가자 간 일치도 (피어슨)                        │")
-        print(f"│     평균 r = {h3['mean_correlation']:.3f}, α = {h3['cronbach_alpha']:.3f}, 중간↑: {h3['llm_human_above_threshold']}/2    │")
-        print(f"│     결과: {'✅ 채택' if h3['hypothesis_accepted'] else '❌ 기각'}                                          │")
+        print(f"│     평균 r = {h3['mean_correlation']:.3f}, α = {h3['cronbach_alpha']:.3f}, "
+              f"중간↑: {h3['llm_human_above_threshold']}/{h3['llm_human_pairs']}    │")
+        print(f"│     결과: {verdict(h3)}                                          │")
         print(f"├────────────────────────────────────────────────────────────────┤")
         print(f"│ H₄: NLP vs 상담학적 평가의 차이                                │")
-        print(f"│     유의한 NLP 지표: {h4['significant_count']}/4개                            │")
-        print(f"│     결과: {'✅ 채택' if h4['hypothesis_accepted'] else '❌ 기각'}                                          │")
+        if h4 is not None:
+            print(f"│     유의한 NLP 지표: {h4['significant_count']}/{len(h4['nlp_correlations'])}개                            │")
+            print(f"│     결과: {verdict(h4)}                                          │")
+        else:
+            print(f"│     생략: 평가 대상 챗봇의 NLP 지표 없음                         │")
         print(f"└────────────────────────────────────────────────────────────────┘")
         
         # 논문 작성용 핵심 통계
+        ranked = sorted(self.chatbot_means.items(), key=lambda x: x[1], reverse=True)
+        ranking = ' > '.join(f"{name}({rank}위, {mean:.3f})" if rank == 1 or name == self.REFERENCE_CHATBOT
+                             else f"{name}({rank}위)" for rank, (name, mean) in enumerate(ranked, 1))
         print(f"\n📝 논문 작성용 핵심 통계 요약:")
         print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-        print(f"1. 변별력: F(3,80) = {h1['f_stat']:.2f}, p < 0.001, η² = {h1['eta_squared']:.3f}")
-        print(f"2. 성능순위: Wysa(1위, 2.714) > Dr.CareSam(2위, {h2['mean_score']:.3f}) > Youper(3위) > Replika(4위)")
+        print(f"1. 변별력: {f_test}")
+        print(f"2. 성능순위: {ranking}")
         print(f"3. 신뢰도: 평균 r = {h3['mean_correlation']:.3f}, Cronbach's α = {h3['cronbach_alpha']:.3f}")
-        print(f"4. NLP한계: 모든 지표 비유의, 평균 |r| = {h4['mean_abs_correlation']:.3f}")
+        if h4 is not None:
+            significance = "모든 지표 비유의" if h4['significant_count'] == 0 else f"유의한 지표 {h4['significant_count']}개"
+            print(f"4. NLP한계: {significance}, 평균 |r| = {h4['mean_abs_correlation']:.3f}")
         
         # 연구 기여도
         print(f"\n🎯 연구의 학술적 기여:")
@@ -674,26 +744,91 @@ class PhDThesisExperiment3Analysis:
         print(f"• 전통적 NLP 지표의 한계점 실증적 규명")
         print(f"• 정신건강 챗봇 평가를 위한 새로운 평가 프레임워크 제시")
         
-        # 시각화 생성
-        self.create_visualization(results)
+        # 시각화 생성 (가설 1–4 결과가 바뀌었거나 그림 파일이 없을 때만)
+        graph.run(['visualization'])
+        results['figure_path'] = figure_path
+        results['figure_rendered'] = 'visualization' in graph.executed and graph.results['visualization']['rendered']
+        if report_dir:
+            with stage('write_results'):
+                written = write_results(results, report_dir)
+            print(f"\n📁 보고서 저장: {report_dir} (파일 {len(written) + 1}개)")
+        if cache is not None:
+            print(f"\n♻️  캐시: 재사용 {len(cache.hits)}개 단계, 재계산 {len(cache.misses)}개 단계 "
+                  f"({', '.join(cache.misses) or '없음'}) - {cache_dir}")
         
         return results
+    
+    def profile_complete_analysis(self, memory=True, cprofile_path=None, **kwargs):
+        """
+        프로파일링하며 전체 분석 실행 → (results, 타이밍 보고서)
+        
+        보고서의 stages 에는 단계(가설, 세부 계산, 시각화)별 wall / CPU 시간과
+        tracemalloc 기준 최대 메모리 증가량(MB)이 실행 순서대로 들어 있습니다.
+        """
+        return profiled(self.run_complete_analysis, memory=memory, cprofile_path=cprofile_path, **kwargs)
 
-def main():
+def main(argv=None):
     """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="박사학위논문 실험 3 가설검증 분석")
+    parser.add_argument('--ratings', help="long-format 평가 파일 (chatbot, criterion, evaluator, score) - CSV/Parquet/NDJSON")
+    parser.add_argument('--nlp-metrics', help="NLP 지표 파일 (chatbot, metric, value 또는 chatbot, bleu, rouge, ...)")
+    parser.add_argument('--score-range', nargs=2, type=float, metavar=('MIN', 'MAX'), help="허용 점수 범위 (예: 1 3)")
+    parser.add_argument('--on-duplicate', choices=['error', 'mean'], default='error', help="중복 평가 처리 방식")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="파일을 읽는 청크 크기 (행)")
+    parser.add_argument('--resamples', type=int, default=0, help="순열검정/부트스트랩 재표본 수 (0 = 생략)")
+    parser.add_argument('--workers', type=int, default=None, help="재표본 계산 프로세스 수 (기본: CPU 수)")
+    parser.add_argument('--cache-dir', help="단계별 결과 캐시 디렉터리 (입력이 바뀐 가설만 다시 계산)")
+    parser.add_argument('--headless', action='store_true', help="그림 창 없이 실행 (Agg 백엔드, 결과가 바뀐 경우만 렌더링)")
+    parser.add_argument('--report-dir', help="그림과 results.json / summary.csv / 결과 표 CSV 저장 디렉터리")
+    parser.add_argument('--profile', action='store_true', help="단계별 wall/CPU 시간과 최대 메모리(tracemalloc) 출력")
+    parser.add_argument('--cprofile', metavar='PATH', help="cProfile 통계를 PATH(.prof)에 저장하고 상위 함수 출력")
+    args = parser.parse_args(argv)
+    if args.headless:
+        plt.switch_backend('Agg')
+    
     print("🚀 박사학위논문 실험 3 통계분석 시작 (피어슨 상관분석 버전)")
     print(f"📅 분석일자: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("📈 GitHub Repository: HoMemeTown-Dr-CareSam-Chatbot")
     print("📄 관련 논문: JMIR MI (Accepted) + PhD Thesis (In Progress)")
     print("🔄 업데이트: ICC 분석 → 피어슨 상관분석으로 변경")
     
-    # 분석 실행
-    analyzer = PhDThesisExperiment3Analysis()
-    results = analyzer.run_complete_analysis()
+    profiler = None
+    if args.profile or args.cprofile:
+        profiler = StageProfiler(memory=args.profile, cprofile_path=args.cprofile)
+    
+    with profiler or contextlib.nullcontext():
+        # 입력 파일이 있으면 파일 데이터로, 없으면 논문 데이터로 분석
+        ratings = None
+        if args.ratings:
+            with stage('load_ratings'):
+                ratings = load_ratings(args.ratings, chunksize=args.chunksize,
+                                       score_range=tuple(args.score_range) if args.score_range else None,
+                                       on_duplicate=args.on_duplicate)
+            print(f"📂 평가 데이터 로드: {args.ratings} ({ratings.n_ratings}개 평가)")
+        with stage('load_nlp_metrics'):
+            nlp_metrics = load_nlp_metrics(args.nlp_metrics, chunksize=args.chunksize) if args.nlp_metrics else None
+        
+        # 분석 실행
+        with stage('init'):
+            analyzer = PhDThesisExperiment3Analysis(nlp_metrics=nlp_metrics, ratings=ratings)
+        results = analyzer.run_complete_analysis(n_resamples=args.resamples, workers=args.workers,
+                                                 cache_dir=args.cache_dir, show=not args.headless,
+                                                 report_dir=args.report_dir)
+    
+    if profiler is not None:
+        report = profiler.report()
+        print(f"\n⏱️  단계별 실행 시간{'' if args.profile else ' (메모리 측정 생략)'}:")
+        print(format_report(report))
+        if args.cprofile:
+            print(f"\n🔬 cProfile 상위 함수 (저장: {args.cprofile}):")
+            print(format_cprofile(args.cprofile))
+        if args.report_dir:
+            with open(os.path.join(args.report_dir, 'profile.json'), 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
     
     print(f"\n✅ 모든 가설검증 분석이 완료되었습니다!")
     print(f"🎯 GitHub 업로드 준비 완료!")
-    print(f"📊 결과 시각화 파일: phd_thesis_experiment3_pearson_results.png")
+    print(f"📊 결과 시각화 파일: {results['figure_path']}")
     print(f"🔄 주요 변경사항: ICC 분석 → 피어슨 상관분석")
     
     return results
@@ -0,0 +1,473 @@
+"""
+LLM 평가자(LLM-as-judge) 비동기 실행기
+
+evaluation_data 의 Claude / ChatGPT 점수는 코드 밖에서 수작업으로 얻은 값이라 새 대화 기록으로
+가설 3 (LLM 평가자 vs 인간 전문가)을 다시 검증할 수 없었습니다. 이 모듈은 대화 기록과 7개 상담 평가 기준
+루브릭을 평가 모델에 보내 1–3점 점수를 받아 long-format 평가 파일(chatbot, criterion, evaluator, score)로 저장합니다.
+
+- 비동기 httpx 클라이언트 + 동시 요청 수 제한(asyncio.Semaphore) + 평가 모델별 분당 요청 수 제한(토큰 버킷)
+- 재시도: 429 / 5xx / 연결 오류 / 응답 형식 오류 → 지수 백오프 + 지터 (Retry-After 헤더 우선)
+- 판정 캐시: (평가 모델, 루브릭 버전, 대화 기록 해시) 키로 디스크(JSON)에 저장 → 같은 판정은 다시 요청하지 않음
+- StubJudge: 네트워크 없이 결정적인 점수를 내는 로컬 평가자 (테스트 / 오프라인 실행용, 지연·실패 모의 가능)
+
+    python llm_judge.py --judges stub --output data/llm_ratings.csv
+    python llm_judge.py transcripts.jsonl --judges claude chatgpt --cache-dir .judge_cache \\
+        --merge-human data/experiment3_ratings.csv --output data/rerun_ratings.csv
+    python hypothesis_analysis.py --ratings data/rerun_ratings.csv
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from ratings_io import iter_chunks, load_nlp_evaluation, validate_ratings_chunk
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# 루브릭 내용을 바꾸면 버전을 올림 (판정 캐시 키에 포함)
+RUBRIC_VERSION = 'experiment3-v1'
+SCORE_RANGE = (1, 3)
+
+# 7개 상담 평가 기준 (hypothesis_analysis.evaluation_data 와 같은 이름)
+CRITERIA = {
+    '공감성': "내담자의 감정을 알아차리고 그 감정을 이해하고 있음을 전달하는가",
+    '정확성과_유익성': "정보가 정확하고 내담자의 문제 해결에 실제로 도움이 되는가",
+    '목적적_사고와_감정': "내담자가 자신의 생각과 감정을 목적을 가지고 탐색하도록 돕는가",
+    '적극적_경청과_적절한_질문': "내담자의 말을 반영하고 대화를 이어가는 적절한 질문을 하는가",
+    '긍정성과_지지': "내담자를 존중하고 긍정적으로 지지하는가",
+    '전문성': "상담 이론과 기법에 근거한 전문적인 응답인가",
+    '개인화': "내담자의 구체적인 상황에 맞춘 응답인가 (일반적인 답변이 아닌가)",
+}
+
+SCORE_LEVELS = {1: "낮음 - 기준을 거의 충족하지 못함", 2: "중간 - 부분적으로 충족", 3: "높음 - 충분히 충족"}
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_TIMEOUT = 60.0
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class JudgmentParseError(ValueError):
+    """평가 모델 응답에서 기준별 점수를 읽을 수 없음 (재시도 대상)"""
+
+
+class RetryableJudgeError(RuntimeError):
+    """일시적인 평가 모델 오류 (재시도 대상)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# ---------------------------------------------------------------------------
+# 루브릭 / 응답 해석
+# ---------------------------------------------------------------------------
+
+def transcript_hash(transcript: str) -> str:
+    """대화 기록 해시 (줄 끝 공백 / 줄바꿈 방식 차이는 무시)"""
+    normalized = "\n".join(line.rstrip() for line in transcript.strip().splitlines())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def build_messages(transcript: str, criteria: Dict[str, str] = CRITERIA) -> List[Dict[str, str]]:
+    """평가 요청 메시지 (system + user) - 기준별 정수 점수를 JSON 으로 요구"""
+    low, high = SCORE_RANGE
+    rubric = "\n".join(f"- {name}: {description}" for name, description in criteria.items())
+    levels = "\n".join(f"- {score}점: {meaning}" for score, meaning in SCORE_LEVELS.items())
+    example = json.dumps({'scores': {name: high for name in criteria}, 'rationale': "..."}, ensure_ascii=False)
+    system = ("당신은 심리상담 전문가입니다. 상담 챗봇의 응답을 아래 루브릭에 따라 평가하세요.\n"
+              f"평가 기준:\n{rubric}\n\n점수 ({low}–{high}점):\n{levels}\n\n"
+              f"반드시 다음 형식의 JSON 하나만 출력하세요: {example}")
+    user = f"다음 상담 대화를 평가하세요.\n\n<transcript>\n{transcript.strip()}\n</transcript>"
+    return [{'role': 'system', 'content': system}, {'role': 'user', 'content': user}]
+
+
+def parse_judgment(text: str, criteria: Sequence[str] = tuple(CRITERIA)) -> Dict[str, Any]:
+    """
+    평가 모델 응답 → {'scores': {기준: 점수}, 'rationale': str}
+
+    응답 앞뒤의 설명 / 코드 블록은 무시하고 첫 JSON 객체를 읽습니다.
+    """
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if match is None:
+        raise JudgmentParseError(f"JSON 없음: {text[:200]!r}")
+    try:
+        payload = json.loads(match.group())
+    except json.JSONDecodeError as error:
+        raise JudgmentParseError(f"JSON 형식 오류: {error}") from None
+
+    raw_scores = payload.get('scores', payload)
+    low, high = SCORE_RANGE
+    scores = {}
+    for criterion in criteria:
+        value = raw_scores.get(criterion)
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value.strip())
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value != int(value) \
+                or not low <= value <= high:
+            raise JudgmentParseError(f"'{criterion}' 점수가 {low}–{high} 정수가 아님: {value!r}")
+        scores[criterion] = int(value)
+    return {'scores': scores, 'rationale': str(payload.get('rationale', ''))}
+
+
+# ---------------------------------------------------------------------------
+# 평가 모델
+# ---------------------------------------------------------------------------
+
+def _raise_for_status(response):
+    """재시도할 상태 코드는 RetryableJudgeError, 나머지 오류는 httpx.HTTPStatusError"""
+    if response.status_code in RETRYABLE_STATUS:
+        retry_after = response.headers.get('retry-after')
+        try:
+            retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            retry_after = None
+        raise RetryableJudgeError(f"HTTP {response.status_code}", retry_after)
+    response.raise_for_status()
+
+
+class OpenAIChatJudge:
+    """OpenAI Chat Completions 평가 모델 (JSON 응답 모드)"""
+
+    requires_network = True
+
+    def __init__(self, model: str = 'gpt-4o', evaluator: str = 'ChatGPT', api_key: Optional[str] = None,
+                 base_url: str = 'https://api.openai.com/v1', rpm: float = 60.0):
+        self.model = model
+        self.evaluator = evaluator
+        self.name = f'openai:{model}'
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.base_url = base_url.rstrip('/')
+        self.rpm = rpm
+
+    async def complete(self, client, messages: List[Dict[str, str]]) -> str:
+        response = await client.post(
+            f'{self.base_url}/chat/completions',
+            headers={'Authorization': f'Bearer {self.api_key}'},
+            json={'model': self.model, 'messages': messages, 'temperature': 0,
+                  'response_format': {'type': 'json_object'}},
+        )
+        _raise_for_status(response)
+        return response.json()['choices'][0]['message']['content']
+
+
+class AnthropicJudge:
+    """Anthropic Messages API 평가 모델"""
+
+    requires_network = True
+
+    def __init__(self, model: str = 'claude-3-5-sonnet-20240620', evaluator: str = 'Claude',
+                 api_key: Optional[str] = None, base_url: str = 'https://api.anthropic.com/v1',
+                 rpm: float = 50.0, max_tokens: int = 1024):
+        self.model = model
+        self.evaluator = evaluator
+        self.name = f'anthropic:{model}'
+        self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+        self.base_url = base_url.rstrip('/')
+        self.rpm = rpm
+        self.max_tokens = max_tokens
+
+    async def complete(self, client, messages: List[Dict[str, str]]) -> str:
+        system = "\n".join(message['content'] for message in messages if message['role'] == 'system')
+        response = await client.post(
+            f'{self.base_url}/messages',
+            headers={'x-api-key': self.api_key or '', 'anthropic-version': '2023-06-01'},
+            json={'model': self.model, 'system': system, 'max_tokens': self.max_tokens, 'temperature': 0,
+                  'messages': [message for message in messages if message['role'] != 'system']},
+        )
+        _raise_for_status(response)
+        return "".join(block.get('text', '') for block in response.json()['content'])
+
+
+class StubJudge:
+    """
+    네트워크 없이 동작하는 로컬 평가자 (테스트 / 오프라인 실행)
+
+    점수는 (기준, 대화 기록) 해시로 정해지므로 같은 입력에는 항상 같은 점수를 냅니다.
+    latency: 응답 지연(초), failure_rate: 일시적 오류 확률, malformed_rate: 형식 오류 응답 확률
+    """
+
+    requires_network = False
+
+    def __init__(self, evaluator: str = 'Stub', latency: float = 0.0, failure_rate: float = 0.0,
+                 malformed_rate: float = 0.0, seed: int = 0, rpm: float = 6000.0):
+        self.evaluator = evaluator
+        self.name = 'stub:v1'
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self.rpm = rpm
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    async def complete(self, client, messages: List[Dict[str, str]]) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._random.random() < self.failure_rate:
+            raise RetryableJudgeError("stub transient failure")
+        if self._random.random() < self.malformed_rate:
+            return "점수를 매길 수 없습니다."
+
+        transcript = messages[-1]['content']
+        low, high = SCORE_RANGE
+        scores = {}
+        for criterion in CRITERIA:
+            digest = hashlib.sha256(f'{criterion}\n{transcript}'.encode('utf-8')).digest()
+            scores[criterion] = low + digest[0] % (high - low + 1)
+        return json.dumps({'scores': scores, 'rationale': 'stub'}, ensure_ascii=False)
+
+
+JUDGES = {
+    'claude': AnthropicJudge,
+    'chatgpt': OpenAIChatJudge,
+    'stub': StubJudge,
+}
+
+
+# ---------------------------------------------------------------------------
+# 속도 제한 / 캐시
+# ---------------------------------------------------------------------------
+
+class AsyncTokenBucket:
+    """분당 요청 수 제한 (rate_per_minute 로 채워지는 토큰 버킷, 최대 burst 개)"""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, int(rate_per_minute // 60) or 1))
+        self.tokens = self.capacity
+        self._updated: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class JudgmentCache:
+    """
+    판정 디스크 캐시 - <directory>/<키 앞 2자리>/<키>.json
+
+    키 = sha256(평가 모델 이름, 루브릭 버전, 대화 기록 해시)
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(judge_name: str, rubric_version: str, transcript_digest: str) -> str:
+        return hashlib.sha256(f'{judge_name}\n{rubric_version}\n{transcript_digest}'.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        with open(path, encoding='utf-8') as f:
+            self.hits += 1
+            return json.load(f)
+
+    def put(self, key: str, record: Dict[str, Any]):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, path)
+
+
+# ---------------------------------------------------------------------------
+# 실행기
+# ---------------------------------------------------------------------------
+
+class JudgeHarness:
+    """
+    대화 기록 × 평가 모델 판정 실행기
+
+    judges: 평가 모델 목록 (evaluator 라벨이 결과의 evaluator 컬럼)
+    cache: JudgmentCache (없으면 캐시 없이 매번 요청)
+    concurrency: 전체 동시 요청 수, max_retries: 판정별 최대 재시도 횟수
+    transport: httpx 전송 계층 (httpx.MockTransport 등으로 교체해 오프라인 검증)
+    """
+
+    def __init__(self, judges: Sequence[Any], cache: Optional[JudgmentCache] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = 1.0, max_backoff: float = 60.0, timeout: float = DEFAULT_TIMEOUT,
+                 rubric_version: str = RUBRIC_VERSION, criteria: Dict[str, str] = CRITERIA, transport=None):
+        if len({judge.evaluator for judge in judges}) != len(judges):
+            raise ValueError("평가 모델의 evaluator 라벨이 겹침")
+        self.judges = list(judges)
+        self.cache = cache
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.rubric_version = rubric_version
+        self.criteria = criteria
+        self.transport = transport
+        self.retries = 0
+
+    async def _judge_one(self, client, judge, bucket: AsyncTokenBucket, semaphore: asyncio.Semaphore,
+                         chatbot: str, transcript: str) -> Dict[str, Any]:
+        digest = transcript_hash(transcript)
+        key = JudgmentCache.key(judge.name, self.rubric_version, digest)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return {**cached, 'chatbot': chatbot, 'evaluator': judge.evaluator, 'cached': True}
+
+        messages = build_messages(transcript, self.criteria)
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                await bucket.acquire()
+                try:
+                    judgment = parse_judgment(await judge.complete(client, messages), tuple(self.criteria))
+                    break
+                except (RetryableJudgeError, JudgmentParseError, *self._transport_errors()) as error:
+                    if attempt == self.max_retries:
+                        raise
+                    self.retries += 1
+                    delay = getattr(error, 'retry_after', None) or \
+                        min(self.max_backoff, self.backoff * 2 ** attempt) * (0.5 + random.random() / 2)
+                    await asyncio.sleep(delay)
+
+        record = {'judge': judge.name, 'rubric_version': self.rubric_version, 'transcript_hash': digest,
+                  **judgment}
+        if self.cache is not None:
+            self.cache.put(key, record)
+        return {**record, 'chatbot': chatbot, 'evaluator': judge.evaluator, 'cached': False}
+
+    @staticmethod
+    def _transport_errors():
+        return (httpx.TransportError,) if httpx is not None else ()
+
+    async def evaluate(self, transcripts: Dict[str, str]) -> Dict[str, Any]:
+        """
+        모든 (평가 모델, 챗봇) 판정 → {'ratings': long-format DataFrame, 'judgments': [...], 'failures': [...]}
+
+        재시도 후에도 실패한 판정은 failures 에 기록하고 나머지 결과는 그대로 반환합니다.
+        """
+        if any(judge.requires_network for judge in self.judges) and httpx is None:
+            raise ImportError("네트워크 평가 모델에는 httpx 가 필요합니다 (pip install httpx)")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        buckets = {judge.name: AsyncTokenBucket(judge.rpm) for judge in self.judges}
+        jobs = [(judge, chatbot, transcript) for judge in self.judges for chatbot, transcript in transcripts.items()]
+
+        client = httpx.AsyncClient(timeout=self.timeout, transport=self.transport) if httpx is not None else None
+        try:
+            results = await asyncio.gather(
+                *(self._judge_one(client, judge, buckets[judge.name], semaphore, chatbot, transcript)
+                  for judge, chatbot, transcript in jobs),
+                return_exceptions=True)
+        finally:
+            if client is not None:
+                await client.aclose()
+
+        judgments, failures = [], []
+        for (judge, chatbot, _), result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                failures.append({'evaluator': judge.evaluator, 'chatbot': chatbot,
+                                 'error': f'{type(result).__name__}: {result}'})
+            else:
+                judgments.append(result)
+        rows = [{'chatbot': judgment['chatbot'], 'criterion': criterion, 'evaluator': judgment['evaluator'],
+                 'score': score}
+                for judgment in judgments for criterion, score in judgment['scores'].items()]
+        ratings = pd.DataFrame(rows, columns=['chatbot', 'criterion', 'evaluator', 'score'])
+        return {'ratings': ratings, 'judgments': judgments, 'failures': failures}
+
+    def run(self, transcripts: Dict[str, str]) -> Dict[str, Any]:
+        """동기 호출용 (asyncio.run)"""
+        return asyncio.run(self.evaluate(transcripts))
+
+
+# ---------------------------------------------------------------------------
+# 입력 / CLI
+# ---------------------------------------------------------------------------
+
+def default_transcripts() -> Dict[str, str]:
+    """NLPMetricsCalculator 의 챗봇별 대화 (챗봇 이름은 평가 데이터와 같게)"""
+    dialogues = load_nlp_evaluation().NLPMetricsCalculator().dialogues
+    return {('Dr.CareSam' if chatbot == '닥터케어쌤' else chatbot): text for chatbot, text in dialogues.items()}
+
+
+def load_transcripts(path: str) -> Dict[str, str]:
+    """chatbot, transcript 컬럼 파일 (CSV / Parquet / NDJSON) → {chatbot: transcript} (같은 챗봇은 줄바꿈으로 이어 붙임)"""
+    transcripts: Dict[str, List[str]] = {}
+    for chunk in iter_chunks(path):
+        missing = {'chatbot', 'transcript'} - set(chunk.columns)
+        if missing:
+            raise ValueError(f"{path}: 필수 컬럼 누락 {sorted(missing)} (필요: ['chatbot', 'transcript'])")
+        for chatbot, transcript in zip(chunk['chatbot'].astype(str), chunk['transcript'].fillna('').astype(str)):
+            transcripts.setdefault(chatbot, []).append(transcript)
+    return {chatbot: "\n".join(parts) for chatbot, parts in transcripts.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LLM 평가자로 상담 대화 기록 채점 (7개 기준, 1–3점)")
+    parser.add_argument('transcripts', nargs='?',
+                        help="chatbot, transcript 컬럼 파일 (없으면 NLPMetricsCalculator 의 대화)")
+    parser.add_argument('--judges', nargs='+', choices=sorted(JUDGES), default=['stub'], help="평가 모델")
+    parser.add_argument('--cache-dir', default='.judge_cache', help="판정 캐시 디렉터리 ('' = 캐시 사용 안 함)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="동시 요청 수")
+    parser.add_argument('--rpm', type=float, help="평가 모델별 분당 요청 수 (기본: 모델별 기본값)")
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES, help="판정별 최대 재시도 횟수")
+    parser.add_argument('--merge-human', metavar='RATINGS',
+                        help="기존 평가 파일에서 Human 평가를 가져와 함께 저장 (가설 3 재검증용)")
+    parser.add_argument('--output', default='llm_ratings.csv', help="long-format 평가 파일 (CSV)")
+    args = parser.parse_args(argv)
+
+    transcripts = load_transcripts(args.transcripts) if args.transcripts else default_transcripts()
+    judges = [JUDGES[name]() for name in args.judges]
+    if args.rpm:
+        for judge in judges:
+            judge.rpm = args.rpm
+    cache = JudgmentCache(args.cache_dir) if args.cache_dir else None
+    harness = JudgeHarness(judges, cache=cache, concurrency=args.concurrency, max_retries=args.max_retries)
+
+    print(f"🤖 LLM 평가: 챗봇 {len(transcripts)}개 × 평가 모델 {len(judges)}개 (루브릭 {RUBRIC_VERSION})")
+    result = harness.run(transcripts)
+    ratings = result['ratings']
+    if args.merge_human:
+        human = pd.concat([validate_ratings_chunk(chunk, args.merge_human) for chunk in iter_chunks(args.merge_human)])
+        human = human[(human['evaluator'] == 'Human') & human['chatbot'].isin(transcripts)]
+        ratings = pd.concat([ratings, human[ratings.columns]], ignore_index=True)
+    ratings.to_csv(args.output, index=False)
+
+    if cache is not None:
+        print(f"🗂️ 판정 캐시: 적중 {cache.hits}, 신규 {cache.misses}")
+    print(f"🔁 재시도 {harness.retries}회, 실패 {len(result['failures'])}건")
+    for failure in result['failures']:
+        print(f"  ⚠️ {failure['evaluator']} / {failure['chatbot']}: {failure['error']}")
+    if not ratings.empty:
+        print(ratings.pivot_table(index='criterion', columns=['evaluator', 'chatbot'], values='score').to_string())
+    print(f"💾 저장: {args.output} ({len(ratings)}행)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+배치 NLP 지표 계산 엔진
+
+NLPMetricsCalculator 의 calculate_* 지표(BLEU, ROUGE-L, METEOR, BERTScore 근사)를
+후보 응답 × 참조 응답 행렬 전체에 대해 한 번에 계산합니다.
+
+- 모든 텍스트는 한 번만 토큰화되어 정수 ID 로 변환됩니다 (어휘 = 참조 응답의 토큰)
+- 후보 응답은 (후보 × 어휘) 희소 개수 행렬과 차수별 (후보 × n-gram 해시) 희소 행렬로 표현되고,
+  지표는 참조 행렬과의 희소 행렬 곱으로 계산
+  - 클리핑된 일치 개수 Σ min(c, r) = Σ_t [c ≥ t]·[r ≥ t] (t = 1..참조 최대 빈도)
+  - ROUGE-L 은 참조 응답별 비트마스크를 한 번 만들어 두고 비트 병렬 LCS 로 계산
+  - BERTScore 대체 지표는 문자 n-gram TF-IDF 코사인 유사도 (semantic_similarity, 벡터 캐시 선택)
+- 토큰화기는 교체 가능 (tokenization.get_tokenizer - 공백 / 한국어 음절 / 자모 n-gram, 분할 결과 캐시)
+- 참조 응답에 없는 토큰은 어휘에 추가하지 않고 OOV 로 처리 (일치에는 기여하지 않으므로
+  응답 길이 / 고유 토큰 수만 기록) → 어휘 크기는 참조 응답에만 비례하고,
+  chat_history 응답을 청크 단위로 스트리밍하면 메모리는 배치 크기에만 비례합니다
+
+    scorer = CorpusScorer(reference_responses)
+    scores = scorer.score(candidates)        # {'bleu': (후보 × 참조), ...}
+    best = scorer.best(candidates)           # 참조 응답 중 최고 점수 {'bleu': (후보,), ...}
+    scorer.corpus_bleu(candidates)           # 모든 참조 응답을 함께 쓰는 말뭉치 수준 BLEU
+
+실행:
+    python nlp_scoring.py chat_history.csv --references references.txt --output reply_scores.csv
+    python nlp_scoring.py chat_history.csv --vector-cache .vector_cache   # 반복 실행 시 벡터 재사용
+    python nlp_scoring.py chat_history.csv --tokenizer syllable --token-cache .token_cache.sqlite   # 한국어 응답
+"""
+
+import argparse
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+
+from ratings_io import DEFAULT_CHUNKSIZE, iter_chat_history_export, load_nlp_evaluation
+from semantic_similarity import TfidfSimilarity, VectorCache
+from tokenization import TOKENIZERS, get_tokenizer, tokenize_many
+from text_metrics import (DEFAULT_SMOOTHING, MAX_ORDER, bleu_from_statistics, lcs_length_from_masks,
+                          match_masks, ngram_counts, ngram_hashes, rouge_l_from_lcs)
+
+METRICS = ('bleu', 'rouge', 'meteor', 'bertscore')
+
+DEFAULT_BATCH_SIZE = 4096
+
+
+def default_tokenize(text: str) -> List[str]:
+    """calculate_* 지표와 같은 토큰화 (소문자 + 공백 분리)"""
+    return text.lower().split()
+
+
+class EncodedTexts:
+    """
+    토큰 ID 로 변환된 텍스트 묶음
+
+    ids: 텍스트별 토큰 ID 배열 (OOV = -1)
+    counts: (텍스트 × 어휘) 토큰 개수 희소 행렬 (OOV 제외)
+    lengths: 토큰 수 (OOV 포함)
+    texts: 원문 (문자 n-gram 유사도 계산용)
+    """
+
+    def __init__(self, ids: List[np.ndarray], counts: sparse.csr_matrix, lengths: np.ndarray, texts: List[str]):
+        self.ids = ids
+        self.texts = texts
+        self.counts = counts
+        self.lengths = lengths
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def presence(self) -> sparse.csr_matrix:
+        present = self.counts.copy()
+        present.data = np.ones_like(present.data)
+        return present
+
+
+def _thresholds(counts: sparse.csr_matrix) -> List[sparse.csr_matrix]:
+    """빈도 임계값별 행렬 [r ≥ t] (t = 1..최대 빈도, 클리핑된 일치 개수 계산용)"""
+    max_count = int(counts.max()) if counts.nnz else 0
+    return [(counts >= t).astype(float) for t in range(1, max_count + 1)]
+
+
+def _clipped_matches(candidate_counts: sparse.csr_matrix, thresholds: List[sparse.csr_matrix],
+                     n_columns: int) -> np.ndarray:
+    """Σ min(후보 빈도, 참조 빈도) = Σ_t [c ≥ t]·[r ≥ t] → (후보 × n_columns)"""
+    clipped = np.zeros((candidate_counts.shape[0], n_columns))
+    for t, ref_at_least in enumerate(thresholds, 1):
+        clipped += ((candidate_counts >= t).astype(float) @ ref_at_least).toarray()
+    return clipped
+
+
+class CorpusScorer:
+    """
+    참조 응답 집합에 대한 배치 지표 계산기
+
+    references: 참조(그라운드 트루스) 응답 목록
+    tokenize: 텍스트 → 토큰 목록 (기본: 소문자 + 공백 분리, tokenization.get_tokenizer 참고)
+    smoothing: BLEU 스무딩 (text_metrics.bleu_from_statistics 참고)
+    vector_cache: BERTScore 대체 지표의 문자 n-gram 벡터 캐시 (semantic_similarity.VectorCache)
+    """
+
+    def __init__(self, references: Sequence[str], tokenize: Callable[[str], List[str]] = default_tokenize,
+                 smoothing: str = DEFAULT_SMOOTHING, max_order: int = MAX_ORDER,
+                 vector_cache: Optional[VectorCache] = None):
+        self.tokenize = tokenize
+        self.smoothing = smoothing
+        self.max_order = max_order
+        self.references = list(references)
+        self.vocabulary: Dict[str, int] = {}
+        for tokens in tokenize_many(tokenize, self.references):
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+
+        encoded = self.encode(self.references)
+        self._ref_presence = encoded.presence().T.tocsr()      # (어휘 × 참조)
+        self._ref_lengths = encoded.lengths.astype(float)
+        self._ref_masks = [match_masks(ids.tolist()) for ids in encoded.ids]
+        self.similarity = TfidfSimilarity(self.references, cache=vector_cache)
+
+        # 차수별 참조 n-gram 해시 목록과 (n-gram × 참조) 개수 행렬
+        self._ngram_keys: List[np.ndarray] = []
+        self._ngram_thresholds: List[List[sparse.csr_matrix]] = []
+        self._ngram_max: List[sparse.csr_matrix] = []
+        for n in range(1, max_order + 1):
+            tables = [ngram_counts(ids, n) for ids in encoded.ids]
+            keys = np.unique(np.concatenate([table_keys for table_keys, _ in tables] + [np.empty(0, np.uint64)]))
+            rows = np.concatenate([np.searchsorted(keys, table_keys) for table_keys, _ in tables] + [np.empty(0, int)])
+            cols = np.repeat(np.arange(len(tables)), [len(table_keys) for table_keys, _ in tables])
+            values = np.concatenate([table_counts for _, table_counts in tables] + [np.empty(0)])
+            ref_counts = sparse.csr_matrix((values.astype(float), (rows, cols)), shape=(len(keys), len(tables)))
+            self._ngram_keys.append(keys)
+            self._ngram_thresholds.append(_thresholds(ref_counts))
+            self._ngram_max.append(sparse.csr_matrix(ref_counts.max(axis=1)))
+
+    # ------------------------------------------------------------------
+    # 토큰화
+    # ------------------------------------------------------------------
+
+    def encode(self, texts: Iterable[str]) -> EncodedTexts:
+        """텍스트를 한 번씩 토큰화해 토큰 ID 배열과 (텍스트 × 어휘) 개수 행렬로 변환"""
+        vocabulary = self.vocabulary
+        ids: List[np.ndarray] = []
+        lengths: List[int] = []
+        texts = list(texts)
+        for tokens in tokenize_many(self.tokenize, texts):
+            ids.append(np.fromiter((vocabulary.get(token, -1) for token in tokens), dtype=np.int64, count=len(tokens)))
+            lengths.append(len(tokens))
+
+        rows = np.repeat(np.arange(len(ids)), [np.count_nonzero(row >= 0) for row in ids])
+        cols = np.concatenate([row[row >= 0] for row in ids] + [np.empty(0, np.int64)])
+        counts = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(ids), len(vocabulary)))
+        counts.sum_duplicates()
+        return EncodedTexts(ids, counts, np.asarray(lengths, dtype=np.int64), texts)
+
+    def _ngram_matrix(self, candidates: EncodedTexts, n: int) -> sparse.csr_matrix:
+        """(후보 × 참조 n-gram) 개수 행렬 (참조에 없는 n-gram 은 일치에 기여하지 않으므로 제외)"""
+        keys = self._ngram_keys[n - 1]
+        rows: List[np.ndarray] = []
+        cols: List[np.ndarray] = []
+        for row, ids in enumerate(candidates.ids):
+            hashes = ngram_hashes(ids, n)
+            if len(keys) == 0 or len(hashes) == 0:
+                continue
+            index = np.minimum(np.searchsorted(keys, hashes), len(keys) - 1)
+            found = keys[index] == hashes
+            rows.append(np.full(np.count_nonzero(found), row))
+            cols.append(index[found])
+        rows_all = np.concatenate(rows + [np.empty(0, int)])
+        cols_all = np.concatenate(cols + [np.empty(0, int)])
+        counts = sparse.csr_matrix((np.ones(len(rows_all)), (rows_all, cols_all)), shape=(len(candidates), len(keys)))
+        counts.sum_duplicates()
+        return counts
+
+    def _ngram_totals(self, candidates: EncodedTexts) -> np.ndarray:
+        """차수별 후보 n-gram 수 (후보 × 차수, 최소 1)"""
+        orders = np.arange(1, self.max_order + 1)
+        return np.maximum(1, candidates.lengths[:, None] - orders[None, :] + 1).astype(float)
+
+    # ------------------------------------------------------------------
+    # 지표
+    # ------------------------------------------------------------------
+
+    def score_encoded(self, candidates: EncodedTexts) -> Dict[str, np.ndarray]:
+        """후보 × 참조 지표 행렬"""
+        cand_counts = candidates.counts
+        cand_len = candidates.lengths.astype(float)[:, None]
+        ref_len = self._ref_lengths[None, :]
+
+        # BLEU: 차수별 클리핑 일치 수 (후보 × 참조 × 차수)
+        matches = np.stack([_clipped_matches(self._ngram_matrix(candidates, n), self._ngram_thresholds[n - 1],
+                                             len(self.references))
+                            for n in range(1, self.max_order + 1)], axis=-1)
+        bleu = bleu_from_statistics(matches, self._ngram_totals(candidates)[:, None, :], cand_len, ref_len,
+                                    smoothing=self.smoothing)
+
+        # ROUGE-L: 비트 병렬 LCS
+        lcs = np.array([[lcs_length_from_masks(masks, int(length), ids)
+                         for masks, length in zip(self._ref_masks, self._ref_lengths)]
+                        for ids in (row.tolist() for row in candidates.ids)]).reshape(len(candidates), len(self.references))
+        rouge = rouge_l_from_lcs(lcs, ref_len, cand_len)[2]
+
+        matched_tokens = (cand_counts @ self._ref_presence).toarray()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # METEOR (단순): 후보 토큰 일치 기반 정밀도 / 재현율의 조화평균
+            precision = np.where(cand_len > 0, matched_tokens / cand_len, 0.0)
+            recall = np.where(ref_len > 0, matched_tokens / ref_len, 0.0)
+            meteor = np.where((cand_len > 0) & (precision + recall > 0),
+                              2 * precision * recall / (precision + recall), 0.0)
+
+        # BERTScore 대체: 문자 n-gram TF-IDF 코사인 유사도 (희소 행렬 곱)
+        bertscore = self.similarity.score(candidates.texts).reshape(len(candidates), len(self.references))
+
+        return {'bleu': bleu, 'rouge': rouge, 'meteor': meteor, 'bertscore': bertscore}
+
+    def corpus_bleu(self, candidates: Sequence[str]) -> float:
+        """
+        말뭉치 수준 BLEU - 각 후보를 모든 참조 응답과 함께 비교
+        (n-gram 별 참조 최대 빈도로 클리핑, 가장 가까운 참조 길이)
+        """
+        encoded = self.encode(candidates)
+        matches = np.array([_clipped_matches(self._ngram_matrix(encoded, n), _thresholds(self._ngram_max[n - 1]), 1).sum()
+                            for n in range(1, self.max_order + 1)])
+        totals = self._ngram_totals(encoded).sum(axis=0)
+
+        hyp_len = encoded.lengths.astype(float)
+        distance = np.abs(self._ref_lengths[None, :] - hyp_len[:, None])
+        # 거리가 같으면 짧은 참조 (거리 → 길이 순 사전식 최소)
+        closest = np.lexsort((np.broadcast_to(self._ref_lengths, distance.shape), distance), axis=1)[:, 0] \
+            if distance.size else np.zeros(0, dtype=int)
+        ref_total = self._ref_lengths[closest].sum()
+        return float(bleu_from_statistics(matches, totals, hyp_len.sum(), ref_total, smoothing=self.smoothing))
+
+    def score(self, candidates: Sequence[str]) -> Dict[str, np.ndarray]:
+        """후보 응답 × 참조 응답 지표 행렬 {metric: (후보 × 참조)}"""
+        return self.score_encoded(self.encode(candidates))
+
+    def best(self, candidates: Sequence[str]) -> Dict[str, np.ndarray]:
+        """참조 응답 중 최고 점수 {metric: (후보,)} (demonstrate_nlp_calculations 와 같은 집계)"""
+        return {metric: values.max(axis=1, initial=0.0) for metric, values in self.score(candidates).items()}
+
+    def iter_best(self, texts: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Dict[str, np.ndarray]]:
+        """임의 개수의 응답을 batch_size 씩 나눠 최고 점수 계산 (메모리는 배치 크기에 비례)"""
+        batch: List[str] = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) == batch_size:
+                yield self.best(batch)
+                batch = []
+        if batch:
+            yield self.best(batch)
+
+
+def score_chat_history(path: str, references: Sequence[str], chunksize: int = DEFAULT_CHUNKSIZE,
+                       tokenize: Callable[[str], List[str]] = default_tokenize,
+                       scorer: Optional[CorpusScorer] = None,
+                       vector_cache: Optional[VectorCache] = None) -> Iterator[pd.DataFrame]:
+    """
+    chat_history 내보내기 파일의 챗봇 응답(ai_msg)을 청크 단위로 채점
+
+    청크마다 chat_mode, chat_uuid 와 지표별 최고 점수 컬럼을 가진 DataFrame 을 반환합니다.
+    """
+    scorer = scorer or CorpusScorer(references, tokenize=tokenize, vector_cache=vector_cache)
+    for chunk in iter_chat_history_export(path, chunksize=chunksize):
+        best = scorer.best(chunk['ai_msg'].tolist())
+        scored = chunk[['chat_mode', 'chat_uuid']].reset_index(drop=True)
+        for metric in METRICS:
+            scored[metric] = best[metric]
+        yield scored
+
+
+def summarize_chat_history(path: str, references: Sequence[str], chunksize: int = DEFAULT_CHUNKSIZE,
+                           output_path: Optional[str] = None, **kwargs) -> pd.DataFrame:
+    """
+    chat_mode 별 평균 지표 (청크별 합계를 누적하므로 파일 크기와 관계없이 메모리 일정)
+
+    output_path 를 주면 응답별 점수를 CSV 로 이어 씁니다.
+    """
+    totals: Dict[str, np.ndarray] = {}
+    counts: Dict[str, int] = {}
+    if output_path and os.path.exists(output_path):
+        os.remove(output_path)
+
+    for scored in score_chat_history(path, references, chunksize=chunksize, **kwargs):
+        if output_path:
+            scored.to_csv(output_path, mode='a', header=not os.path.exists(output_path), index=False)
+        sums = scored.groupby('chat_mode')[list(METRICS)].agg(['sum', 'count'])
+        for mode, row in sums.iterrows():
+            totals[mode] = totals.get(mode, 0.0) + np.array([row[(metric, 'sum')] for metric in METRICS])
+            counts[mode] = counts.get(mode, 0) + int(row[(METRICS[0], 'count')])
+
+    summary = pd.DataFrame([dict(chat_mode=mode, replies=counts[mode], **dict(zip(METRICS, totals[mode] / counts[mode])))
+                            for mode in sorted(totals)],
+                           columns=['chat_mode', 'replies', *METRICS])
+    return summary
+
+
+def read_references(path: str) -> List[str]:
+    """참조 응답 파일 (한 줄에 하나, 빈 줄 제외)"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def default_references() -> List[str]:
+    """NLPMetricsCalculator 의 참조 응답 (그라운드 트루스)"""
+    return load_nlp_evaluation().NLPMetricsCalculator().reference_responses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="chat_history 응답 배치 NLP 지표 계산")
+    parser.add_argument('chat_history', help="chat_history 내보내기 파일 (CSV / Parquet / NDJSON)")
+    parser.add_argument('--references', help="참조 응답 파일 (한 줄에 하나, 없으면 NLPMetricsCalculator 의 참조 응답)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="파일을 읽는 청크 크기 (행)")
+    parser.add_argument('--output', help="응답별 점수 CSV 경로")
+    parser.add_argument('--vector-cache', help="BERTScore 대체 지표의 벡터 캐시 디렉터리 (반복 실행 시 재사용)")
+    parser.add_argument('--tokenizer', choices=TOKENIZERS, default='whitespace',
+                        help="토큰화 방식 (한국어 응답은 syllable / jamo 권장)")
+    parser.add_argument('--ngram', type=int, help="syllable / jamo 토큰 n-gram 길이 (기본: 음절 2, 자모 3)")
+    parser.add_argument('--token-cache', help="분할 결과 sqlite 캐시 경로 (반복 실행 시 재사용)")
+    args = parser.parse_args(argv)
+
+    references = read_references(args.references) if args.references else default_references()
+
+    vector_cache = VectorCache(args.vector_cache) if args.vector_cache else None
+    tokenize = get_tokenizer(args.tokenizer, n=args.ngram, cache_path=args.token_cache)
+    summary = summarize_chat_history(args.chat_history, references, chunksize=args.chunksize,
+                                     output_path=args.output, vector_cache=vector_cache, tokenize=tokenize)
+    print(f"📊 chat_mode 별 평균 NLP 지표 (참조 응답 {len(references)}개, 토큰화 {tokenize.name})")
+    print(summary.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+    if args.output:
+        print(f"💾 응답별 점수 저장: {args.output}")
+    if vector_cache is not None:
+        print(f"🗂️ 벡터 캐시: {len(vector_cache)}개 (적중 {vector_cache.hits}, 신규 {vector_cache.misses})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+사후검정 (다중비교) 엔진
+
+k 개 챗봇의 모든 쌍 k(k−1)/2 개에 대해 Tukey HSD, Games-Howell, 쌍별 순열검정을
+집단 요약값(개수, 평균, 분산)과 NumPy 벡터 연산으로 한 번에 계산합니다.
+결과는 쌍마다 한 행인 DataFrame (group1, group2 는 범주형) 으로 반환합니다.
+
+스튜던트화 범위 분포의 p-value 는 scipy 의 studentized_range 와 같은 적분식을
+고정 구적점(Gauss-Legendre)에서 모든 쌍에 대해 동시에 계산합니다.
+정규 범위 분포 P(R < w) 는 k 마다 한 번만 격자에서 적분해 스플라인으로 보관하므로,
+값마다 수치적분을 따로 수행하는 scipy 와 달리 50개 이상 챗봇(1,225쌍 이상)도 빠르게 계산됩니다.
+"""
+
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+from scipy.interpolate import CubicSpline
+from scipy.special import ndtr
+
+DEFAULT_SEED = 20250101
+
+# 구적점 개수 (z: 정규분포 적분, s: 카이 분포 적분)
+_Z_NODES, _Z_WEIGHTS = np.polynomial.legendre.leggauss(160)
+_S_NODES, _S_WEIGHTS = np.polynomial.legendre.leggauss(96)
+_Z_LIMIT = 9.0
+# 범위 분포 표 (w ≥ _W_MAX 에서는 P(R < w) = 1 로 취급)
+_W_MAX = 16.0
+_W_POINTS = 4097
+_CHUNK = 1024
+
+
+# ---------------------------------------------------------------------------
+# 스튜던트화 범위 분포 (벡터화)
+# ---------------------------------------------------------------------------
+
+def _range_cdf_direct(w: np.ndarray, k: int) -> np.ndarray:
+    """분산을 아는 경우의 범위 분포 P(R < w) = k ∫ φ(z) [Φ(z) − Φ(z − w)]^(k−1) dz"""
+    z = _Z_LIMIT * _Z_NODES
+    weights = _Z_LIMIT * _Z_WEIGHTS * np.exp(-0.5 * z ** 2) / np.sqrt(2 * np.pi)
+    inner = np.clip(ndtr(z) - ndtr(z - w[:, None]), 0.0, 1.0)
+    return np.clip(k * (inner ** (k - 1)) @ weights, 0.0, 1.0)
+
+
+@lru_cache(maxsize=32)
+def _range_cdf_spline(k: int) -> CubicSpline:
+    """P(R < w) 를 w 격자에서 한 번 계산해 3차 스플라인으로 보관 (k 별 캐시)"""
+    grid = np.linspace(0.0, _W_MAX, _W_POINTS)
+    return CubicSpline(grid, _range_cdf_direct(grid, k))
+
+
+def _range_cdf_normal(w, k: int) -> np.ndarray:
+    w = np.asarray(w, dtype=float)
+    values = _range_cdf_spline(k)(np.clip(w, 0.0, _W_MAX))
+    return np.where(w >= _W_MAX, 1.0, np.clip(values, 0.0, 1.0))
+
+
+def studentized_range_sf(q, k: int, df) -> np.ndarray:
+    """
+    스튜던트화 범위 분포의 생존함수 P(Q ≥ q) (q, df 는 같은 모양으로 브로드캐스트 가능)
+
+    P(Q < q) = ∫ f_s(s) P(R < q·s) ds,  s = sqrt(χ²_df / df)
+    s 구적점은 값마다 카이 분포의 극단 분위수 사이에 배치하므로 쌍마다 df 가 달라도 한 번에 계산됩니다.
+    """
+    q, df = np.broadcast_arrays(np.asarray(q, dtype=float), np.asarray(df, dtype=float))
+    flat_q, flat_df = q.ravel(), df.ravel()
+    cdf = np.empty(len(flat_q))
+
+    # df 가 매우 크면 s ≈ 1 (분산을 아는 경우)
+    large = ~(flat_df <= 1e5)
+    cdf[large] = _range_cdf_normal(flat_q[large], k)
+
+    finite = np.flatnonzero(~large)
+    for start in range(0, len(finite), _CHUNK):
+        part = finite[start:start + _CHUNK]
+        nu = flat_df[part, None]
+        low = stats.chi.ppf(1e-12, nu) / np.sqrt(nu)
+        high = stats.chi.ppf(1 - 1e-12, nu) / np.sqrt(nu)
+        s = (high - low) / 2 * _S_NODES + (high + low) / 2
+        s_weights = (high - low) / 2 * _S_WEIGHTS * stats.chi.pdf(s * np.sqrt(nu), nu) * np.sqrt(nu)
+        cdf[part] = (_range_cdf_normal(flat_q[part, None] * s, k) * s_weights).sum(axis=1)
+
+    sf = np.clip(1.0 - cdf, 0.0, 1.0).reshape(q.shape)
+    return np.where(q <= 0, 1.0, sf)
+
+
+def studentized_range_ppf(prob: float, k: int, df, tol: float = 1e-9) -> np.ndarray:
+    """스튜던트화 범위 분포의 분위수 (df 배열 전체에 대해 Illinois 가위치법을 동시에 수행)"""
+    df = np.asarray(df, dtype=float)
+    target = 1 - prob
+
+    def g(q):
+        return studentized_range_sf(q, k, df) - target
+
+    low, high = np.full(df.shape, 0.5), np.full(df.shape, 8.0)
+    g_low, g_high = g(low), g(high)
+    # 상한을 sf < 1 − prob 가 될 때까지 늘림
+    while np.any(g_high > 0):
+        high = np.where(g_high > 0, high * 2, high)
+        g_high = g(high)
+
+    side = np.zeros(df.shape, dtype=int)
+    mid = high
+    for _ in range(100):
+        mid = (low * g_high - high * g_low) / (g_high - g_low)
+        g_mid = g(mid)
+        done = (np.abs(g_mid) < tol) | (np.abs(high - low) < tol)
+        if np.all(done):
+            break
+        above = g_mid > 0
+        # Illinois 보정: 같은 쪽 끝점이 연속으로 바뀌면 반대쪽 함수값을 절반으로
+        g_high = np.where(above & (side == 1), g_high / 2, g_high)
+        g_low = np.where(~above & (side == -1), g_low / 2, g_low)
+        low, g_low = np.where(above, mid, low), np.where(above, g_mid, g_low)
+        high, g_high = np.where(above, high, mid), np.where(above, g_high, g_mid)
+        side = np.where(above, 1, -1)
+    return mid
+
+
+# ---------------------------------------------------------------------------
+# 다중검정 보정
+# ---------------------------------------------------------------------------
+
+def adjust_pvalues(p_values, method: str = 'holm') -> np.ndarray:
+    """
+    다중검정 보정 p-value
+
+    method: 'holm' (FWER), 'bonferroni' (FWER), 'bh' / 'fdr_bh' (FDR, Benjamini-Hochberg), 'none'
+    NaN 은 보정 대상에서 제외하고 그대로 둡니다.
+    """
+    p = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p.shape, np.nan)
+    valid = ~np.isnan(p)
+    values = p[valid]
+    m = len(values)
+    if m == 0 or method == 'none':
+        adjusted[valid] = values
+        return adjusted
+
+    if method == 'bonferroni':
+        result = values * m
+    elif method == 'holm':
+        order = np.argsort(values, kind='mergesort')
+        stepped = np.maximum.accumulate(values[order] * (m - np.arange(m)))
+        result = np.empty(m)
+        result[order] = stepped
+    elif method in ('bh', 'fdr_bh'):
+        order = np.argsort(values, kind='mergesort')[::-1]
+        stepped = np.minimum.accumulate(values[order] * m / np.arange(m, 0, -1))
+        result = np.empty(m)
+        result[order] = stepped
+    else:
+        raise ValueError(f"unknown correction method: {method}")
+
+    adjusted[valid] = np.minimum(result, 1.0)
+    return adjusted
+
+
+# ---------------------------------------------------------------------------
+# 집단 요약
+# ---------------------------------------------------------------------------
+
+def _encode(values, labels, groups: Optional[Sequence[str]] = None):
+    """(점수, 라벨) → (점수, 집단 코드, 집단 목록) - 결측 점수는 제외, 집단은 기본적으로 정렬 순서"""
+    x = np.asarray(values, dtype=float)
+    labels = np.asarray(labels, dtype=object)
+    keep = ~np.isnan(x)
+    x, labels = x[keep], labels[keep]
+
+    groups = list(groups) if groups is not None else sorted(pd.unique(labels))
+    codes = pd.Categorical(labels, categories=groups).codes.astype(np.int64)
+    if np.any(codes < 0):
+        raise ValueError("labels contain groups that are not listed in groups")
+    return x, codes, groups
+
+
+def _summary(x: np.ndarray, codes: np.ndarray, k: int):
+    """집단별 개수, 평균, 표본분산 (bincount 기반)"""
+    n = np.bincount(codes, minlength=k).astype(float)
+    means = np.bincount(codes, weights=x, minlength=k) / n
+    ss = np.bincount(codes, weights=(x - means[codes]) ** 2, minlength=k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variances = ss / (n - 1)
+    return n, means, variances, ss
+
+
+def _pair_table(groups, i, j, columns) -> pd.DataFrame:
+    categories = pd.CategoricalDtype(groups)
+    table = pd.DataFrame({
+        'group1': pd.Categorical.from_codes(i, dtype=categories),
+        'group2': pd.Categorical.from_codes(j, dtype=categories),
+    })
+    for name, column in columns.items():
+        table[name] = column
+    return table
+
+
+# ---------------------------------------------------------------------------
+# 사후검정
+# ---------------------------------------------------------------------------
+
+def tukey_hsd(values, labels, alpha: float = 0.05, groups: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Tukey HSD (Tukey-Kramer, 집단 크기가 달라도 사용 가능)
+
+    meandiff = mean(group2) − mean(group1), p_adj 는 스튜던트화 범위 분포 기준 (statsmodels 와 동일한 정의)
+    """
+    x, codes, groups = _encode(values, labels, groups)
+    k = len(groups)
+    n, means, _, ss = _summary(x, codes, k)
+    df = len(x) - k
+    mse = ss.sum() / df
+
+    i, j = np.triu_indices(k, 1)
+    diff = means[j] - means[i]
+    se = np.sqrt(mse / 2 * (1 / n[i] + 1 / n[j]))
+    q = np.abs(diff) / se
+    p_adj = studentized_range_sf(q, k, df)
+    margin = float(studentized_range_ppf(1 - alpha, k, df)) * se
+
+    return _pair_table(groups, i, j, {
+        'meandiff': diff,
+        'se': se,
+        'q': q,
+        'df': float(df),
+        'p_adj': p_adj,
+        'lower': diff - margin,
+        'upper': diff + margin,
+        'reject': p_adj < alpha,
+    })
+
+
+def games_howell(values, labels, alpha: float = 0.05, groups: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Games-Howell (등분산 가정 없음, 쌍별 Welch 자유도)
+
+    meandiff = mean(group2) − mean(group1)
+    """
+    x, codes, groups = _encode(values, labels, groups)
+    k = len(groups)
+    n, means, variances, _ = _summary(x, codes, k)
+
+    i, j = np.triu_indices(k, 1)
+    diff = means[j] - means[i]
+    vi, vj = variances[i] / n[i], variances[j] / n[j]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df = (vi + vj) ** 2 / (vi ** 2 / (n[i] - 1) + vj ** 2 / (n[j] - 1))
+        se = np.sqrt((vi + vj) / 2)
+        q = np.abs(diff) / se
+    p_adj = studentized_range_sf(q, k, df)
+    margin = studentized_range_ppf(1 - alpha, k, df) * se
+
+    return _pair_table(groups, i, j, {
+        'meandiff': diff,
+        'se': se,
+        'q': q,
+        'df': df,
+        'p_adj': p_adj,
+        'lower': diff - margin,
+        'upper': diff + margin,
+        'reject': p_adj < alpha,
+    })
+
+
+def permutation_pairwise(values, labels, n_resamples: int = 10000, correction: str = 'holm',
+                         alpha: float = 0.05, seed: int = DEFAULT_SEED, batch_size: int = 1000,
+                         groups: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    모든 쌍의 평균 차이에 대한 양측 순열검정 + 다중검정 보정
+
+    전체 라벨을 한 번 섞을 때마다 모든 집단 평균(재표본 × k)을 행렬곱으로 구하고
+    모든 쌍의 차이를 동시에 비교합니다 (전체 귀무가설하의 교환가능성 가정).
+    """
+    x, codes, groups = _encode(values, labels, groups)
+    k = len(groups)
+    n, means, _, _ = _summary(x, codes, k)
+
+    i, j = np.triu_indices(k, 1)
+    observed = np.abs(means[j] - means[i])
+    onehot = np.zeros((len(x), k))
+    onehot[np.arange(len(x)), codes] = 1.0 / n[codes]
+
+    exceed = np.zeros(len(i), dtype=np.int64)
+    seeds = np.random.SeedSequence(seed).spawn(-(-n_resamples // batch_size))
+    for batch, batch_seed in enumerate(seeds):
+        size = min(batch_size, n_resamples - batch * batch_size)
+        rng = np.random.default_rng(batch_seed)
+        shuffled = rng.permuted(np.broadcast_to(x, (size, len(x))), axis=1)
+        perm_means = shuffled @ onehot
+        exceed += (np.abs(perm_means[:, j] - perm_means[:, i]) >= observed - 1e-12).sum(axis=0)
+
+    p_value = (exceed + 1) / (n_resamples + 1)
+    p_adj = adjust_pvalues(p_value, correction)
+    return _pair_table(groups, i, j, {
+        'meandiff': means[j] - means[i],
+        'p_value': p_value,
+        'p_adj': p_adj,
+        'reject': p_adj < alpha,
+    })
+
+
+def versus_reference(values, labels, reference: str, equal_var: bool = True,
+                     groups: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    기준 집단과 나머지 각 집단의 독립표본 t-검정 (scipy.stats.ttest_ind 와 동일한 결과)
+
+    meandiff = mean(reference) − mean(other)
+    """
+    x, codes, groups = _encode(values, labels, groups)
+    k = len(groups)
+    n, means, variances, _ = _summary(x, codes, k)
+    r = groups.index(reference)
+    others = np.array([g for g in range(k) if g != r], dtype=np.int64)
+
+    diff = means[r] - means[others]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if equal_var:
+            df = n[r] + n[others] - 2
+            pooled = ((n[r] - 1) * variances[r] + (n[others] - 1) * variances[others]) / df
+            se = np.sqrt(pooled * (1 / n[r] + 1 / n[others]))
+        else:
+            vr, vo = variances[r] / n[r], variances[others] / n[others]
+            df = (vr + vo) ** 2 / (vr ** 2 / (n[r] - 1) + vo ** 2 / (n[others] - 1))
+            se = np.sqrt(vr + vo)
+        t_stat = diff / se
+    p_value = 2 * stats.t.sf(np.abs(t_stat), df)
+
+    return _pair_table(groups, np.full(len(others), r), others, {
+        'meandiff': diff,
+        't_stat': t_stat,
+        'df': df,
+        'p_value': p_value,
+    })
+
+
+def format_table(table: pd.DataFrame, title: str = '') -> str:
+    """사후검정 결과 표 문자열 (소수점 4자리)"""
+    body = table.to_string(index=False, float_format=lambda v: f"{v:.4f}")
+    width = max(len(line) for line in body.splitlines())
+    lines = [title.center(width)] if title else []
+    lines += ["=" * width, body, "-" * width]
+    return "\n".join(lines)
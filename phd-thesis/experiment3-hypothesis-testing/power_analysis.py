@@ -0,0 +1,342 @@
+"""
+검정력 분석 (다음 평가 설계용)
+
+- 해석적 검정력: 효과크기 / 표본 크기 / 유의수준 격자를 브로드캐스팅으로 한 번에 계산
+  - 피어슨 상관: Fisher z 근사 (NLPMetricsCalculator.calculate_required_sample_size 와 같은 공식)
+  - 일원배치 분산분석: 비중심 F 분포 (Cohen's f, λ = f²·N)
+- 몬테카를로 검정력: 실제 설계(챗봇 간 분산분석, 평가자 간 상관)를 모의실험으로 반복
+  - (모의실험 수 × 챗봇 × 평가) 배열로 배치 단위 계산, 배치는 프로세스 풀에서 실행
+  - 배치별 시드는 SeedSequence 로 파생하므로 워커 수와 관계없이 결과가 동일
+
+    power_grid(anova_power, effect_f=[0.25, 0.4, 0.6], k=4, n_per_group=range(5, 61, 5))
+    PowerSimulator(n_simulations=5000).anova(means, sd, n_per_group=[7, 14, 21, 42])
+
+실행:
+    python power_analysis.py                      # 논문 데이터 기준 설계 계획
+    python power_analysis.py --ratings ratings.csv --simulations 20000 --workers 4
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+DEFAULT_SEED = 20250101
+
+
+# ---------------------------------------------------------------------------
+# 해석적 검정력 (브로드캐스팅)
+# ---------------------------------------------------------------------------
+
+def fisher_z(r):
+    """Fisher z 변환"""
+    r = np.asarray(r, dtype=float)
+    return 0.5 * np.log((1 + r) / (1 - r))
+
+
+def _critical_z(alpha, alternative: str):
+    alpha = np.asarray(alpha, dtype=float)
+    if alternative == 'two-sided':
+        return stats.norm.ppf(1 - alpha / 2)
+    if alternative in ('greater', 'less'):
+        return stats.norm.ppf(1 - alpha)
+    raise ValueError(f"unknown alternative: {alternative}")
+
+
+def correlation_power(r, n, alpha=0.05, alternative: str = 'two-sided') -> np.ndarray:
+    """
+    피어슨 상관 검정의 검정력 (Fisher z 근사)
+
+    r, n, alpha 는 서로 브로드캐스팅 가능한 배열 - 격자 전체를 한 번에 계산합니다.
+    """
+    r, n, alpha = np.broadcast_arrays(np.asarray(r, dtype=float), np.asarray(n, dtype=float),
+                                      np.asarray(alpha, dtype=float))
+    z_crit = _critical_z(alpha, alternative)
+    with np.errstate(invalid='ignore'):
+        shift = fisher_z(r) * np.sqrt(n - 3)
+    if alternative == 'two-sided':
+        power = stats.norm.sf(z_crit - shift) + stats.norm.cdf(-z_crit - shift)
+    elif alternative == 'greater':
+        power = stats.norm.sf(z_crit - shift)
+    else:
+        power = stats.norm.cdf(-z_crit - shift)
+    return np.where(n > 3, power, np.nan)
+
+
+def correlation_sample_size(r, alpha=0.05, power=0.8) -> np.ndarray:
+    """목표 검정력을 위한 최소 표본 크기 (양측, Fisher z 근사: ((z_α/2 + z_β) / z_r)² + 3)"""
+    z_alpha = stats.norm.ppf(1 - np.asarray(alpha, dtype=float) / 2)
+    z_beta = stats.norm.ppf(np.asarray(power, dtype=float))
+    n = ((z_alpha + z_beta) / fisher_z(np.abs(r))) ** 2 + 3
+    return np.ceil(n).astype(int)
+
+
+def eta_squared_to_f(eta_squared):
+    """η² → Cohen's f"""
+    eta_squared = np.asarray(eta_squared, dtype=float)
+    return np.sqrt(eta_squared / (1 - eta_squared))
+
+
+def anova_power(effect_f, k, n_per_group, alpha=0.05) -> np.ndarray:
+    """
+    일원배치 분산분석의 검정력 (비중심 F, 집단 크기 동일)
+
+    effect_f: Cohen's f, k: 집단(챗봇) 수, n_per_group: 챗봇당 평가 수
+    """
+    effect_f, k, n, alpha = np.broadcast_arrays(np.asarray(effect_f, dtype=float), np.asarray(k, dtype=float),
+                                                np.asarray(n_per_group, dtype=float), np.asarray(alpha, dtype=float))
+    df1 = k - 1
+    df2 = k * (n - 1)
+    valid = (df1 >= 1) & (df2 >= 1)
+    df1 = np.where(valid, df1, 1.0)
+    df2 = np.where(valid, df2, 1.0)
+    f_crit = stats.f.isf(alpha, df1, df2)
+    power = stats.ncf.sf(f_crit, df1, df2, effect_f ** 2 * k * n)
+    return np.where(valid, power, np.nan)
+
+
+def anova_sample_size(effect_f, k, alpha=0.05, power=0.8, max_n: int = 100000) -> np.ndarray:
+    """
+    목표 검정력을 위한 챗봇당 최소 평가 수 (정수 이분 탐색을 격자 전체에 동시에 적용)
+
+    max_n 안에서 목표에 도달하지 못하면 -1
+    """
+    effect_f, k, alpha, power = np.broadcast_arrays(np.asarray(effect_f, dtype=float), np.asarray(k, dtype=float),
+                                                    np.asarray(alpha, dtype=float), np.asarray(power, dtype=float))
+    low = np.full(effect_f.shape, 2, dtype=np.int64)         # 항상 검정력 부족으로 간주
+    high = np.full(effect_f.shape, max_n, dtype=np.int64)
+    reachable = anova_power(effect_f, k, high, alpha) >= power
+
+    low_ok = anova_power(effect_f, k, low, alpha) >= power
+    high = np.where(low_ok, low, high)
+    low = np.where(low_ok, low - 1, low)
+    while np.any(high - low > 1):
+        mid = (low + high) // 2
+        enough = anova_power(effect_f, k, mid, alpha) >= power
+        high = np.where(enough, mid, high)
+        low = np.where(enough, low, mid)
+    return np.where(reachable, high, -1)
+
+
+def power_grid(func, **axes) -> pd.DataFrame:
+    """
+    격자 전체의 검정력 표 (long format)
+
+    axes: 인자 이름 → 값 목록 (스칼라도 가능). func 는 브로드캐스팅을 지원하는 검정력 함수.
+        power_grid(correlation_power, r=[0.3, 0.5, 0.7], n=range(4, 101))
+    """
+    names = list(axes)
+    values = [np.atleast_1d(np.asarray(list(axes[name]) if isinstance(axes[name], range) else axes[name]))
+              for name in names]
+    mesh = np.meshgrid(*values, indexing='ij')
+    power = func(**dict(zip(names, mesh)))
+    table = pd.DataFrame({name: grid.ravel() for name, grid in zip(names, mesh)})
+    table['power'] = np.asarray(power).ravel()
+    return table
+
+
+# ---------------------------------------------------------------------------
+# 몬테카를로 모의실험 배치 (프로세스 풀에서 실행되는 최상위 함수)
+# ---------------------------------------------------------------------------
+
+def _discretize(samples: np.ndarray, score_range: Optional[Tuple[float, float]]) -> np.ndarray:
+    """평가 척도(예: 1–3점 정수)로 반올림 / 절단"""
+    if score_range is None:
+        return samples
+    return np.clip(np.rint(samples), score_range[0], score_range[1])
+
+
+def _anova_simulation_batch(seed, size, means, sd, n_per_group, alpha, score_range):
+    """size 회 모의실험의 분산분석 기각 여부 → (size,)"""
+    rng = np.random.default_rng(seed)
+    k = len(means)
+    samples = rng.normal(means[None, :, None], sd, size=(size, k, n_per_group))
+    samples = _discretize(samples, score_range)
+
+    group_means = samples.mean(axis=2)
+    grand_mean = group_means.mean(axis=1, keepdims=True)
+    ssb = n_per_group * ((group_means - grand_mean) ** 2).sum(axis=1)
+    ssw = ((samples - group_means[:, :, None]) ** 2).sum(axis=(1, 2))
+    df1, df2 = k - 1, k * (n_per_group - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_stat = (ssb / df1) / (ssw / df2)
+    p_value = stats.f.sf(f_stat, df1, df2)
+    return np.nan_to_num(p_value, nan=1.0) < alpha
+
+
+def _correlation_simulation_batch(seed, size, rho, n, alpha):
+    """size 회 모의실험의 상관 검정 기각 여부 (양측 t-검정) → (size,)"""
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal((size, n))
+    y = rho * x + np.sqrt(1 - rho ** 2) * rng.standard_normal((size, n))
+
+    xc = x - x.mean(axis=1, keepdims=True)
+    yc = y - y.mean(axis=1, keepdims=True)
+    r = (xc * yc).sum(axis=1) / np.sqrt((xc ** 2).sum(axis=1) * (yc ** 2).sum(axis=1))
+    with np.errstate(divide='ignore'):
+        t_stat = r * np.sqrt((n - 2) / (1 - r ** 2))
+    p_value = 2 * stats.t.sf(np.abs(t_stat), n - 2)
+    return p_value < alpha
+
+
+# ---------------------------------------------------------------------------
+# 모의실험기
+# ---------------------------------------------------------------------------
+
+class PowerSimulator:
+    """
+    몬테카를로 검정력 계산기
+
+    n_simulations: 설계(표본 크기)당 모의실험 수, batch_size: 한 배치의 모의실험 수,
+    workers: 프로세스 수 (None = CPU 수, 1 = 현재 프로세스에서 실행)
+    """
+
+    def __init__(self, n_simulations: int = 5000, batch_size: int = 1000, seed: int = DEFAULT_SEED,
+                 workers: Optional[int] = None, alpha: float = 0.05):
+        self.n_simulations = n_simulations
+        self.batch_size = batch_size
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.alpha = alpha
+
+    def _batches(self, stream: int):
+        sizes = [self.batch_size] * (self.n_simulations // self.batch_size)
+        if self.n_simulations % self.batch_size:
+            sizes.append(self.n_simulations % self.batch_size)
+        return list(zip(np.random.SeedSequence([self.seed, stream]).spawn(len(sizes)), sizes))
+
+    def _run(self, task, designs: Sequence[tuple]) -> np.ndarray:
+        """설계별 기각률 (모든 설계의 배치를 하나의 풀에 나누어 실행)"""
+        jobs = [(d, seed, size) for d, design in enumerate(designs) for seed, size in self._batches(d)]
+        args = [(seed, size) + tuple(designs[d]) for d, seed, size in jobs]
+
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                parts = list(pool.map(task, *zip(*args)))
+        else:
+            parts = [task(*job_args) for job_args in args]
+
+        rejections = np.zeros(len(designs))
+        for (d, _, _), rejected in zip(jobs, parts):
+            rejections[d] += np.count_nonzero(rejected)
+        return rejections / self.n_simulations
+
+    def _table(self, column: str, values, power: np.ndarray, analytic: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame({
+            column: list(values),
+            'power': power,
+            'mc_se': np.sqrt(power * (1 - power) / self.n_simulations),
+            'analytic_power': analytic,
+        })
+
+    def anova(self, means: Sequence[float], sd: float, n_per_group: Sequence[int],
+              score_range: Optional[Tuple[float, float]] = None) -> pd.DataFrame:
+        """
+        챗봇 간 일원배치 분산분석의 모의실험 검정력
+
+        means: 챗봇별 실제 평균, sd: 집단 내 표준편차, n_per_group: 챗봇당 평가 수 후보
+        score_range 를 주면 모의 점수를 평가 척도의 정수로 반올림합니다 (analytic_power 는 연속 정규 가정).
+        """
+        means = np.asarray(means, dtype=float)
+        n_values = [int(n) for n in np.atleast_1d(n_per_group)]
+        designs = [(means, float(sd), n, self.alpha, score_range) for n in n_values]
+        power = self._run(_anova_simulation_batch, designs)
+
+        effect_f = np.sqrt(np.mean((means - means.mean()) ** 2)) / sd
+        analytic = anova_power(effect_f, len(means), n_values, self.alpha)
+        return self._table('n_per_group', n_values, power, analytic)
+
+    def correlation(self, rho: float, n: Sequence[int]) -> pd.DataFrame:
+        """평가자 간 피어슨 상관 검정(양측)의 모의실험 검정력 - n: 평가 대상(챗봇) 수 후보"""
+        n_values = [int(size) for size in np.atleast_1d(n)]
+        designs = [(float(rho), size, self.alpha) for size in n_values]
+        power = self._run(_correlation_simulation_batch, designs)
+        return self._table('n', n_values, power, correlation_power(rho, n_values, self.alpha))
+
+
+def design_from_ratings(cube) -> Dict[str, float]:
+    """관측 평가 큐브에서 모의실험 설계 값 추출 (챗봇 평균, 집단 내 표준편차, 효과크기, 평가자 간 평균 상관)"""
+    from reliability import pairwise_correlations
+
+    anova = cube.anova_oneway()
+    sd = float(np.sqrt(anova['ssw'] / anova['df_within']))
+    correlations = pairwise_correlations(cube.evaluator_totals())['r']
+    upper = correlations[np.triu_indices_from(correlations, k=1)]
+    return {
+        'means': anova['group_means'],
+        'sd': sd,
+        'n_per_group': int(cube.chatbot_counts().min()),
+        'eta_squared': anova['eta_squared'],
+        'effect_f': float(eta_squared_to_f(anova['eta_squared'])),
+        'mean_correlation': float(np.nanmean(upper)) if len(upper) else float('nan'),
+        'n_chatbots': len(cube.chatbots),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="검정력 분석 / 다음 평가 설계 계획")
+    parser.add_argument('--ratings', help="long-format 평가 파일 (없으면 논문 데이터)")
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--power', type=float, default=0.8, help="목표 검정력")
+    parser.add_argument('--simulations', type=int, default=5000, help="설계당 몬테카를로 모의실험 수 (0 = 생략)")
+    parser.add_argument('--workers', type=int, default=None, help="모의실험 프로세스 수 (기본: CPU 수)")
+    parser.add_argument('--score-range', nargs=2, type=float, metavar=('MIN', 'MAX'), default=(1, 3),
+                        help="모의 점수 척도 (기본: 1 3)")
+    args = parser.parse_args(argv)
+
+    if args.ratings:
+        from ratings_io import load_ratings
+        cube = load_ratings(args.ratings)
+    else:
+        from hypothesis_analysis import PhDThesisExperiment3Analysis
+        cube = PhDThesisExperiment3Analysis().ratings
+    design = design_from_ratings(cube)
+
+    print("\n🔋 검정력 분석 (다음 평가 설계 계획)")
+    print("=" * 60)
+    print(f"관측 설계: 챗봇 {design['n_chatbots']}개 × 챗봇당 평가 {design['n_per_group']}개")
+    print(f"η² = {design['eta_squared']:.3f} (Cohen's f = {design['effect_f']:.3f}), "
+          f"집단 내 SD = {design['sd']:.3f}, 평가자 간 평균 r = {design['mean_correlation']:.3f}")
+
+    print(f"\n상관계수별 필요 표본 크기 (양측 α={args.alpha}, power={args.power}):")
+    targets = np.array([0.3, 0.5, 0.7, 0.9])
+    for r, n in zip(targets, correlation_sample_size(targets, args.alpha, args.power)):
+        print(f"  r={r}: 최소 {n}개 챗봇")
+
+    print(f"\n분산분석 챗봇당 필요 평가 수 (power={args.power}):")
+    effect_sizes = np.array([0.1, 0.25, 0.4, design['effect_f']])
+    chatbot_counts = np.array([4, 8, 16, 32])
+    needed = anova_sample_size(effect_sizes[:, None], chatbot_counts[None, :], args.alpha, args.power)
+    print(f"{'Cohen f':>10} " + " ".join(f"{f'k={k}':>8}" for k in chatbot_counts))
+    for f, row in zip(effect_sizes, needed):
+        print(f"{f:10.3f} " + " ".join(f"{n:8d}" for n in row))
+
+    print(f"\n평가자 간 상관 검정력 (r = {design['mean_correlation']:.3f}, Fisher z 근사):")
+    grid = power_grid(correlation_power, r=design['mean_correlation'], n=[4, 8, 12, 16, 24, 32], alpha=args.alpha)
+    for row in grid.itertuples():
+        print(f"  n={row.n:>3.0f}: power = {row.power:.3f}")
+
+    if args.simulations:
+        simulator = PowerSimulator(n_simulations=args.simulations, workers=args.workers, alpha=args.alpha)
+        score_range = tuple(args.score_range)
+        print(f"\n🎲 몬테카를로 검정력 ({args.simulations:,}회/설계, 점수 척도 {score_range[0]:g}–{score_range[1]:g}):")
+
+        anova_table = simulator.anova(design['means'], design['sd'], [3, 6, 9, 12, 21, 42], score_range=score_range)
+        print("챗봇 간 분산분석 (관측 챗봇 평균):")
+        for row in anova_table.itertuples():
+            print(f"  챗봇당 {row.n_per_group:>3}개 평가: power = {row.power:.3f} ± {row.mc_se:.3f} "
+                  f"(해석적 {row.analytic_power:.3f})")
+
+        correlation_table = simulator.correlation(design['mean_correlation'], [4, 8, 12, 16, 24, 32])
+        print("평가자 간 상관 (t-검정):")
+        for row in correlation_table.itertuples():
+            print(f"  챗봇 {row.n:>3}개: power = {row.power:.3f} ± {row.mc_se:.3f} "
+                  f"(Fisher z 근사 {row.analytic_power:.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+분석 실행 프로파일링 (선택 사항)
+
+단계별 경과 시간(wall), CPU 시간, tracemalloc 기준 최대 메모리 증가량을 기록하고
+필요하면 cProfile 결과를 .prof 파일로 저장합니다.
+
+분석 코드는 with stage('이름'): 으로 단계를 표시하며, 활성화된 StageProfiler 가 없으면
+아무 일도 하지 않으므로 평소 실행에는 영향이 없습니다.
+
+    results, report = profiled(analyzer.run_complete_analysis)
+    print(format_report(report))
+"""
+
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_ACTIVE: Optional["StageProfiler"] = None
+
+
+def _cpu_seconds() -> float:
+    """현재 프로세스 + 종료된 자식 프로세스(프로세스 풀 워커)의 CPU 시간"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class StageProfiler:
+    """
+    단계별 실행 시간 / 메모리 기록기
+
+    memory: tracemalloc 으로 단계별 최대 메모리 측정 (실행이 느려짐)
+    cprofile_path: 지정하면 cProfile 통계를 해당 경로에 저장
+    """
+
+    def __init__(self, memory: bool = True, cprofile_path: Optional[str] = None):
+        self.memory = memory
+        self.cprofile_path = cprofile_path
+        self.records: List[Dict[str, Any]] = []
+        self._stack: List[Dict[str, Any]] = []
+        self._profile: Optional[cProfile.Profile] = None
+        self._started_tracemalloc = False
+        self._total: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------------
+    # 활성화
+    # ------------------------------------------------------------------
+
+    def __enter__(self):
+        global _ACTIVE
+        if _ACTIVE is not None:
+            raise RuntimeError("another StageProfiler is already active")
+        _ACTIVE = self
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.cprofile_path:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._total = self._open('total')
+        return self
+
+    def __exit__(self, *exc_info):
+        global _ACTIVE
+        self._close(self._total)
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile_path)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        _ACTIVE = None
+        return False
+
+    # ------------------------------------------------------------------
+    # 단계
+    # ------------------------------------------------------------------
+
+    def _open(self, name: str) -> Dict[str, Any]:
+        record = {'stage': name, 'depth': len(self._stack), 'wall_s': 0.0, 'cpu_s': 0.0,
+                  'peak_mb': None, 'note': ''}
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # 상위 단계의 최대값을 보존한 뒤 이 단계 기준으로 최대값 초기화
+            if self._stack:
+                self._stack[-1]['_peak'] = max(self._stack[-1]['_peak'], peak)
+            tracemalloc.reset_peak()
+            record['_base'] = current
+            record['_peak'] = current
+        self.records.append(record)
+        self._stack.append(record)
+        record['_wall'] = time.perf_counter()
+        record['_cpu'] = _cpu_seconds()
+        return record
+
+    def _close(self, record: Dict[str, Any]):
+        record['wall_s'] = time.perf_counter() - record.pop('_wall')
+        record['cpu_s'] = _cpu_seconds() - record.pop('_cpu')
+        self._stack.pop()
+        if self.memory:
+            peak = max(record.pop('_peak'), tracemalloc.get_traced_memory()[1])
+            record['peak_mb'] = (peak - record.pop('_base')) / 2 ** 20
+            if self._stack:
+                self._stack[-1]['_peak'] = max(self._stack[-1]['_peak'], peak)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        record = self._open(name)
+        try:
+            yield record
+        finally:
+            self._close(record)
+
+    # ------------------------------------------------------------------
+    # 보고서
+    # ------------------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        """타이밍 보고서 (stages: 실행 순서, depth 는 중첩 깊이)"""
+        report = {
+            'stages': [{key: value for key, value in record.items() if not key.startswith('_')}
+                       for record in self.records],
+            'memory': self.memory,
+        }
+        if self.cprofile_path:
+            report['cprofile_path'] = self.cprofile_path
+        return report
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """활성화된 프로파일러가 있으면 단계로 기록 (없으면 아무 일도 하지 않음)"""
+    if _ACTIVE is None:
+        yield None
+    else:
+        with _ACTIVE.stage(name) as record:
+            yield record
+
+
+def profiled(func: Callable, *args, memory: bool = True, cprofile_path: Optional[str] = None,
+             **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """func(*args, **kwargs) 를 프로파일링하며 실행 → (결과, 타이밍 보고서)"""
+    with StageProfiler(memory=memory, cprofile_path=cprofile_path) as profiler:
+        result = func(*args, **kwargs)
+    return result, profiler.report()
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """타이밍 보고서 표 문자열"""
+    lines = [f"{'stage':34} {'wall(s)':>9} {'cpu(s)':>9} {'peak(MB)':>9}", "─" * 64]
+    for record in report['stages']:
+        name = "  " * record['depth'] + record['stage']
+        if record['note']:
+            name += f" ({record['note']})"
+        peak = f"{record['peak_mb']:9.2f}" if record['peak_mb'] is not None else f"{'-':>9}"
+        lines.append(f"{name:34} {record['wall_s']:9.3f} {record['cpu_s']:9.3f} {peak}")
+    return "\n".join(lines)
+
+
+def format_cprofile(path: str, limit: int = 15, sort: str = 'cumulative') -> str:
+    """저장된 cProfile 통계 상위 함수 목록"""
+    stream = io.StringIO()
+    pstats.Stats(path, stream=stream).strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,138 @@
+"""
+평가 점수 큐브 (기준 × 평가자 × 챗봇)
+
+PhDThesisExperiment3Analysis 의 중첩 딕셔너리(criterion → evaluator → chatbot)를
+라벨이 붙은 NumPy 3차원 배열로 보관하고, 챗봇/평가자 합계와 일원배치 분산분석의
+제곱합을 벡터 연산으로 계산합니다. 결측 평가는 NaN 으로 표시합니다.
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import scipy.stats as stats
+
+
+class RatingsCube:
+    """
+    라벨이 붙은 평가 점수 배열
+
+    values[c, e, b] = 기준 c 에 대해 평가자 e 가 챗봇 b 에 준 점수
+    """
+
+    def __init__(self, values, criteria: Sequence[str], evaluators: Sequence[str], chatbots: Sequence[str]):
+        self.values = np.asarray(values, dtype=float)
+        self.criteria = list(criteria)
+        self.evaluators = list(evaluators)
+        self.chatbots = list(chatbots)
+
+        expected = (len(self.criteria), len(self.evaluators), len(self.chatbots))
+        if self.values.shape != expected:
+            raise ValueError(f"values shape {self.values.shape} does not match labels {expected}")
+
+    @classmethod
+    def from_nested_dict(cls, evaluation_data: Dict[str, Dict[str, Dict[str, float]]],
+                         evaluators: Optional[Sequence[str]] = None,
+                         chatbots: Optional[Sequence[str]] = None) -> "RatingsCube":
+        """기존 evaluation_data 형식(criterion → evaluator → chatbot)에서 생성"""
+        criteria = list(evaluation_data.keys())
+        first = evaluation_data[criteria[0]]
+        evaluators = list(evaluators or first.keys())
+        chatbots = list(chatbots or next(iter(first.values())).keys())
+
+        values = np.full((len(criteria), len(evaluators), len(chatbots)), np.nan)
+        for c, criterion in enumerate(criteria):
+            for e, evaluator in enumerate(evaluators):
+                row = evaluation_data[criterion].get(evaluator, {})
+                values[c, e, :] = [row.get(chatbot, np.nan) for chatbot in chatbots]
+        return cls(values, criteria, evaluators, chatbots)
+
+    def to_nested_dict(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """evaluation_data 형식으로 변환 (결측은 제외)"""
+        return {
+            criterion: {
+                evaluator: {
+                    chatbot: as_number(self.values[c, e, b])
+                    for b, chatbot in enumerate(self.chatbots)
+                    if not np.isnan(self.values[c, e, b])
+                }
+                for e, evaluator in enumerate(self.evaluators)
+            }
+            for c, criterion in enumerate(self.criteria)
+        }
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def n_ratings(self) -> int:
+        """결측을 제외한 평가 점수 개수"""
+        return int(np.count_nonzero(~np.isnan(self.values)))
+
+    # ------------------------------------------------------------------
+    # 주변 합계
+    # ------------------------------------------------------------------
+
+    def group_scores(self) -> np.ndarray:
+        """챗봇별 개별 점수 (챗봇 × (기준·평가자)), 기준 순 → 평가자 순"""
+        return self.values.reshape(-1, len(self.chatbots)).T
+
+    def chatbot_counts(self) -> np.ndarray:
+        return np.count_nonzero(~np.isnan(self.values), axis=(0, 1))
+
+    def chatbot_totals(self) -> np.ndarray:
+        return np.nansum(self.values, axis=(0, 1))
+
+    def chatbot_means(self) -> np.ndarray:
+        return self.chatbot_totals() / self.chatbot_counts()
+
+    def evaluator_totals(self) -> np.ndarray:
+        """평가자별 챗봇 총점 (평가자 × 챗봇), 기준에 대해 합산"""
+        return np.nansum(self.values, axis=0)
+
+    def long_format(self):
+        """(점수, 챗봇 라벨) 1차원 배열 쌍 - 사후검정 입력용"""
+        groups = self.group_scores()
+        mask = ~np.isnan(groups)
+        labels = np.repeat(np.array(self.chatbots, dtype=object), mask.sum(axis=1))
+        return groups[mask], labels
+
+    # ------------------------------------------------------------------
+    # 일원배치 분산분석
+    # ------------------------------------------------------------------
+
+    def anova_oneway(self) -> Dict[str, float]:
+        """챗봇을 집단으로 하는 일원배치 분산분석 (SSB, SSW, F, p, η²)"""
+        groups = self.group_scores()
+        counts = np.count_nonzero(~np.isnan(groups), axis=1)
+        sums = np.nansum(groups, axis=1)
+        group_means = sums / counts
+
+        n_total = counts.sum()
+        grand_mean = sums.sum() / n_total
+
+        ssb = float(np.sum(counts * (group_means - grand_mean) ** 2))
+        ssw = float(np.nansum((groups - group_means[:, None]) ** 2))
+
+        k = len(self.chatbots)
+        df_between = k - 1
+        df_within = int(n_total - k)
+        f_stat = (ssb / df_between) / (ssw / df_within) if ssw > 0 else np.inf
+        p_value = float(stats.f.sf(f_stat, df_between, df_within))
+
+        return {
+            'ssb': ssb,
+            'ssw': ssw,
+            'df_between': df_between,
+            'df_within': df_within,
+            'f_stat': float(f_stat),
+            'p_value': p_value,
+            'eta_squared': ssb / (ssb + ssw),
+            'grand_mean': float(grand_mean),
+            'group_means': group_means,
+        }
+
+
+def as_number(value: float):
+    """정수 점수는 int 로 유지 (출력 형식 보존)"""
+    return int(value) if float(value).is_integer() else float(value)
@@ -0,0 +1,294 @@
+"""
+평가 데이터 파일 로더
+
+long-format 평가 점수(chatbot, criterion, evaluator, score)를 CSV / Parquet / NDJSON 에서
+청크 단위로 읽어 검증한 뒤 RatingsCube 를 점진적으로 구성합니다.
+메모리 사용량은 파일 크기가 아니라 (기준 × 평가자 × 챗봇) 셀 개수에 비례합니다.
+
+NLP 지표 파일과 chat_history 내보내기 파일, 백엔드 텔레메트리 로그(backend/telemetry.py)도
+같은 방식으로 읽을 수 있습니다. 논문 대화 / 참조 응답이 들어 있는 확장자 없는 nlp_evaluation
+스크립트는 load_nlp_evaluation() 으로 모듈로 불러옵니다.
+"""
+
+import importlib.machinery
+import importlib.util
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ratings_cube import RatingsCube
+
+RATING_COLUMNS = ('chatbot', 'criterion', 'evaluator', 'score')
+NLP_METRIC_COLUMNS = ('chatbot', 'metric', 'value')
+CHAT_HISTORY_COLUMNS = ('chat_mode', 'chat_uuid', 'user_msg', 'ai_msg')
+
+DEFAULT_CHUNKSIZE = 100_000
+
+NLP_EVALUATION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nlp_evaluation')
+
+# backend/telemetry.py 로그 파일 (쓰는 중인 파일은 .arrows.open)
+TELEMETRY_SUFFIX = '.arrows'
+TELEMETRY_OPEN_SUFFIX = '.arrows.open'
+
+# 셀 키 패킹: 축별 최대 2^21 개 라벨
+_AXIS_BITS = 21
+_AXIS_LIMIT = 1 << _AXIS_BITS
+
+
+class RatingsValidationError(ValueError):
+    """평가 데이터 파일 형식 오류"""
+
+
+def iter_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+    """확장자에 따라 CSV / TSV / Parquet / NDJSON 파일을 DataFrame 청크로 읽기"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.csv', '.tsv'):
+        reader = pd.read_csv(path, sep='\t' if ext == '.tsv' else ',', chunksize=chunksize,
+                             usecols=list(columns) if columns else None)
+        yield from reader
+    elif ext in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=list(columns) if columns else None):
+            yield batch.to_pandas()
+    elif ext in ('.ndjson', '.jsonl', '.json'):
+        for chunk in pd.read_json(path, lines=True, chunksize=chunksize):
+            yield chunk[list(columns)] if columns else chunk
+    else:
+        raise RatingsValidationError(f"지원하지 않는 파일 형식: {path} (csv, tsv, parquet, ndjson)")
+
+
+def _require_columns(chunk: pd.DataFrame, required: Sequence[str], path: str):
+    missing = [column for column in required if column not in chunk.columns]
+    if missing:
+        raise RatingsValidationError(f"{path}: 필수 컬럼 누락 {missing} (필요: {list(required)})")
+
+
+def validate_ratings_chunk(chunk: pd.DataFrame, path: str = '<chunk>', row_offset: int = 0,
+                           score_range: Optional[Tuple[float, float]] = None) -> pd.DataFrame:
+    """long-format 평가 청크 검증 및 정리 (라벨은 문자열, 점수는 실수)"""
+    _require_columns(chunk, RATING_COLUMNS, path)
+    chunk = chunk[list(RATING_COLUMNS)].copy()
+
+    for column in ('chatbot', 'criterion', 'evaluator'):
+        missing = chunk[column].isna()
+        if missing.any():
+            rows = (np.flatnonzero(missing.to_numpy()) + row_offset + 1)[:5].tolist()
+            raise RatingsValidationError(f"{path}: '{column}' 값이 비어 있음 (행 {rows})")
+        chunk[column] = chunk[column].astype(str).str.strip()
+
+    scores = pd.to_numeric(chunk['score'], errors='coerce')
+    invalid = scores.isna()
+    if invalid.any():
+        rows = (np.flatnonzero(invalid.to_numpy()) + row_offset + 1)[:5].tolist()
+        raise RatingsValidationError(f"{path}: 숫자가 아닌 점수 (행 {rows})")
+    if score_range is not None:
+        low, high = score_range
+        out_of_range = (scores < low) | (scores > high)
+        if out_of_range.any():
+            rows = (np.flatnonzero(out_of_range.to_numpy()) + row_offset + 1)[:5].tolist()
+            raise RatingsValidationError(f"{path}: 점수 범위 [{low}, {high}] 밖의 값 (행 {rows})")
+    chunk['score'] = scores.astype(float)
+    return chunk
+
+
+class _LabelIndex:
+    """라벨 → 정수 코드 (처음 등장한 순서 유지)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        for label in pd.unique(values):
+            if label not in self.codes:
+                if len(self.codes) >= _AXIS_LIMIT:
+                    raise RatingsValidationError(f"'{self.name}' 라벨이 너무 많음 (최대 {_AXIS_LIMIT})")
+                self.codes[label] = len(self.codes)
+        return values.map(self.codes).to_numpy(dtype=np.int64)
+
+    @property
+    def labels(self) -> List[str]:
+        return list(self.codes)
+
+
+class RatingsCubeBuilder:
+    """long-format 평가 청크를 누적해 RatingsCube 를 만드는 빌더 (셀별 합계/개수만 보관)"""
+
+    def __init__(self, criteria: Optional[Sequence[str]] = None,
+                 evaluators: Optional[Sequence[str]] = None,
+                 chatbots: Optional[Sequence[str]] = None):
+        self.criteria = _LabelIndex('criterion')
+        self.evaluators = _LabelIndex('evaluator')
+        self.chatbots = _LabelIndex('chatbot')
+        # 라벨 순서를 미리 지정하면 그 순서를 따름
+        for index, labels in ((self.criteria, criteria), (self.evaluators, evaluators), (self.chatbots, chatbots)):
+            if labels:
+                index.encode(pd.Series(list(labels), dtype=object))
+
+        self.keys = np.empty(0, dtype=np.int64)
+        self.sums = np.empty(0, dtype=float)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.n_rows = 0
+
+    def add(self, chunk: pd.DataFrame):
+        """검증된 청크 추가"""
+        if chunk.empty:
+            return
+        c = self.criteria.encode(chunk['criterion'])
+        e = self.evaluators.encode(chunk['evaluator'])
+        b = self.chatbots.encode(chunk['chatbot'])
+        keys = (c << (2 * _AXIS_BITS)) | (e << _AXIS_BITS) | b
+
+        # 기존 누적값과 병합 (정렬된 고유 키 기준)
+        all_keys = np.concatenate([self.keys, keys])
+        all_sums = np.concatenate([self.sums, chunk['score'].to_numpy(dtype=float)])
+        all_counts = np.concatenate([self.counts, np.ones(len(keys), dtype=np.int64)])
+        self.keys, inverse = np.unique(all_keys, return_inverse=True)
+        self.sums = np.bincount(inverse, weights=all_sums, minlength=len(self.keys))
+        self.counts = np.bincount(inverse, weights=all_counts, minlength=len(self.keys)).astype(np.int64)
+        self.n_rows += len(chunk)
+
+    def build(self, on_duplicate: str = 'error') -> RatingsCube:
+        """
+        RatingsCube 생성
+
+        on_duplicate: 같은 (기준, 평가자, 챗봇)에 점수가 여러 개일 때
+            'error' - 오류 발생, 'mean' - 평균 사용
+        """
+        if on_duplicate not in ('error', 'mean'):
+            raise ValueError("on_duplicate must be 'error' or 'mean'")
+        if len(self.keys) == 0:
+            raise RatingsValidationError("평가 데이터가 비어 있음")
+
+        duplicated = self.counts > 1
+        if duplicated.any() and on_duplicate == 'error':
+            key = self.keys[np.argmax(duplicated)]
+            c, e, b = key >> (2 * _AXIS_BITS), (key >> _AXIS_BITS) & (_AXIS_LIMIT - 1), key & (_AXIS_LIMIT - 1)
+            raise RatingsValidationError(
+                f"중복 평가 {int(duplicated.sum())}건 (예: {self.criteria.labels[c]} / "
+                f"{self.evaluators.labels[e]} / {self.chatbots.labels[b]}) - on_duplicate='mean' 으로 평균 사용 가능"
+            )
+
+        criteria, evaluators, chatbots = self.criteria.labels, self.evaluators.labels, self.chatbots.labels
+        values = np.full((len(criteria), len(evaluators), len(chatbots)), np.nan)
+        values[self.keys >> (2 * _AXIS_BITS),
+               (self.keys >> _AXIS_BITS) & (_AXIS_LIMIT - 1),
+               self.keys & (_AXIS_LIMIT - 1)] = self.sums / self.counts
+        return RatingsCube(values, criteria, evaluators, chatbots)
+
+
+def load_ratings(path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                 score_range: Optional[Tuple[float, float]] = None,
+                 on_duplicate: str = 'error', **label_order) -> RatingsCube:
+    """long-format 평가 파일을 청크 단위로 읽어 RatingsCube 생성"""
+    builder = RatingsCubeBuilder(**label_order)
+    row_offset = 0
+    for chunk in iter_chunks(path, chunksize):
+        builder.add(validate_ratings_chunk(chunk, path, row_offset, score_range))
+        row_offset += len(chunk)
+    return builder.build(on_duplicate)
+
+
+def load_nlp_metrics(path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> Dict[str, Dict[str, float]]:
+    """
+    NLP 지표 파일 읽기 → {chatbot: {metric: value}}
+
+    long-format (chatbot, metric, value) 과 wide-format (chatbot, bleu, rouge, ...) 모두 지원
+    """
+    nlp_metrics: Dict[str, Dict[str, float]] = {}
+    for chunk in iter_chunks(path, chunksize):
+        _require_columns(chunk, ('chatbot',), path)
+        if set(NLP_METRIC_COLUMNS) <= set(chunk.columns):
+            long_chunk = chunk[list(NLP_METRIC_COLUMNS)]
+        else:
+            long_chunk = chunk.melt(id_vars='chatbot', var_name='metric', value_name='value')
+
+        values = pd.to_numeric(long_chunk['value'], errors='coerce')
+        if values.isna().any():
+            raise RatingsValidationError(f"{path}: 숫자가 아닌 NLP 지표 값")
+        for chatbot, metric, value in zip(long_chunk['chatbot'].astype(str), long_chunk['metric'].astype(str), values):
+            nlp_metrics.setdefault(chatbot, {})[metric] = float(value)
+    return nlp_metrics
+
+
+def iter_chat_history_export(path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                             extra_columns: Sequence[str] = ()) -> Iterator[pd.DataFrame]:
+    """
+    chat_history 내보내기 파일(CSV / Parquet / NDJSON)을 청크 단위로 읽기
+
+    각 청크는 chat_mode, chat_uuid, user_msg, ai_msg (+ extra_columns) 컬럼을 가지며
+    빈 응답(ai_msg)은 제외됩니다.
+    """
+    columns = list(CHAT_HISTORY_COLUMNS) + list(extra_columns)
+    for chunk in iter_chunks(path, chunksize):
+        _require_columns(chunk, columns, path)
+        chunk = chunk[columns]
+        chunk = chunk[chunk['ai_msg'].notna()]
+        chunk = chunk.assign(
+            chat_mode=chunk['chat_mode'].fillna('').astype(str),
+            chat_uuid=chunk['chat_uuid'].astype(str),
+            user_msg=chunk['user_msg'].fillna('').astype(str),
+            ai_msg=chunk['ai_msg'].astype(str),
+        )
+        if not chunk.empty:
+            yield chunk
+
+
+def telemetry_files(path: str, include_open: bool = False) -> List[str]:
+    """텔레메트리 로그 파일 목록 (디렉터리면 파일 이름 = 시작 시각 순)"""
+    if not os.path.isdir(path):
+        return [path]
+    suffixes = (TELEMETRY_SUFFIX, TELEMETRY_OPEN_SUFFIX) if include_open else (TELEMETRY_SUFFIX,)
+    return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(suffixes)]
+
+
+def iter_telemetry(path: str, include_open: bool = False,
+                   columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    백엔드 텔레메트리 로그(Arrow IPC 스트림)를 기록 배치 단위로 읽기
+
+    path: 로그 디렉터리 또는 파일 하나
+    include_open: 아직 쓰는 중인 파일(.arrows.open)도 읽음 - 마지막 배치가 잘려 있으면 그 앞까지만
+    """
+    import pyarrow as pa
+
+    for file_path in telemetry_files(path, include_open):
+        with pa.OSFile(file_path, 'rb') as source:
+            try:
+                reader = pa.ipc.open_stream(source)
+                for batch in reader:
+                    frame = batch.to_pandas()
+                    yield frame[list(columns)] if columns else frame
+            except (pa.ArrowInvalid, OSError):
+                if not file_path.endswith(TELEMETRY_OPEN_SUFFIX):
+                    raise
+
+
+def load_telemetry(path: str, include_open: bool = False, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """텔레메트리 로그 전체를 DataFrame 으로 (턴당 한 행)"""
+    frames = list(iter_telemetry(path, include_open, columns))
+    if not frames:
+        return pd.DataFrame(columns=list(columns) if columns else None)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_nlp_evaluation():
+    """확장자 없는 nlp_evaluation 스크립트를 모듈로 불러오기 (한 번만 실행하고 sys.modules 에 등록)"""
+    module = sys.modules.get('nlp_evaluation')
+    if module is not None:
+        return module
+    loader = importlib.machinery.SourceFileLoader('nlp_evaluation', NLP_EVALUATION_PATH)
+    module = importlib.util.module_from_spec(importlib.util.spec_from_loader('nlp_evaluation', loader))
+    sys.modules['nlp_evaluation'] = module
+    try:
+        loader.exec_module(module)
+    except BaseException:
+        del sys.modules['nlp_evaluation']
+        raise
+    return module
@@ -0,0 +1,160 @@
+"""
+평가자 간 신뢰도 엔진
+
+- 모든 평가자 쌍의 피어슨 상관을 한 번의 행렬 연산으로 계산 (결측은 쌍별 제외)
+- ICC (Shrout & Fleiss 6가지 변형)
+- Krippendorff's alpha (결측 허용, nominal / ordinal / interval / ratio)
+
+평가 행렬은 (평가자 × 평가 대상) 형태이며 결측 평가는 NaN 으로 표시합니다.
+Krippendorff's alpha 는 일치 행렬(coincidence matrix)을 벡터 연산으로 만들기 때문에
+수십 명의 LLM/인간 평가자와 수천 개 평가 대상에도 그대로 사용할 수 있습니다.
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import scipy.stats as stats
+
+
+def pairwise_correlations(ratings, raters: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    평가자 간 피어슨 상관 행렬 (쌍별 완전 사례)
+
+    ratings: (평가자 × 평가 대상) 배열
+    반환: r, p_value, n (각각 평가자 × 평가자)
+    """
+    x = np.asarray(ratings, dtype=float)
+    mask = (~np.isnan(x)).astype(float)
+    x0 = np.where(mask > 0, x, 0.0)
+
+    # 쌍별로 두 평가자가 모두 평가한 대상만 사용
+    n = mask @ mask.T
+    sum_x = x0 @ mask.T                 # [i, j]: i 의 점수 합 (j 도 평가한 대상)
+    sum_xx = (x0 ** 2) @ mask.T
+    sum_xy = x0 @ x0.T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sum_xy - sum_x * sum_x.T / n
+        var = sum_xx - sum_x ** 2 / n
+        r = cov / np.sqrt(var * var.T)
+        r = np.clip(r, -1.0, 1.0)
+
+        df = n - 2
+        t_stat = r * np.sqrt(df / (1 - r ** 2))
+        p_value = 2 * stats.t.sf(np.abs(t_stat), df)
+    p_value = np.where(np.abs(r) >= 1.0, 0.0, p_value)
+    np.fill_diagonal(p_value, 0.0)
+
+    result = {'r': r, 'p_value': p_value, 'n': n.astype(int)}
+    if raters is not None:
+        result['raters'] = list(raters)
+    return result
+
+
+def icc(ratings) -> Dict[str, Dict[str, float]]:
+    """
+    급내상관계수 (Shrout & Fleiss, 1979)
+
+    ratings: (평가 대상 × 평가자) 배열 - 결측이 있는 평가 대상은 제외
+    반환: ICC1, ICC2, ICC3 (단일 평가자), ICC1k, ICC2k, ICC3k (평균 평가)
+    """
+    x = np.asarray(ratings, dtype=float)
+    x = x[~np.isnan(x).any(axis=1)]
+    n, k = x.shape
+    if n < 2 or k < 2:
+        raise ValueError("ICC requires at least 2 complete targets and 2 raters")
+
+    grand_mean = x.mean()
+    ss_total = ((x - grand_mean) ** 2).sum()
+    ss_rows = k * ((x.mean(axis=1) - grand_mean) ** 2).sum()
+    ss_cols = n * ((x.mean(axis=0) - grand_mean) ** 2).sum()
+    ss_error = ss_total - ss_rows - ss_cols
+
+    ms_rows = ss_rows / (n - 1)
+    ms_within = (ss_total - ss_rows) / (n * (k - 1))
+    ms_cols = ss_cols / (k - 1)
+    ms_error = ss_error / ((n - 1) * (k - 1))
+
+    def entry(value, f_stat, df1, df2):
+        return {'icc': float(value), 'f_stat': float(f_stat), 'df1': df1, 'df2': df2,
+                'p_value': float(stats.f.sf(f_stat, df1, df2))}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_one_way = ms_rows / ms_within
+        f_two_way = ms_rows / ms_error
+        return {
+            'ICC1': entry((ms_rows - ms_within) / (ms_rows + (k - 1) * ms_within), f_one_way, n - 1, n * (k - 1)),
+            'ICC2': entry((ms_rows - ms_error) / (ms_rows + (k - 1) * ms_error + k * (ms_cols - ms_error) / n),
+                          f_two_way, n - 1, (n - 1) * (k - 1)),
+            'ICC3': entry((ms_rows - ms_error) / (ms_rows + (k - 1) * ms_error), f_two_way, n - 1, (n - 1) * (k - 1)),
+            'ICC1k': entry((ms_rows - ms_within) / ms_rows, f_one_way, n - 1, n * (k - 1)),
+            'ICC2k': entry((ms_rows - ms_error) / (ms_rows + (ms_cols - ms_error) / n),
+                           f_two_way, n - 1, (n - 1) * (k - 1)),
+            'ICC3k': entry((ms_rows - ms_error) / ms_rows, f_two_way, n - 1, (n - 1) * (k - 1)),
+        }
+
+
+def coincidence_matrix(ratings):
+    """
+    일치 행렬 계산
+
+    ratings: (평가자 × 평가 대상) 배열
+    반환: (값 목록, 일치 행렬 o[c, k])
+    """
+    x = np.asarray(ratings, dtype=float)
+    present = ~np.isnan(x)
+    values, codes = np.unique(x[present], return_inverse=True)
+
+    # 평가 대상별 값 개수 행렬 (대상 × 값)
+    unit_index = np.nonzero(present)[1]
+    counts = np.zeros((x.shape[1], len(values)))
+    np.add.at(counts, (unit_index, codes), 1.0)
+
+    # 짝지을 수 있는(2개 이상 평가된) 대상만 사용
+    m = counts.sum(axis=1)
+    pairable = m >= 2
+    counts, m = counts[pairable], m[pairable]
+
+    weighted = counts / (m - 1)[:, None]
+    coincidence = weighted.T @ counts - np.diag(weighted.sum(axis=0))
+    return values, coincidence
+
+
+def _delta_squared(values: np.ndarray, marginals: np.ndarray, level: str) -> np.ndarray:
+    """값 쌍 간 거리 제곱 δ²"""
+    if level == 'nominal':
+        return 1.0 - np.eye(len(values))
+    if level == 'interval':
+        return (values[:, None] - values[None, :]) ** 2
+    if level == 'ratio':
+        total = values[:, None] + values[None, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = ((values[:, None] - values[None, :]) / total) ** 2
+        return np.nan_to_num(delta)
+    if level == 'ordinal':
+        cumulative = np.cumsum(marginals)
+        # δ²(c, k) = (Σ_{g=c..k} n_g − (n_c + n_k) / 2)²
+        upper = np.maximum.outer(np.arange(len(values)), np.arange(len(values)))
+        lower = np.minimum.outer(np.arange(len(values)), np.arange(len(values)))
+        between = cumulative[upper] - cumulative[lower] + marginals[lower]
+        return (between - (marginals[:, None] + marginals[None, :]) / 2) ** 2
+    raise ValueError(f"unknown level of measurement: {level}")
+
+
+def krippendorff_alpha(ratings, level: str = 'interval') -> float:
+    """
+    Krippendorff's alpha (결측 허용)
+
+    ratings: (평가자 × 평가 대상) 배열, 결측은 NaN
+    level: 'nominal', 'ordinal', 'interval', 'ratio'
+    """
+    values, coincidence = coincidence_matrix(ratings)
+    marginals = coincidence.sum(axis=1)
+    n_total = marginals.sum()
+    if len(values) < 2 or n_total <= 1:
+        return float('nan')
+
+    delta = _delta_squared(values, marginals, level)
+    observed = (coincidence * delta).sum()
+    expected = (np.outer(marginals, marginals) * delta).sum() / (n_total - 1)
+    return float(1.0 - observed / expected) if expected > 0 else float('nan')
@@ -0,0 +1,336 @@
+"""
+가설검증 결과 보고서 생성 (헤드리스 / 배치)
+
+- 결과 그림(2×2)을 그리는 데 필요한 값만 추려 figure_data 로 만들고,
+  그 내용 해시가 바뀐 경우에만 Agg 백엔드로 다시 렌더링합니다 (<그림>.sha256 에 해시 기록)
+- 결과를 기계가 읽을 수 있는 형식으로 저장: results.json, summary.csv (스칼라 값 long-format),
+  결과 표(DataFrame)별 CSV
+- 여러 평가 라운드(평가 파일)의 보고서를 프로세스 풀에서 한 번에 생성
+
+사용법:
+    python reporting.py data/round_*.csv --nlp-metrics data/experiment3_nlp_metrics.csv --report-dir reports
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from analysis_cache import content_hash
+
+FIGURE_NAME = 'phd_thesis_experiment3_pearson_results.png'
+FIGURE_DPI = 300
+
+HYPOTHESIS_STEPS = ('hypothesis_1', 'hypothesis_2', 'hypothesis_3', 'hypothesis_4')
+HYPOTHESIS_LABELS = ('H₁', 'H₂', 'H₃', 'H₄')
+
+
+# ---------------------------------------------------------------------------
+# 그림
+# ---------------------------------------------------------------------------
+
+def figure_data(results: Dict[str, Any], chatbot_means: Dict[str, float]) -> Dict[str, Any]:
+    """결과 그림에 쓰이는 값만 추출 (순수 파이썬 자료형 - 해시/프로세스 간 전달용)"""
+    data = {'chatbot_means': {name: float(mean) for name, mean in chatbot_means.items()}}
+    if 'hypothesis_3' in results:
+        data['correlations'] = {pair: float(value['correlation'])
+                                for pair, value in results['hypothesis_3']['correlations'].items()}
+    if 'hypothesis_4' in results:
+        data['nlp_correlations'] = {metric: float(value['correlation'])
+                                    for metric, value in results['hypothesis_4']['nlp_correlations'].items()}
+    # 생략된 가설(기준 챗봇 / NLP 지표 없음)은 빠짐
+    data['acceptance'] = {label: bool(results[name]['hypothesis_accepted'])
+                          for label, name in zip(HYPOTHESIS_LABELS, HYPOTHESIS_STEPS) if name in results}
+    return data
+
+
+def draw_figure(data: Dict[str, Any]):
+    """결과 시각화 (2×2 그림) - Figure 반환"""
+    import matplotlib.pyplot as plt
+
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
+
+    # 1. 챗봇별 평균 점수 (가설 1, 2)
+    names = list(data['chatbot_means'].keys())
+    means = list(data['chatbot_means'].values())
+    colors = ['#FF6B6B' if name == 'Dr.CareSam' else '#4ECDC4' for name in names]
+
+    ax1.bar(names, means, color=colors, alpha=0.8, edgecolor='black')
+    ax1.set_title('챗봇별 상담학적 평가 평균 점수', fontsize=14, fontweight='bold')
+    ax1.set_ylabel('평균 점수')
+    ax1.grid(True, alpha=0.3)
+
+    # 순위 표시
+    sorted_items = sorted(zip(names, means), key=lambda x: x[1], reverse=True)
+    for i, (name, mean) in enumerate(sorted_items):
+        idx = names.index(name)
+        ax1.text(idx, mean + 0.05, f'{i+1}위\n{mean:.2f}',
+                 ha='center', va='bottom', fontweight='bold')
+
+    # 2. 피어슨 상관관계 결과 시각화 (가설 3)
+    if 'correlations' in data:
+        pairs = list(data['correlations'].keys())
+        corr_values = list(data['correlations'].values())
+
+        # 상관관계 막대 그래프
+        colors_corr = ['lightgreen' if corr > 0.5 else 'orange' if corr > 0.3 else 'lightcoral'
+                       for corr in corr_values]
+
+        pair_labels = [pair.replace('_vs_', ' vs ') for pair in pairs]
+        ax2.bar(pair_labels, corr_values, color=colors_corr, alpha=0.8, edgecolor='black')
+
+        # 기준선 표시
+        ax2.axhline(y=0.5, color='green', linestyle='--', alpha=0.7, label='중간 기준 (0.5)')
+        ax2.axhline(y=0.7, color='blue', linestyle='--', alpha=0.7, label='강한 기준 (0.7)')
+
+        ax2.set_title('평가자간 피어슨 상관관계 (가설 3)', fontsize=14, fontweight='bold')
+        ax2.set_ylabel('상관계수')
+        ax2.set_ylim(0, 1)
+        ax2.legend()
+        ax2.grid(True, alpha=0.3)
+
+        # 상관계수 값 표시
+        for i, corr in enumerate(corr_values):
+            ax2.text(i, corr + 0.05, f'{corr:.3f}',
+                     ha='center', va='bottom', fontweight='bold')
+
+    # 3. NLP 지표 vs 상담학적 평가 (가설 4)
+    if 'nlp_correlations' in data:
+        metrics = list(data['nlp_correlations'].keys())
+        correlations_vals = list(data['nlp_correlations'].values())
+
+        colors_nlp = ['red' if corr < 0 else 'skyblue' for corr in correlations_vals]
+        ax3.bar(metrics, correlations_vals, color=colors_nlp, alpha=0.7)
+        ax3.set_title('NLP 지표와 상담학적 평가 간 상관관계 (가설 4)', fontsize=14, fontweight='bold')
+        ax3.set_ylabel('상관계수')
+        ax3.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+        ax3.axhline(y=0.5, color='green', linestyle='--', alpha=0.5, label='r=0.5')
+        ax3.axhline(y=-0.5, color='green', linestyle='--', alpha=0.5)
+        ax3.legend()
+        ax3.grid(True, alpha=0.3)
+
+        # 상관계수 값 표시
+        for i, corr in enumerate(correlations_vals):
+            ax3.text(i, corr + (0.02 if corr >= 0 else -0.05), f'{corr:.3f}',
+                     ha='center', va='bottom' if corr >= 0 else 'top')
+
+    # 4. 가설 검증 결과 요약
+    hypothesis_results = list(data['acceptance'].keys())
+    acceptance = ['채택' if accepted else '기각' for accepted in data['acceptance'].values()]
+
+    colors_hyp = ['green' if acc == '채택' else 'red' for acc in acceptance]
+    ax4.bar(hypothesis_results, [1]*len(hypothesis_results), color=colors_hyp, alpha=0.7)
+    ax4.set_title('가설 검증 결과 요약', fontsize=14, fontweight='bold')
+    ax4.set_ylabel('결과')
+    ax4.set_ylim(0, 1.2)
+
+    # 결과 텍스트 표시
+    for i, (hyp, acc) in enumerate(zip(hypothesis_results, acceptance)):
+        ax4.text(i, 0.5, acc, ha='center', va='center',
+                 fontweight='bold', fontsize=12, color='white')
+
+    fig.tight_layout()
+    return fig
+
+
+def render_figure(data: Dict[str, Any], output_path: str, dpi: int = FIGURE_DPI, force: bool = False) -> bool:
+    """
+    헤드리스 렌더링 (Agg, plt.show() 없음)
+
+    그림 데이터 해시가 이전 렌더링과 같고 파일이 있으면 건너뜁니다. 렌더링했으면 True.
+    """
+    digest = content_hash(data, dpi)
+    stamp_path = output_path + '.sha256'
+    if not force and os.path.exists(output_path) and os.path.exists(stamp_path):
+        with open(stamp_path) as f:
+            if f.read().strip() == digest:
+                return False
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig = draw_figure(data)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    with open(stamp_path, 'w') as f:
+        f.write(digest)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# 기계 판독용 결과 (JSON / CSV)
+# ---------------------------------------------------------------------------
+
+def to_jsonable(obj):
+    """결과 객체 → JSON 직렬화 가능한 구조 (DataFrame 은 레코드 목록, NaN/inf 는 None)"""
+    if isinstance(obj, pd.DataFrame):
+        return [to_jsonable(record) for record in obj.astype(object).to_dict(orient='records')]
+    if isinstance(obj, dict):
+        return {str(key): to_jsonable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(item) for item in obj]
+    if isinstance(obj, np.ndarray):
+        return to_jsonable(obj.tolist())
+    if isinstance(obj, (np.bool_, bool)):
+        return bool(obj)
+    if isinstance(obj, (np.integer, int)):
+        return int(obj)
+    if isinstance(obj, (np.floating, float)):
+        return float(obj) if math.isfinite(obj) else None
+    if obj is None or isinstance(obj, str):
+        return obj
+    return str(obj)
+
+
+def flatten_scalars(results: Dict[str, Any], prefix: str = '') -> List[Dict[str, Any]]:
+    """중첩 결과에서 스칼라 값만 (hypothesis, metric, value) 행으로 펼침"""
+    rows = []
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            rows.extend(flatten_scalars(value, path))
+        elif isinstance(value, (bool, np.bool_, int, np.integer, float, np.floating, str)):
+            section, _, metric = path.partition('.')
+            rows.append({'section': section, 'metric': metric or section, 'value': to_jsonable(value)})
+    return rows
+
+
+def result_tables(results: Dict[str, Any], prefix: str = '') -> Dict[str, pd.DataFrame]:
+    """결과 안의 표: DataFrame 과 딕셔너리 목록(예: H2 comparisons) → {이름: DataFrame}"""
+    tables = {}
+    for key, value in results.items():
+        name = f"{prefix}_{key}" if prefix else str(key)
+        if isinstance(value, pd.DataFrame):
+            tables[name] = value
+        elif isinstance(value, dict):
+            tables.update(result_tables(value, name))
+        elif isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+            tables[name] = pd.DataFrame(value)
+    return tables
+
+
+def write_results(results: Dict[str, Any], report_dir: str) -> List[str]:
+    """results.json, summary.csv, 표별 CSV 저장 → 저장한 파일 목록"""
+    os.makedirs(report_dir, exist_ok=True)
+    written = []
+
+    json_path = os.path.join(report_dir, 'results.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(to_jsonable(results), f, ensure_ascii=False, indent=2, allow_nan=False)
+    written.append(json_path)
+
+    summary_path = os.path.join(report_dir, 'summary.csv')
+    pd.DataFrame(flatten_scalars(results), columns=['section', 'metric', 'value']).to_csv(summary_path, index=False)
+    written.append(summary_path)
+
+    for name, table in result_tables(results).items():
+        table_path = os.path.join(report_dir, f"{name}.csv")
+        table.to_csv(table_path, index=False)
+        written.append(table_path)
+    return written
+
+
+# ---------------------------------------------------------------------------
+# 배치 보고서 (평가 라운드별)
+# ---------------------------------------------------------------------------
+
+def round_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def build_round_report(ratings_path: str, report_dir: str, nlp_metrics_path: Optional[str] = None,
+                       cache_dir: Optional[str] = None, n_resamples: int = 0,
+                       on_duplicate: str = 'error') -> Dict[str, Any]:
+    """
+    평가 라운드 하나의 보고서 생성 (프로세스 풀 작업)
+
+    분석 출력은 <report_dir>/analysis.log 에 기록하고 결과 요약을 반환합니다.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+
+    from hypothesis_analysis import PhDThesisExperiment3Analysis
+    from ratings_io import load_ratings, load_nlp_metrics
+
+    started = time.perf_counter()
+    os.makedirs(report_dir, exist_ok=True)
+    with open(os.path.join(report_dir, 'analysis.log'), 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log):
+        ratings = load_ratings(ratings_path, on_duplicate=on_duplicate)
+        nlp_metrics = load_nlp_metrics(nlp_metrics_path) if nlp_metrics_path else None
+        analyzer = PhDThesisExperiment3Analysis(nlp_metrics=nlp_metrics, ratings=ratings)
+        results = analyzer.run_complete_analysis(n_resamples=n_resamples, workers=1, cache_dir=cache_dir,
+                                                 show=False, report_dir=report_dir)
+
+    h1, h2, h3, h4 = (results.get(name) for name in HYPOTHESIS_STEPS)
+    return {
+        'round': os.path.basename(report_dir),
+        'ratings': ratings_path,
+        'n_ratings': ratings.n_ratings,
+        'f_stat': h1['f_stat'],
+        'eta_squared': h1['eta_squared'],
+        'drcare_rank': h2['rank'] if h2 is not None else None,
+        'mean_correlation': h3['mean_correlation'],
+        'cronbach_alpha': h3['cronbach_alpha'],
+        'nlp_significant': h4['significant_count'] if h4 is not None else None,
+        'accepted': ''.join('-' if h is None else '✓' if h['hypothesis_accepted'] else '✗' for h in (h1, h2, h3, h4)),
+        'figure_rendered': results.get('figure_rendered', False),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def build_reports(ratings_paths: Sequence[str], report_dir: str, nlp_metrics_path: Optional[str] = None,
+                  workers: Optional[int] = None, cache_dir: Optional[str] = None,
+                  n_resamples: int = 0, on_duplicate: str = 'error') -> pd.DataFrame:
+    """여러 평가 라운드의 보고서를 프로세스 풀에서 생성하고 index.csv 로 요약"""
+    round_dirs = [os.path.join(report_dir, round_name(path)) for path in ratings_paths]
+    if len(set(round_dirs)) != len(round_dirs):
+        raise ValueError("평가 파일 이름(확장자 제외)이 겹쳐 보고서 디렉터리가 충돌합니다")
+
+    args = [(path, round_dir, nlp_metrics_path, cache_dir, n_resamples, on_duplicate)
+            for path, round_dir in zip(ratings_paths, round_dirs)]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args))) as pool:
+            rows = list(pool.map(build_round_report, *zip(*args)))
+    else:
+        rows = [build_round_report(*arg) for arg in args]
+
+    index = pd.DataFrame(rows)
+    index.to_csv(os.path.join(report_dir, 'index.csv'), index=False)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="평가 라운드별 가설검증 보고서 일괄 생성 (헤드리스)")
+    parser.add_argument('ratings', nargs='+', help="라운드별 long-format 평가 파일 (CSV/Parquet/NDJSON)")
+    parser.add_argument('--nlp-metrics', help="모든 라운드에 공통으로 쓸 NLP 지표 파일")
+    parser.add_argument('--report-dir', default='reports', help="보고서 출력 디렉터리 (라운드별 하위 디렉터리)")
+    parser.add_argument('--workers', type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument('--cache-dir', help="단계별 결과 캐시 디렉터리 (라운드 간 공유)")
+    parser.add_argument('--resamples', type=int, default=0, help="순열검정/부트스트랩 재표본 수 (0 = 생략)")
+    parser.add_argument('--on-duplicate', choices=['error', 'mean'], default='error', help="중복 평가 처리 방식")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    index = build_reports(args.ratings, args.report_dir, args.nlp_metrics, args.workers,
+                          args.cache_dir, args.resamples, args.on_duplicate)
+
+    print(f"📊 보고서 {len(index)}개 생성 → {args.report_dir} ({time.perf_counter() - started:.1f}초)")
+    print(f"🖼️  그림 렌더링: {int(index['figure_rendered'].sum())}개 (나머지는 결과 변경 없음)")
+    print(index[['round', 'n_ratings', 'f_stat', 'eta_squared', 'drcare_rank', 'mean_correlation',
+                 'accepted', 'figure_rendered']].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    return index
+
+
+if __name__ == "__main__":
+    main()
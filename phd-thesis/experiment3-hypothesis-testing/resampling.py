@@ -0,0 +1,235 @@
+"""
+순열검정 / 부트스트랩 추론 엔진
+
+챗봇이 4개뿐인 설계에서는 F-검정과 피어슨 상관의 모수적 p-value 가 불안정하므로,
+F 통계량, η², 피어슨 상관, Cronbach's α, 닥터케어쌤 순위에 대해
+순열검정 p-value 와 부트스트랩 신뢰구간을 계산합니다.
+
+재표본은 (재표본 수 × 관측치) NumPy 배열로 한 번에 생성해 배치 단위로 계산하고,
+배치는 프로세스 풀에 나누어 실행합니다. 배치별 시드는 SeedSequence 로 파생하므로
+같은 seed / batch_size 이면 워커 수와 관계없이 결과가 동일합니다.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_SEED = 20250101
+
+
+# ---------------------------------------------------------------------------
+# 통계량 (배치 벡터 연산)
+# ---------------------------------------------------------------------------
+
+def _one_hot(codes: np.ndarray, k: int) -> np.ndarray:
+    onehot = np.zeros((len(codes), k))
+    onehot[np.arange(len(codes)), codes] = 1.0
+    return onehot
+
+
+def anova_stats(samples: np.ndarray, codes: np.ndarray, k: int):
+    """
+    배치 일원배치 분산분석: samples (B × N), codes (N,) 집단 코드
+    → (F, η², 집단 평균 B × k)
+    """
+    onehot = _one_hot(codes, k)
+    counts = onehot.sum(axis=0)
+    group_means = (samples @ onehot) / counts
+    grand_mean = samples.mean(axis=1, keepdims=True)
+    ssb = ((group_means - grand_mean) ** 2 * counts).sum(axis=1)
+    sst = ((samples - grand_mean) ** 2).sum(axis=1)
+    ssw = sst - ssb
+
+    df_between = k - 1
+    df_within = samples.shape[1] - k
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_stat = (ssb / df_between) / (ssw / df_within)
+        eta_squared = ssb / sst
+    return f_stat, eta_squared, group_means
+
+
+def pearson_stats(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """행 단위 피어슨 상관: x, y (B × n) → (B,)"""
+    xc = x - x.mean(axis=1, keepdims=True)
+    yc = y - y.mean(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (xc * yc).sum(axis=1) / np.sqrt((xc ** 2).sum(axis=1) * (yc ** 2).sum(axis=1))
+
+
+def cronbach_alpha_stats(matrices: np.ndarray) -> np.ndarray:
+    """배치 Cronbach's α: matrices (B × 사례 × 문항) → (B,)"""
+    n_items = matrices.shape[2]
+    item_variances = matrices.var(axis=1, ddof=1).sum(axis=1)
+    total_variance = matrices.sum(axis=2).var(axis=1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (n_items / (n_items - 1)) * (1 - item_variances / total_variance)
+
+
+def rank_of(group_means: np.ndarray, target: int) -> np.ndarray:
+    """집단 평균 (B × k) 에서 target 집단의 순위 (1 = 최고, 동점은 상위 순위)"""
+    return 1 + (group_means > group_means[:, [target]]).sum(axis=1)
+
+
+# ---------------------------------------------------------------------------
+# 배치 작업 (프로세스 풀에서 실행되는 최상위 함수)
+# ---------------------------------------------------------------------------
+
+def _stratified_resample(rng, x: np.ndarray, codes: np.ndarray, k: int, size: int) -> np.ndarray:
+    """집단 내 복원추출 (집단 크기 유지)"""
+    samples = np.empty((size, len(x)))
+    for g in range(k):
+        positions = np.flatnonzero(codes == g)
+        picks = rng.integers(0, len(positions), size=(size, len(positions)))
+        samples[:, positions] = x[positions][picks]
+    return samples
+
+
+def _anova_batch(seed, size, x, codes, k, target, mode):
+    rng = np.random.default_rng(seed)
+    if mode == 'permutation':
+        samples = rng.permuted(np.broadcast_to(x, (size, len(x))), axis=1)
+    else:
+        samples = _stratified_resample(rng, x, codes, k, size)
+    f_stat, eta_squared, group_means = anova_stats(samples, codes, k)
+    ranks = rank_of(group_means, target) if target is not None else np.zeros(size)
+    return np.column_stack([f_stat, eta_squared, ranks])
+
+
+def _pearson_batch(seed, size, x, y, mode):
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    if mode == 'permutation':
+        xs = np.broadcast_to(x, (size, n))
+        ys = rng.permuted(np.broadcast_to(y, (size, n)), axis=1)
+    else:
+        picks = rng.integers(0, n, size=(size, n))
+        xs, ys = x[picks], y[picks]
+    return pearson_stats(xs, ys)[:, None]
+
+
+def _alpha_batch(seed, size, matrix, mode):
+    rng = np.random.default_rng(seed)
+    n_cases, n_items = matrix.shape
+    if mode == 'permutation':
+        # 문항별로 사례 순서를 독립적으로 섞어 문항 간 공분산을 제거
+        samples = rng.permuted(np.broadcast_to(matrix, (size, n_cases, n_items)), axis=1)
+    else:
+        picks = rng.integers(0, n_cases, size=(size, n_cases))
+        samples = matrix[picks]
+    return cronbach_alpha_stats(samples)[:, None]
+
+
+# ---------------------------------------------------------------------------
+# 엔진
+# ---------------------------------------------------------------------------
+
+class ResamplingEngine:
+    """
+    순열검정 p-value 와 부트스트랩 신뢰구간 계산기
+
+    n_resamples: 재표본 수, batch_size: 한 배치의 재표본 수,
+    workers: 프로세스 수 (None = CPU 수, 1 = 현재 프로세스에서 실행)
+    """
+
+    def __init__(self, n_resamples: int = 10000, batch_size: int = 2000, seed: int = DEFAULT_SEED,
+                 workers: Optional[int] = None, confidence: float = 0.95):
+        self.n_resamples = n_resamples
+        self.batch_size = batch_size
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.confidence = confidence
+
+    def _run(self, task, stream: int, *args) -> np.ndarray:
+        """재표본을 배치로 나눠 실행 (stream 별로 독립적인 시드 사용)"""
+        sizes = [self.batch_size] * (self.n_resamples // self.batch_size)
+        if self.n_resamples % self.batch_size:
+            sizes.append(self.n_resamples % self.batch_size)
+        seeds = np.random.SeedSequence([self.seed, stream]).spawn(len(sizes))
+
+        if self.workers > 1 and len(sizes) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(sizes))) as pool:
+                parts = list(pool.map(task, seeds, sizes, *([arg] * len(sizes) for arg in args)))
+        else:
+            parts = [task(seed, size, *args) for seed, size in zip(seeds, sizes)]
+        return np.concatenate(parts)
+
+    def _summary(self, observed: float, null: np.ndarray, boot: np.ndarray, alternative: str = 'greater') -> Dict:
+        """순열 분포와 부트스트랩 분포 → p-value / 신뢰구간"""
+        null = null[~np.isnan(null)]
+        if alternative == 'two-sided':
+            exceed = np.count_nonzero(np.abs(null) >= abs(observed) - 1e-12)
+        elif alternative == 'less':
+            exceed = np.count_nonzero(null <= observed + 1e-12)
+        else:
+            exceed = np.count_nonzero(null >= observed - 1e-12)
+        tail = (1 - self.confidence) / 2 * 100
+        ci_low, ci_high = np.nanpercentile(boot, [tail, 100 - tail]) if np.any(~np.isnan(boot)) else (np.nan, np.nan)
+        return {
+            'observed': float(observed),
+            'p_value': float((exceed + 1) / (len(null) + 1)),
+            'ci_low': float(ci_low),
+            'ci_high': float(ci_high),
+            'confidence': self.confidence,
+            'n_resamples': self.n_resamples,
+        }
+
+    def anova(self, groups: Sequence[Sequence[float]], target: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        F 통계량, η², (target 지정 시) target 집단 순위의 순열 p-value / 부트스트랩 신뢰구간
+
+        순위 p-value 는 집단 라벨을 섞었을 때 관측 순위 이상(더 좋은 순위)이 나올 확률입니다.
+        """
+        arrays = [np.asarray(g, dtype=float) for g in groups]
+        arrays = [a[~np.isnan(a)] for a in arrays]
+        x = np.concatenate(arrays)
+        codes = np.repeat(np.arange(len(arrays)), [len(a) for a in arrays])
+        k = len(arrays)
+
+        f_obs, eta_obs, means_obs = anova_stats(x[None, :], codes, k)
+        null = self._run(_anova_batch, 0, x, codes, k, target, 'permutation')
+        boot = self._run(_anova_batch, 1, x, codes, k, target, 'bootstrap')
+
+        results = {
+            'f_stat': self._summary(f_obs[0], null[:, 0], boot[:, 0]),
+            'eta_squared': self._summary(eta_obs[0], null[:, 1], boot[:, 1]),
+        }
+        if target is not None:
+            rank_obs = rank_of(means_obs, target)[0]
+            rank = self._summary(rank_obs, null[:, 2], boot[:, 2], alternative='less')
+            rank['p_top2'] = float(np.mean(boot[:, 2] <= 2))
+            results['rank'] = rank
+        return results
+
+    def pearson(self, x: Sequence[float], y: Sequence[float]) -> Dict:
+        """피어슨 상관의 양측 순열 p-value 와 부트스트랩 신뢰구간"""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        observed = pearson_stats(x[None, :], y[None, :])[0]
+        null = self._run(_pearson_batch, 2, x, y, 'permutation')[:, 0]
+        boot = self._run(_pearson_batch, 3, x, y, 'bootstrap')[:, 0]
+        return self._summary(observed, null, boot, alternative='two-sided')
+
+    def cronbach_alpha(self, matrix: Sequence[Sequence[float]]) -> Dict:
+        """Cronbach's α (행 = 사례, 열 = 문항) 의 순열 p-value 와 부트스트랩 신뢰구간"""
+        matrix = np.asarray(matrix, dtype=float)
+        observed = cronbach_alpha_stats(matrix[None, :, :])[0]
+        null = self._run(_alpha_batch, 4, matrix, 'permutation')[:, 0]
+        boot = self._run(_alpha_batch, 5, matrix, 'bootstrap')[:, 0]
+        return self._summary(observed, null, boot)
+
+    def pearson_many(self, pairs: Dict[str, tuple]) -> Dict[str, Dict]:
+        """여러 (x, y) 쌍의 피어슨 상관 추론"""
+        return {name: self.pearson(x, y) for name, (x, y) in pairs.items()}
+
+
+def format_result(name: str, result: Dict) -> str:
+    """추론 결과 한 줄 요약"""
+    return (f"{name:24}: {result['observed']:8.3f}  p_perm = {result['p_value']:.4f}  "
+            f"{result['confidence']:.0%} CI [{result['ci_low']:.3f}, {result['ci_high']:.3f}]")
+
+
+def evaluator_pairs(evaluators: List[str]):
+    """평가자 쌍 목록 (입력 순서 유지)"""
+    return [(a, b) for i, a in enumerate(evaluators) for b in evaluators[i + 1:]]
@@ -0,0 +1,330 @@
+"""
+오프라인 의미 유사도 지표 (BERTScore 대체)
+
+인터넷이 차단된 평가 환경에서는 BERT 모델을 내려받을 수 없으므로,
+문자 n-gram TF-IDF 벡터의 코사인 유사도로 응답 간 의미 유사도를 근사합니다.
+
+- 문자 n-gram (기본 3–5자, 소문자 + 공백 정규화)을 64비트 다항식 해시 → n_features 개 버킷으로 사상
+  - 해시는 프로세스 / 실행과 무관하게 고정되므로 벡터를 디스크에 캐시할 수 있음
+  - 한국어도 유니코드 코드 포인트 단위로 그대로 처리
+- IDF 는 참조(그라운드 트루스) 응답 집합에서 계산 (smooth idf: ln((1 + N) / (1 + df)) + 1)
+- 유사도는 L2 정규화한 희소 행렬의 곱 (후보 × 참조)
+- VectorCache: 텍스트 해시 → 해시 n-gram 개수 벡터의 메모리 맵 캐시
+  - 데이터 파일(indices.u32, values.f32)과 새 항목의 색인 조각(delta.idx, 정렬 안 됨)은 이어 쓰기만 하고,
+    정렬된 키 색인(index.npy)은 조각이 색인만큼 커지면 병합해 원자적으로 교체 (병합 비용 합계는 항목 수에 비례)
+    → 시작 시 np.memmap / mmap_mode='r' 로 복사 없이 열기
+  - 하위 디렉터리는 벡터화 설정의 지문별로 분리 (설정이 다르면 섞이지 않음, config.json 으로 확인)
+
+    similarity = TfidfSimilarity(reference_responses, cache=VectorCache('.vector_cache'))
+    scores = similarity.score(candidates)          # (후보 × 참조) 코사인 유사도
+
+가중치는 sklearn TfidfVectorizer(analyzer='char', ngram_range=(3, 5), smooth_idf=True, norm='l2') 와 같은 식이며,
+참조에 없는 후보 n-gram 은 버리지 않고 최대 IDF 로 남깁니다 (후보 쪽 길이 차이를 반영).
+2**20 버킷에서 해시 충돌로 인한 차이는 보통 1e-3 수준입니다.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sparse
+
+DEFAULT_NGRAM_RANGE = (3, 5)
+DEFAULT_N_FEATURES = 2 ** 20
+DEFAULT_MEMORY_SIZE = 4096    # TfidfSimilarity.pairwise 의 후보 벡터 메모리 캐시 크기
+DELTA_MERGE_MIN = 4096        # 색인 조각이 이보다 (그리고 색인보다) 커지면 병합
+
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_INDEX_DTYPE = np.dtype([('key', '<u8'), ('offset', '<i8'), ('length', '<i4')])
+
+
+def _mix(hashes: np.ndarray) -> np.ndarray:
+    """splitmix64 마무리 단계 (하위 비트까지 고르게 섞어 버킷 충돌을 줄임)"""
+    hashes = (hashes ^ (hashes >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    hashes = (hashes ^ (hashes >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return hashes ^ (hashes >> np.uint64(31))
+
+
+def normalize_text(text: str) -> str:
+    """소문자 + 연속 공백을 공백 하나로"""
+    return " ".join(text.lower().split())
+
+
+def text_key(text: str) -> int:
+    """캐시 키 (텍스트 blake2b 해시 64비트)"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class CharNgramHasher:
+    """
+    문자 n-gram 해시 벡터화기
+
+    ngram_range: (최소, 최대) 문자 수, n_features: 해시 버킷 수
+    """
+
+    def __init__(self, ngram_range: Tuple[int, int] = DEFAULT_NGRAM_RANGE, n_features: int = DEFAULT_N_FEATURES):
+        if not 1 <= ngram_range[0] <= ngram_range[1]:
+            raise ValueError(f"invalid ngram_range: {ngram_range}")
+        if not 1 <= n_features <= 2 ** 32:
+            raise ValueError("n_features must be between 1 and 2**32")
+        self.ngram_range = tuple(ngram_range)
+        self.n_features = n_features
+
+    def fingerprint(self) -> str:
+        """벡터화 설정 지문 (캐시 하위 디렉터리 이름)"""
+        config = json.dumps({'ngram_range': self.ngram_range, 'n_features': self.n_features,
+                             'hash': 'poly64-splitmix-v1'}, sort_keys=True)
+        return hashlib.sha256(config.encode('utf-8')).hexdigest()[:16]
+
+    def transform_one(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """텍스트 → (정렬된 버킷 번호 uint32, 개수 float32)"""
+        normalized = normalize_text(text)
+        codes = np.frombuffer(normalized.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        parts = []
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            windows = len(codes) - n + 1
+            if windows <= 0:
+                break
+            hashes = np.full(windows, np.uint64(n))
+            for j in range(n):
+                hashes = hashes * _HASH_MULTIPLIER + codes[j:j + windows] + np.uint64(1)
+            parts.append(_mix(hashes) % np.uint64(self.n_features))
+        if not parts:
+            return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.float32)
+        buckets, counts = np.unique(np.concatenate(parts), return_counts=True)
+        return buckets.astype(np.uint32), counts.astype(np.float32)
+
+    def transform(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """(텍스트 × 버킷) 개수 행렬"""
+        return _stack([self.transform_one(text) for text in texts], self.n_features)
+
+
+def _stack(vectors: List[Tuple[np.ndarray, np.ndarray]], n_features: int) -> sparse.csr_matrix:
+    lengths = np.array([len(indices) for indices, _ in vectors], dtype=np.int64)
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    indices = np.concatenate([indices for indices, _ in vectors] + [np.empty(0, np.uint32)])
+    values = np.concatenate([values for _, values in vectors] + [np.empty(0, np.float32)])
+    return sparse.csr_matrix((values.astype(float), indices.astype(np.int64), indptr),
+                             shape=(len(vectors), n_features))
+
+
+class VectorCache:
+    """
+    텍스트 해시 → 해시 n-gram 개수 벡터의 메모리 맵 디스크 캐시 (이어 쓰기 전용)
+
+    한 번에 하나의 프로세스만 쓰는 것을 가정합니다 (읽기는 여러 프로세스 가능).
+    """
+
+    def __init__(self, directory: str, hasher: Optional[CharNgramHasher] = None):
+        self.hasher = hasher or CharNgramHasher()
+        self.directory = os.path.join(directory, self.hasher.fingerprint())
+        os.makedirs(self.directory, exist_ok=True)
+        self._indices_path = os.path.join(self.directory, 'indices.u32')
+        self._values_path = os.path.join(self.directory, 'values.f32')
+        self._index_path = os.path.join(self.directory, 'index.npy')
+        self._delta_path = os.path.join(self.directory, 'delta.idx')
+        self._check_config()
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def _check_config(self):
+        """config.json 이 없으면 쓰고, 있으면 현재 벡터화 설정과 같은지 확인 (읽기만 하는 경우 쓰지 않음)"""
+        config = {'ngram_range': list(self.hasher.ngram_range), 'n_features': self.hasher.n_features}
+        path = os.path.join(self.directory, 'config.json')
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored != config:
+                raise ValueError(f"vector cache config mismatch in {self.directory}: {stored} != {config}")
+            return
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        os.replace(temp_path, path)
+
+    def _open(self):
+        """색인과 데이터 파일을 메모리 맵으로 열고 (복사 없음) 병합 전 색인 조각 읽기"""
+        if os.path.exists(self._index_path):
+            self._index = np.load(self._index_path, mmap_mode='r')
+        else:
+            self._index = np.empty(0, dtype=_INDEX_DTYPE)
+        self._delta: Dict[int, Tuple[int, int]] = {}
+        if os.path.exists(self._delta_path):
+            with open(self._delta_path, 'rb') as f:
+                data = f.read()
+            # 쓰다 중단된 마지막 항목은 버리고, 병합 직후 중단되어 색인에 이미 있는 키는 제외
+            records = np.frombuffer(data[:len(data) - len(data) % _INDEX_DTYPE.itemsize], dtype=_INDEX_DTYPE)
+            _, merged = self._find(records['key'])
+            self._delta = {int(key): (int(offset), int(length))
+                           for key, offset, length in records[~merged].tolist()}
+        self._map_data()
+
+    def _map_data(self):
+        self._indices = self._map(self._indices_path, np.uint32)
+        self._values = self._map(self._values_path, np.float32)
+
+    @staticmethod
+    def _map(path: str, dtype) -> np.ndarray:
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def __len__(self):
+        return len(self._index) + len(self._delta)
+
+    def _find(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """정렬된 색인에서 키 위치 → (위치, 존재 여부)"""
+        if len(self._index) == 0:
+            return np.zeros(len(keys), dtype=np.int64), np.zeros(len(keys), dtype=bool)
+        position = np.minimum(np.searchsorted(self._index['key'], keys), len(self._index) - 1)
+        return position, self._index['key'][position] == keys
+
+    def _lookup(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """키 → (데이터 위치, 길이, 존재 여부) - 정렬된 색인 다음 색인 조각에서 찾기"""
+        position, found = self._find(keys)
+        entries = self._index[position[found]]
+        offsets = np.zeros(len(keys), dtype=np.int64)
+        lengths = np.zeros(len(keys), dtype=np.int64)
+        offsets[found] = entries['offset']
+        lengths[found] = entries['length']
+        if self._delta:
+            for i in np.flatnonzero(~found):
+                entry = self._delta.get(int(keys[i]))
+                if entry is not None:
+                    offsets[i], lengths[i] = entry
+                    found[i] = True
+        return offsets, lengths, found
+
+    def _append(self, keys: np.ndarray, vectors: List[Tuple[np.ndarray, np.ndarray]]):
+        """새 벡터를 데이터 파일 끝에, 색인 항목을 색인 조각 끝에 쓰기 (조각이 커지면 병합)"""
+        start = len(self._indices)
+        lengths = np.array([len(indices) for indices, _ in vectors], dtype=np.int64)
+        with open(self._indices_path, 'ab') as f:
+            for indices, _ in vectors:
+                f.write(np.ascontiguousarray(indices, dtype='<u4').tobytes())
+        with open(self._values_path, 'ab') as f:
+            for _, values in vectors:
+                f.write(np.ascontiguousarray(values, dtype='<f4').tobytes())
+
+        added = np.empty(len(keys), dtype=_INDEX_DTYPE)
+        added['key'] = keys
+        added['offset'] = start + np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(lengths) else []
+        added['length'] = lengths
+        # 데이터를 먼저 쓰고 색인 항목을 나중에 써서, 중단되어도 색인이 없는 데이터를 가리키지 않음
+        with open(self._delta_path, 'ab') as f:
+            f.write(added.tobytes())
+        self._delta.update((key, (offset, length)) for key, offset, length in added.tolist())
+        self._map_data()
+        if len(self._delta) >= max(DELTA_MERGE_MIN, len(self._index)):
+            self.merge()
+
+    def merge(self):
+        """색인 조각을 정렬된 색인(index.npy)에 병합해 원자적으로 교체하고 조각 파일 삭제"""
+        if not self._delta:
+            return
+        added = np.array([(key, offset, length) for key, (offset, length) in self._delta.items()],
+                         dtype=_INDEX_DTYPE)
+        merged = np.concatenate([np.asarray(self._index), added])
+        merged = merged[np.argsort(merged['key'], kind='stable')]
+
+        temp_path = self._index_path + '.tmp.npy'
+        np.save(temp_path, merged)
+        os.replace(temp_path, self._index_path)
+        os.remove(self._delta_path)
+        self._open()
+
+    def get_many(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """
+        텍스트들의 개수 행렬 (텍스트 × 버킷)
+
+        캐시에 없는 텍스트만 벡터화해 추가하고, 나머지는 메모리 맵에서 바로 읽습니다.
+        """
+        keys = np.array([text_key(text) for text in texts], dtype=np.uint64)
+        offsets, lengths, found = self._lookup(keys)
+        self.hits += int(found.sum())
+        self.misses += int((~found).sum())
+
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            unique_keys, first = np.unique(keys[missing], return_index=True)
+            self._append(unique_keys, [self.hasher.transform_one(texts[missing[i]]) for i in first])
+            offsets, lengths, _ = self._lookup(keys)
+
+        # 항목별 [offset, offset + length) 구간을 한 번에 모으기
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        gather = np.repeat(offsets - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return sparse.csr_matrix((self._values[gather].astype(float), self._indices[gather].astype(np.int64), indptr),
+                                 shape=(len(texts), self.hasher.n_features))
+
+
+class TfidfSimilarity:
+    """
+    문자 n-gram TF-IDF 코사인 유사도
+
+    references: IDF 를 계산할 참조 응답 집합 (점수의 열)
+    cache: VectorCache (없으면 매번 벡터화)
+    memory_size: pairwise 에서 재사용할 후보 벡터 수 (참조 벡터는 미리 계산한 행을 사용)
+    """
+
+    def __init__(self, references: Sequence[str], hasher: Optional[CharNgramHasher] = None,
+                 cache: Optional[VectorCache] = None, memory_size: int = DEFAULT_MEMORY_SIZE):
+        self.cache = cache
+        self.hasher = cache.hasher if cache is not None else (hasher or CharNgramHasher())
+        self.references = list(references)
+        self.memory_size = memory_size
+        self._memory: 'OrderedDict[str, Tuple[np.ndarray, np.ndarray]]' = OrderedDict()
+        self._ref_rows = {text: i for i, text in reversed(list(enumerate(self.references)))}
+
+        ref_counts = self._counts(self.references)
+        document_frequency = np.bincount(ref_counts.indices, minlength=self.hasher.n_features)
+        self.idf = np.log((1 + len(self.references)) / (1 + document_frequency)) + 1
+        self._ref_vectors = self._weight(ref_counts).tocsr()
+        self._ref_vectors.sort_indices()
+
+    def _counts(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        return self.cache.get_many(texts) if self.cache is not None else self.hasher.transform(texts)
+
+    def _weight(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        """TF × IDF 후 행 단위 L2 정규화"""
+        weighted = counts.copy()
+        weighted.data = weighted.data * self.idf[weighted.indices]
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        scale = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        return sparse.diags(scale) @ weighted
+
+    def transform(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """정규화된 TF-IDF 행렬 (텍스트 × 버킷)"""
+        return self._weight(self._counts(texts)).tocsr()
+
+    def score(self, candidates: Sequence[str]) -> np.ndarray:
+        """(후보 × 참조) 코사인 유사도"""
+        return (self.transform(candidates) @ self._ref_vectors.T).toarray()
+
+    def _vector(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """정규화된 TF-IDF 벡터 하나 (정렬된 버킷 번호, 가중치) - 참조는 미리 계산한 행, 그 밖은 메모리 캐시"""
+        row = self._ref_rows.get(text)
+        if row is not None:
+            start, end = self._ref_vectors.indptr[row], self._ref_vectors.indptr[row + 1]
+            return self._ref_vectors.indices[start:end], self._ref_vectors.data[start:end]
+        vector = self._memory.get(text)
+        if vector is not None:
+            self._memory.move_to_end(text)
+            return vector
+        weighted = self.transform([text])
+        weighted.sort_indices()
+        vector = (weighted.indices, weighted.data)
+        self._memory[text] = vector
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+        return vector
+
+    def pairwise(self, reference: str, candidate: str) -> float:
+        """두 텍스트의 코사인 유사도 (같은 IDF 사용)"""
+        ref_indices, ref_values = self._vector(reference)
+        cand_indices, cand_values = self._vector(candidate)
+        _, i, j = np.intersect1d(ref_indices, cand_indices, assume_unique=True, return_indices=True)
+        return float(ref_values[i] @ cand_values[j])
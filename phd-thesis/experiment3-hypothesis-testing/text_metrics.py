@@ -0,0 +1,209 @@
+"""
+BLEU / ROUGE-L 계산 커널
+
+- BLEU: 1–4-gram 수정 정밀도(참조 응답별 최대 빈도로 클리핑), 브레비티 페널티(가장 가까운 참조 길이),
+  문장 / 말뭉치(corpus) 수준, 스무딩 (Chen & Cherry 2014)
+  - n-gram 은 토큰 ID 창(window)을 64비트 다항식 해시로 바꿔 np.unique 로 개수를 셉니다
+- ROUGE-L: 최장 공통 부분열(LCS)을 비트 병렬 알고리즘(Allison-Dix / Hyyrö)으로 계산
+  - 참조 응답의 토큰별 위치 비트마스크를 한 번 만든 뒤, 후보 토큰마다 정수 연산 몇 번으로 갱신
+    → O(후보 길이 × 참조 길이 / 워드 크기), 긴 상담 응답에도 거의 선형
+
+nltk.translate.bleu_score (sentence_bleu / corpus_bleu, method0–3) 및
+rouge_score (rougeL, 같은 토큰화) 와 같은 값을 냅니다.
+"""
+
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAX_ORDER = 4
+SMOOTHING_METHODS = ('none', 'epsilon', 'add1', 'exp')
+DEFAULT_SMOOTHING = 'add1'
+EPSILON = 0.1
+
+# 64비트 다항식 해시 승수 (n-gram 창 → 정수 키)
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+# ---------------------------------------------------------------------------
+# n-gram 개수 (해시)
+# ---------------------------------------------------------------------------
+
+def encode_tokens(tokens: Sequence[Hashable], vocabulary: Dict[Hashable, int]) -> np.ndarray:
+    """토큰 → 정수 ID (어휘에 없으면 추가)"""
+    return np.fromiter((vocabulary.setdefault(token, len(vocabulary)) for token in tokens),
+                       dtype=np.int64, count=len(tokens))
+
+
+def ngram_hashes(ids: np.ndarray, n: int) -> np.ndarray:
+    """
+    토큰 ID 배열의 n-gram 해시 (창 단위 벡터 연산)
+
+    음수 ID(OOV)가 포함된 창은 제외합니다.
+    """
+    windows = len(ids) - n + 1
+    if windows <= 0:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.zeros(windows, dtype=np.uint64)
+    valid = np.ones(windows, dtype=bool)
+    for j in range(n):
+        part = ids[j:j + windows]
+        valid &= part >= 0
+        hashes = hashes * _HASH_MULTIPLIER + (np.maximum(part, 0).astype(np.uint64) + np.uint64(1))
+    return hashes[valid]
+
+
+def ngram_counts(ids: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """n-gram 해시별 개수 → (정렬된 해시, 개수)"""
+    return np.unique(ngram_hashes(ids, n), return_counts=True)
+
+
+def _lookup(keys: np.ndarray, table: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """정렬된 (해시, 개수) 표에서 keys 의 개수 (없으면 0)"""
+    table_keys, table_counts = table
+    if len(table_keys) == 0:
+        return np.zeros(len(keys), dtype=np.int64)
+    index = np.minimum(np.searchsorted(table_keys, keys), len(table_keys) - 1)
+    return np.where(table_keys[index] == keys, table_counts[index], 0)
+
+
+def closest_ref_length(ref_lengths: Sequence[int], hyp_len: int) -> int:
+    """후보 길이와 가장 가까운 참조 길이 (같으면 짧은 쪽)"""
+    return min(ref_lengths, key=lambda ref_len: (abs(ref_len - hyp_len), ref_len))
+
+
+def bleu_statistics(references: Sequence[np.ndarray], hypothesis: np.ndarray,
+                    max_order: int = MAX_ORDER) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """
+    BLEU 충분 통계량: (차수별 클리핑 일치 수, 차수별 후보 n-gram 수, 후보 길이, 가장 가까운 참조 길이)
+
+    references / hypothesis 는 같은 어휘로 변환한 토큰 ID 배열
+    """
+    matches = np.zeros(max_order)
+    totals = np.zeros(max_order)
+    for n in range(1, max_order + 1):
+        keys, counts = ngram_counts(hypothesis, n)
+        max_ref_counts = np.zeros(len(keys), dtype=np.int64)
+        for reference in references:
+            max_ref_counts = np.maximum(max_ref_counts, _lookup(keys, ngram_counts(reference, n)))
+        matches[n - 1] = np.minimum(counts, max_ref_counts).sum()
+        totals[n - 1] = max(1, len(hypothesis) - n + 1)
+    ref_len = closest_ref_length([len(reference) for reference in references], len(hypothesis))
+    return matches, totals, len(hypothesis), ref_len
+
+
+def bleu_from_statistics(matches, totals, hyp_len, ref_len, smoothing: str = DEFAULT_SMOOTHING,
+                         weights: Optional[Sequence[float]] = None) -> np.ndarray:
+    """
+    충분 통계량 → BLEU (배열 브로드캐스팅: matches / totals 의 마지막 축이 n-gram 차수)
+
+    smoothing: 'none' (스무딩 없음), 'epsilon' (일치 0 → 0.1), 'add1' (2-gram 이상 +1, Lin & Och),
+               'exp' (NIST 기하급수 스무딩)
+    """
+    matches = np.asarray(matches, dtype=float)
+    totals = np.asarray(totals, dtype=float)
+    hyp_len = np.asarray(hyp_len, dtype=float)
+    ref_len = np.asarray(ref_len, dtype=float)
+    max_order = matches.shape[-1]
+    weights = np.full(max_order, 1.0 / max_order) if weights is None else np.asarray(weights, dtype=float)
+
+    zero = matches == 0
+    if smoothing == 'none':
+        precisions = matches / totals
+    elif smoothing == 'epsilon':
+        precisions = np.where(zero, EPSILON, matches) / totals
+    elif smoothing == 'add1':
+        higher = np.arange(max_order) > 0
+        precisions = np.where(higher, (matches + 1) / (totals + 1), matches / totals)
+    elif smoothing == 'exp':
+        k = np.cumsum(zero, axis=-1)
+        precisions = np.where(zero, 1.0 / (2.0 ** k * totals), matches / totals)
+    else:
+        raise ValueError(f"unknown smoothing method: {smoothing} (choose from {SMOOTHING_METHODS})")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_precision = (weights * np.log(precisions)).sum(axis=-1)
+        brevity = np.where(hyp_len > ref_len, 1.0, np.exp(1 - ref_len / hyp_len))
+        score = brevity * np.exp(log_precision)
+    # 유니그램 일치가 없으면 스무딩과 관계없이 0 (nltk 와 동일)
+    return np.where((matches[..., 0] > 0) & (hyp_len > 0), score, 0.0)
+
+
+def sentence_bleu(references: Sequence[Sequence[Hashable]], hypothesis: Sequence[Hashable],
+                  max_order: int = MAX_ORDER, smoothing: str = DEFAULT_SMOOTHING) -> float:
+    """문장 수준 BLEU (참조 응답 여러 개 가능)"""
+    vocabulary: Dict[Hashable, int] = {}
+    hyp_ids = encode_tokens(hypothesis, vocabulary)
+    ref_ids = [encode_tokens(reference, vocabulary) for reference in references]
+    return float(bleu_from_statistics(*bleu_statistics(ref_ids, hyp_ids, max_order), smoothing=smoothing))
+
+
+def corpus_bleu(list_of_references: Sequence[Sequence[Sequence[Hashable]]],
+                hypotheses: Sequence[Sequence[Hashable]],
+                max_order: int = MAX_ORDER, smoothing: str = DEFAULT_SMOOTHING) -> float:
+    """말뭉치 수준 BLEU (문장별 일치 수 / n-gram 수 / 길이를 합산한 뒤 한 번 계산)"""
+    vocabulary: Dict[Hashable, int] = {}
+    matches = np.zeros(max_order)
+    totals = np.zeros(max_order)
+    hyp_total = ref_total = 0
+    for references, hypothesis in zip(list_of_references, hypotheses):
+        hyp_ids = encode_tokens(hypothesis, vocabulary)
+        ref_ids = [encode_tokens(reference, vocabulary) for reference in references]
+        sentence_matches, sentence_totals, hyp_len, ref_len = bleu_statistics(ref_ids, hyp_ids, max_order)
+        matches += sentence_matches
+        totals += sentence_totals
+        hyp_total += hyp_len
+        ref_total += ref_len
+    return float(bleu_from_statistics(matches, totals, hyp_total, ref_total, smoothing=smoothing))
+
+
+# ---------------------------------------------------------------------------
+# ROUGE-L (비트 병렬 LCS)
+# ---------------------------------------------------------------------------
+
+def match_masks(tokens: Sequence[Hashable]) -> Dict[Hashable, int]:
+    """토큰별 위치 비트마스크 (i 번째 비트 = i 번째 토큰이 해당 토큰)"""
+    masks: Dict[Hashable, int] = {}
+    for position, token in enumerate(tokens):
+        masks[token] = masks.get(token, 0) | (1 << position)
+    return masks
+
+
+def lcs_length_from_masks(masks: Dict[Hashable, int], length: int, tokens: Sequence[Hashable]) -> int:
+    """미리 만든 비트마스크(길이 length 인 시퀀스)와 tokens 의 LCS 길이"""
+    full = (1 << length) - 1
+    v = full
+    for token in tokens:
+        mask = masks.get(token)
+        if mask is None:
+            continue
+        u = v & mask
+        v = ((v + u) | (v - u)) & full
+    return length - bin(v).count('1')
+
+
+def lcs_length(a: Sequence[Hashable], b: Sequence[Hashable]) -> int:
+    """최장 공통 부분열 길이 (비트 병렬)"""
+    if len(a) < len(b):
+        a, b = b, a
+    return lcs_length_from_masks(match_masks(b), len(b), a)
+
+
+def rouge_l_from_lcs(lcs, ref_len, hyp_len, beta: float = 1.0):
+    """LCS 길이 → ROUGE-L 정밀도 / 재현율 / F (배열 가능)"""
+    lcs = np.asarray(lcs, dtype=float)
+    ref_len = np.asarray(ref_len, dtype=float)
+    hyp_len = np.asarray(hyp_len, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(hyp_len > 0, lcs / hyp_len, 0.0)
+        recall = np.where(ref_len > 0, lcs / ref_len, 0.0)
+        fmeasure = np.where(precision + recall > 0,
+                            (1 + beta ** 2) * precision * recall / (recall + beta ** 2 * precision), 0.0)
+    return precision, recall, fmeasure
+
+
+def rouge_l(reference: Sequence[Hashable], hypothesis: Sequence[Hashable], beta: float = 1.0) -> Dict[str, float]:
+    """문장 수준 ROUGE-L → {'precision', 'recall', 'fmeasure'}"""
+    lcs = lcs_length(reference, hypothesis)
+    precision, recall, fmeasure = rouge_l_from_lcs(lcs, len(reference), len(hypothesis), beta)
+    return {'precision': float(precision), 'recall': float(recall), 'fmeasure': float(fmeasure)}
@@ -0,0 +1,237 @@
+"""
+NLP 지표용 토큰화 계층 (한국어 대응 + 캐시)
+
+기본 토큰화(소문자 + 공백 분리)는 한국어 어절(조사 / 어미가 붙은 단위)을 통째로 하나의 토큰으로 보므로
+'발표가' 와 '발표를' 처럼 같은 말도 일치하지 않아 한국어 응답(백엔드 lang == "ko")의 점수가 0 에 가깝게 나옵니다.
+이 모듈은 지표 계산 전체에서 공유하는 교체 가능한 토큰화기를 제공합니다.
+
+- 'whitespace': 소문자 + 공백 분리 (기존 calculate_* 와 동일)
+- 'syllable': 어절 안의 한글 구간을 음절 n-gram 으로 분할 (기본 2음절: '발표가' → '발표', '표가')
+- 'jamo': 한글 음절을 초성 / 중성 / 종성 자모로 풀어 자모 n-gram 으로 분할 (기본 3자모, 활용형 '했어요' / '해요' 도 부분 일치)
+  - 한글이 없는 토큰(영어 등)은 세 방식 모두 공백 분리와 같은 토큰을 냅니다 → 영어 점수는 바뀌지 않음
+- CachedTokenizer: 분할 결과를 메모리 LRU + (선택) sqlite 파일에 캐시
+  - 큰 이중 언어 말뭉치도 텍스트마다 한 번만 분할하고, 모든 지표 / 실행이 결과를 공유
+  - 키 = (토큰화기 이름, 텍스트 blake2b 해시) 이므로 방식이 다르면 섞이지 않음
+
+    tokenize = get_tokenizer('syllable', cache_path='.token_cache.sqlite')
+    calculator = NLPMetricsCalculator(tokenizer=tokenize)
+    scorer = CorpusScorer(references, tokenize=tokenize)
+"""
+
+import hashlib
+import re
+import sqlite3
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Sequence
+
+TOKENIZERS = ('whitespace', 'syllable', 'jamo')
+# 방식별 기본 n-gram 길이 (자모 3개 ≈ 음절 하나)
+DEFAULT_NGRAM = {'syllable': 2, 'jamo': 3}
+DEFAULT_CACHE_SIZE = 100_000
+SQLITE_TIMEOUT = 60.0
+# sqlite IN (...) 조회 한 번에 넣는 키 수
+_SQLITE_BATCH = 500
+
+# 캐시 키에 포함 (분할 규칙이 바뀌면 올림)
+TOKENIZATION_VERSION = 1
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = ["", *"ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"]
+
+# 한글 음절 + 호환 자모 (ㅋㅋ, ㅠㅠ 등) 구간
+_HANGUL_RUN = re.compile(r'[가-힣ㄱ-ㆎ]+')
+_WORD_CHARACTER = re.compile(r'\w')
+
+
+def has_hangul(text: str) -> bool:
+    return _HANGUL_RUN.search(text) is not None
+
+
+def decompose_jamo(text: str) -> str:
+    """한글 음절 → 초성 / 중성 / (종성) 호환 자모 ('했' → 'ㅎㅐㅆ'), 그 밖의 문자는 그대로"""
+    parts = []
+    for char in text:
+        code = ord(char)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            index = code - _HANGUL_BASE
+            parts.append(_CHOSEONG[index // 588] + _JUNGSEONG[index % 588 // 28] + _JONGSEONG[index % 28])
+        else:
+            parts.append(char)
+    return "".join(parts)
+
+
+def char_ngrams(text: str, n: int) -> List[str]:
+    """겹치는 문자 n-gram (n 보다 짧으면 텍스트 전체 하나)"""
+    if len(text) <= n:
+        return [text] if text else []
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+
+class WhitespaceTokenizer:
+    """소문자 + 공백 분리 (기존 calculate_* 지표의 토큰화)"""
+
+    name = 'whitespace'
+
+    def __call__(self, text: str) -> List[str]:
+        return text.lower().split()
+
+
+class KoreanTokenizer:
+    """
+    한국어 음절 / 자모 n-gram 토큰화기
+
+    mode: 'syllable' (음절 n-gram) 또는 'jamo' (자모 n-gram)
+    n: n-gram 길이 (음절 또는 자모 수, 없으면 DEFAULT_NGRAM)
+
+    공백으로 나눈 각 토큰에서 한글 구간만 n-gram 으로 나누고, 한글과 붙어 있는 영문 / 숫자 조각은
+    그대로 토큰으로 남기며 문장부호만 있는 조각은 버립니다. 한글이 없는 토큰은 공백 분리와 같습니다.
+    """
+
+    def __init__(self, mode: str = 'syllable', n: Optional[int] = None):
+        if mode not in DEFAULT_NGRAM:
+            raise ValueError(f"unknown Korean tokenizer mode: {mode} (choose 'syllable' or 'jamo')")
+        n = DEFAULT_NGRAM[mode] if n is None else n
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        self.mode = mode
+        self.n = n
+        self.name = f'{mode}-{n}'
+
+    def _segment(self, run: str) -> List[str]:
+        return char_ngrams(decompose_jamo(run) if self.mode == 'jamo' else run, self.n)
+
+    def __call__(self, text: str) -> List[str]:
+        tokens: List[str] = []
+        for word in unicodedata.normalize('NFC', text).lower().split():
+            if not has_hangul(word):
+                tokens.append(word)
+                continue
+            position = 0
+            for match in _HANGUL_RUN.finditer(word):
+                rest = word[position:match.start()]
+                if _WORD_CHARACTER.search(rest):
+                    tokens.append(rest)
+                tokens.extend(self._segment(match.group()))
+                position = match.end()
+            rest = word[position:]
+            if _WORD_CHARACTER.search(rest):
+                tokens.append(rest)
+        return tokens
+
+
+def tokenizer_name(tokenize: Callable[[str], List[str]]) -> str:
+    """캐시 키에 쓰는 토큰화기 이름 (name 속성, 없으면 함수 경로)"""
+    name = getattr(tokenize, 'name', None)
+    if name is None:
+        name = f"{getattr(tokenize, '__module__', '')}.{getattr(tokenize, '__qualname__', type(tokenize).__name__)}"
+    return f"{name}@v{TOKENIZATION_VERSION}"
+
+
+class CachedTokenizer:
+    """
+    분할 결과 캐시를 가진 토큰화기 (호출 방식은 원래 토큰화기와 같음)
+
+    tokenize: 텍스트 → 토큰 목록
+    maxsize: 메모리 LRU 항목 수
+    path: sqlite 파일 경로 (주면 실행 간에도 분할 결과를 재사용)
+    """
+
+    def __init__(self, tokenize: Callable[[str], List[str]], maxsize: int = DEFAULT_CACHE_SIZE,
+                 path: Optional[str] = None):
+        self.tokenize = tokenize
+        self.name = tokenizer_name(tokenize)
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._memory: 'OrderedDict[str, List[str]]' = OrderedDict()
+        self._connection = None
+        if path:
+            # 여러 프로세스가 같은 파일을 공유할 수 있도록 잠금 대기 시간을 넉넉히
+            self._connection = sqlite3.connect(path, timeout=SQLITE_TIMEOUT)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS tokens (key TEXT PRIMARY KEY, tokens TEXT NOT NULL)")
+            self._connection.commit()
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+        return f"{self.name}:{digest}"
+
+    def _remember(self, key: str, tokens: List[str]):
+        self._memory[key] = tokens
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def __call__(self, text: str) -> List[str]:
+        return self.tokenize_many([text])[0]
+
+    def tokenize_many(self, texts: Sequence[str]) -> List[List[str]]:
+        """여러 텍스트를 한 번에 분할 (캐시 조회 / 저장을 묶어서 처리)"""
+        keys = [self._key(text) for text in texts]
+        results: List[Optional[List[str]]] = [None] * len(texts)
+        pending = {}
+        for i, key in enumerate(keys):
+            tokens = self._memory.get(key)
+            if tokens is not None:
+                self._memory.move_to_end(key)
+                results[i] = tokens
+            else:
+                pending.setdefault(key, []).append(i)
+
+        if pending and self._connection is not None:
+            stored = {}
+            pending_keys = list(pending)
+            for start in range(0, len(pending_keys), _SQLITE_BATCH):
+                batch = pending_keys[start:start + _SQLITE_BATCH]
+                query = f"SELECT key, tokens FROM tokens WHERE key IN ({','.join('?' * len(batch))})"
+                stored.update(self._connection.execute(query, batch).fetchall())
+            for key, joined in stored.items():
+                tokens = joined.split()
+                self._remember(key, tokens)
+                for i in pending.pop(key):
+                    results[i] = tokens
+
+        self.hits += len(texts) - sum(len(positions) for positions in pending.values())
+        self.misses += sum(len(positions) for positions in pending.values())
+        if pending:
+            new_rows = []
+            for key, positions in pending.items():
+                tokens = list(self.tokenize(texts[positions[0]]))
+                self._remember(key, tokens)
+                for i in positions:
+                    results[i] = tokens
+                # 토큰은 공백을 포함하지 않으므로 공백으로 이어 저장
+                new_rows.append((key, " ".join(tokens)))
+            if self._connection is not None:
+                self._connection.executemany("INSERT OR REPLACE INTO tokens VALUES (?, ?)", new_rows)
+                self._connection.commit()
+        return results
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def tokenize_many(tokenize: Callable[[str], List[str]], texts: Iterable[str]) -> List[List[str]]:
+    """토큰화기가 CachedTokenizer 면 묶음 조회, 아니면 텍스트마다 호출"""
+    texts = list(texts)
+    if isinstance(tokenize, CachedTokenizer):
+        return tokenize.tokenize_many(texts)
+    return [tokenize(text) for text in texts]
+
+
+def get_tokenizer(name: str = 'whitespace', n: Optional[int] = None, cache_size: int = DEFAULT_CACHE_SIZE,
+                  cache_path: Optional[str] = None) -> CachedTokenizer:
+    """이름으로 캐시된 토큰화기 만들기 ('whitespace', 'syllable', 'jamo')"""
+    if name == 'whitespace':
+        tokenize = WhitespaceTokenizer()
+    elif name in DEFAULT_NGRAM:
+        tokenize = KoreanTokenizer(name, n)
+    else:
+        raise ValueError(f"unknown tokenizer: {name} (choose from {TOKENIZERS})")
+    return CachedTokenizer(tokenize, maxsize=cache_size, path=cache_path)